@@ -0,0 +1,36 @@
+"""Industry coverage aggregates for peer benchmarking
+
+Revision ID: 002
+Revises: 001
+Create Date: 2026-10-18
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+revision = '002'
+down_revision = '001'
+branch_labels = None
+depends_on = None
+
+def upgrade() -> None:
+    op.create_table(
+        'industry_coverage_aggregates',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('industry', sa.String(length=100), nullable=True),
+        sa.Column('scope', sa.String(length=20), nullable=True),
+        sa.Column('key', sa.String(length=100), nullable=True),
+        sa.Column('histogram', postgresql.ARRAY(sa.Integer()), nullable=True),
+        sa.Column('sample_count', sa.Integer(), nullable=True),
+        sa.Column('score_sum', sa.Float(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('industry', 'scope', 'key', name='uq_industry_scope_key')
+    )
+    op.create_index('ix_industry_coverage_aggregates_id', 'industry_coverage_aggregates', ['id'])
+    op.create_index('ix_industry_coverage_aggregates_industry', 'industry_coverage_aggregates', ['industry'])
+
+def downgrade() -> None:
+    op.drop_table('industry_coverage_aggregates')
@@ -0,0 +1,31 @@
+"""Denormalized technique detail documents
+
+Revision ID: 003
+Revises: 002
+Create Date: 2026-10-19
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = '003'
+down_revision = '002'
+branch_labels = None
+depends_on = None
+
+def upgrade() -> None:
+    op.create_table(
+        'technique_documents',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('technique_id', sa.String(length=20), nullable=True),
+        sa.Column('body', sa.LargeBinary(), nullable=True),
+        sa.Column('etag', sa.String(length=32), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_technique_documents_id', 'technique_documents', ['id'])
+    op.create_index('ix_technique_documents_technique_id', 'technique_documents', ['technique_id'], unique=True)
+
+def downgrade() -> None:
+    op.drop_table('technique_documents')
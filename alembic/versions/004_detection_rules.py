@@ -0,0 +1,39 @@
+"""Tenant detection rule inventory
+
+Revision ID: 004
+Revises: 003
+Create Date: 2026-10-19
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+revision = '004'
+down_revision = '003'
+branch_labels = None
+depends_on = None
+
+def upgrade() -> None:
+    op.create_table(
+        'detection_rules',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('assessment_id', sa.Integer(), nullable=True),
+        sa.Column('rule_id', sa.String(length=100), nullable=True),
+        sa.Column('title', sa.String(length=500), nullable=True),
+        sa.Column('level', sa.String(length=20), nullable=True),
+        sa.Column('status', sa.String(length=20), nullable=True),
+        sa.Column('technique_ids', postgresql.ARRAY(sa.String()), nullable=True),
+        sa.Column('component_ids', postgresql.ARRAY(sa.String()), nullable=True),
+        sa.Column('platforms', postgresql.ARRAY(sa.String()), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['assessment_id'], ['assessments.id']),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('assessment_id', 'rule_id', name='uq_detection_rule_assessment_rule')
+    )
+    op.create_index('ix_detection_rules_id', 'detection_rules', ['id'])
+    op.create_index('ix_detection_rules_assessment_id', 'detection_rules', ['assessment_id'])
+
+def downgrade() -> None:
+    op.drop_table('detection_rules')
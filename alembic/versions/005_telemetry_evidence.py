@@ -0,0 +1,35 @@
+"""Telemetry sample evidence per data component
+
+Revision ID: 005
+Revises: 004
+Create Date: 2026-10-19
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+revision = '005'
+down_revision = '004'
+branch_labels = None
+depends_on = None
+
+def upgrade() -> None:
+    op.create_table(
+        'telemetry_evidence',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('assessment_id', sa.Integer(), nullable=True),
+        sa.Column('component_id', sa.String(length=20), nullable=True),
+        sa.Column('event_count', sa.BigInteger(), nullable=True),
+        sa.Column('signatures', postgresql.ARRAY(sa.String()), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['assessment_id'], ['assessments.id']),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('assessment_id', 'component_id', name='uq_telemetry_assessment_component')
+    )
+    op.create_index('ix_telemetry_evidence_id', 'telemetry_evidence', ['id'])
+    op.create_index('ix_telemetry_evidence_assessment_id', 'telemetry_evidence', ['assessment_id'])
+
+def downgrade() -> None:
+    op.drop_table('telemetry_evidence')
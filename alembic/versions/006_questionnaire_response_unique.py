@@ -0,0 +1,29 @@
+"""One questionnaire response per assessment and question
+
+Revision ID: 006
+Revises: 005
+Create Date: 2026-10-19
+
+"""
+
+from alembic import op
+
+revision = '006'
+down_revision = '005'
+branch_labels = None
+depends_on = None
+
+def upgrade() -> None:
+    # Re-submitted questionnaires used to append rows; keep the latest answer per question.
+    op.execute("""
+        DELETE FROM questionnaire_responses r
+        USING questionnaire_responses newer
+        WHERE r.assessment_id = newer.assessment_id
+          AND r.question_id = newer.question_id
+          AND r.id < newer.id
+    """)
+    op.create_unique_constraint('uq_questionnaire_response_question', 'questionnaire_responses',
+                                ['assessment_id', 'question_id'])
+
+def downgrade() -> None:
+    op.drop_constraint('uq_questionnaire_response_question', 'questionnaire_responses', type_='unique')
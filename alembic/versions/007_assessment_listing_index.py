@@ -0,0 +1,22 @@
+"""Composite index for keyset-paginated assessment listing
+
+Revision ID: 007
+Revises: 006
+Create Date: 2026-10-19
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = '007'
+down_revision = '006'
+branch_labels = None
+depends_on = None
+
+def upgrade() -> None:
+    op.create_index('ix_assessments_tenant_created', 'assessments',
+                    ['tenant_id', sa.text('created_at DESC'), sa.text('id DESC')])
+
+def downgrade() -> None:
+    op.drop_index('ix_assessments_tenant_created', table_name='assessments')
@@ -0,0 +1,68 @@
+"""Hash-partition technique_coverage and questionnaire_responses by assessment
+
+Revision ID: 008
+Revises: 007
+Create Date: 2026-10-19
+
+"""
+
+from alembic import op
+
+revision = '008'
+down_revision = '007'
+branch_labels = None
+depends_on = None
+
+PARTITIONS = 16
+
+# table -> (unique constraints, extra indexes) recreated on the new table
+TABLES = {
+    'technique_coverage': ((), ('CREATE INDEX ix_technique_coverage_assessment_id '
+                                'ON technique_coverage (assessment_id)',)),
+    'questionnaire_responses': (('uq_questionnaire_response_question UNIQUE (assessment_id, question_id)',), ()),
+}
+
+
+def _swap_out(table: str):
+    # Free the names the new table needs; the old table is dropped once its rows are copied.
+    op.execute(f"ALTER TABLE {table} RENAME TO {table}_old")
+    op.execute(f"ALTER TABLE {table}_old RENAME CONSTRAINT {table}_pkey TO {table}_old_pkey")
+    op.execute(f"ALTER INDEX ix_{table}_id RENAME TO ix_{table}_old_id")
+    op.execute(f"ALTER TABLE {table}_old DROP CONSTRAINT IF EXISTS uq_questionnaire_response_question")
+
+
+def _swap_in(table: str, unique, indexes, primary_key: str):
+    op.execute(f"ALTER SEQUENCE {table}_id_seq OWNED BY {table}.id")
+    op.execute(f"DROP TABLE {table}_old")
+    op.execute(f"ALTER TABLE {table} ADD CONSTRAINT {table}_pkey PRIMARY KEY ({primary_key})")
+    op.execute(f"ALTER TABLE {table} ADD CONSTRAINT {table}_assessment_id_fkey "
+               f"FOREIGN KEY (assessment_id) REFERENCES assessments (id)")
+    for constraint in unique:
+        op.execute(f"ALTER TABLE {table} ADD CONSTRAINT {constraint}")
+    op.execute(f"CREATE INDEX ix_{table}_id ON {table} (id)")
+    for index in indexes:
+        op.execute(index)
+    op.execute(f"ANALYZE {table}")
+
+
+def upgrade() -> None:
+    for table, (unique, indexes) in TABLES.items():
+        _swap_out(table)
+        op.execute(f"CREATE TABLE {table} (LIKE {table}_old INCLUDING DEFAULTS) PARTITION BY HASH (assessment_id)")
+        op.execute(f"ALTER TABLE {table} ALTER COLUMN assessment_id SET NOT NULL")
+        for remainder in range(PARTITIONS):
+            op.execute(f"CREATE TABLE {table}_p{remainder:02d} PARTITION OF {table} "
+                       f"FOR VALUES WITH (MODULUS {PARTITIONS}, REMAINDER {remainder})")
+        # Rows without an assessment are unreachable through the API and cannot be routed.
+        op.execute(f"INSERT INTO {table} SELECT * FROM {table}_old WHERE assessment_id IS NOT NULL")
+        # Constraints and indexes are built per partition after the load rather than maintained during it.
+        _swap_in(table, unique, indexes, 'id, assessment_id')
+
+
+def downgrade() -> None:
+    for table, (unique, _) in TABLES.items():
+        _swap_out(table)
+        op.execute(f"CREATE TABLE {table} (LIKE {table}_old INCLUDING DEFAULTS)")
+        op.execute(f"ALTER TABLE {table} ALTER COLUMN assessment_id DROP NOT NULL")
+        op.execute(f"INSERT INTO {table} SELECT * FROM {table}_old")
+        _swap_in(table, unique, (), 'id')
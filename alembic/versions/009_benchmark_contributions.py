@@ -0,0 +1,64 @@
+"""Record each assessment's benchmark contribution and rebuild the aggregates
+
+Revision ID: 009
+Revises: 008
+Create Date: 2026-10-19
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = '009'
+down_revision = '008'
+branch_labels = None
+depends_on = None
+
+BUCKETS = 10
+
+
+def upgrade() -> None:
+    op.add_column('assessments', sa.Column('benchmark_industry', sa.String(length=100), nullable=True))
+    op.add_column('assessments', sa.Column('benchmark_contribution', sa.JSON(), nullable=True))
+    # Rebuild the aggregates from stored coverage, as contribution() would have computed them:
+    # applicable top-level techniques, the mean per tactic and the overall mean. Every assessment
+    # then carries exactly what the aggregates count for it.
+    op.execute("""
+        CREATE TEMPORARY TABLE benchmark_backfill ON COMMIT DROP AS
+        WITH scores AS (
+            SELECT a.id AS assessment_id, a.industry, tc.technique_id, tc.confidence_score AS score, t.tactics
+            FROM assessments a
+            JOIN technique_coverage tc ON tc.assessment_id = a.id
+            JOIN techniques t ON t.technique_id = tc.technique_id
+            WHERE a.industry IS NOT NULL AND a.status IS DISTINCT FROM 'archived'
+              AND tc.coverage_status <> 'NOT_APPLICABLE' AND tc.confidence_score IS NOT NULL
+        )
+        SELECT assessment_id, industry, 'technique' AS scope, technique_id AS key, score FROM scores
+        UNION ALL
+        SELECT assessment_id, industry, 'tactic', tactic, avg(score)
+        FROM scores CROSS JOIN unnest(tactics) AS tactic GROUP BY assessment_id, industry, tactic
+        UNION ALL
+        SELECT assessment_id, industry, 'overall', 'all', avg(score) FROM scores GROUP BY assessment_id, industry
+    """)
+    bucket = f"least(greatest(floor(score * {BUCKETS})::int, 0), {BUCKETS - 1})"
+    histogram = ", ".join(f"count(*) FILTER (WHERE {bucket} = {b})" for b in range(BUCKETS))
+    op.execute("DELETE FROM industry_coverage_aggregates")
+    op.execute(f"""
+        INSERT INTO industry_coverage_aggregates (industry, scope, key, histogram, sample_count, score_sum, updated_at)
+        SELECT industry, scope, key, ARRAY[{histogram}], count(*), sum(score), now()
+        FROM benchmark_backfill GROUP BY industry, scope, key
+    """)
+    op.execute("""
+        UPDATE assessments a SET benchmark_industry = c.industry, benchmark_contribution = c.contribution
+        FROM (
+            SELECT assessment_id, industry, json_object_agg(scope, keys) AS contribution
+            FROM (SELECT assessment_id, industry, scope, json_object_agg(key, score) AS keys
+                  FROM benchmark_backfill GROUP BY assessment_id, industry, scope) per_scope
+            GROUP BY assessment_id, industry
+        ) c
+        WHERE a.id = c.assessment_id
+    """)
+
+def downgrade() -> None:
+    op.drop_column('assessments', 'benchmark_contribution')
+    op.drop_column('assessments', 'benchmark_industry')
@@ -0,0 +1,24 @@
+"""Record when an assessment was archived
+
+Revision ID: 010
+Revises: 009
+Create Date: 2026-10-19
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = '010'
+down_revision = '009'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('assessments', sa.Column('archived_at', sa.DateTime(), nullable=True))
+    # The archive time was not recorded before; updated_at is the closest known bound.
+    op.execute("UPDATE assessments SET archived_at = updated_at WHERE status = 'archived'")
+
+def downgrade() -> None:
+    op.drop_column('assessments', 'archived_at')
@@ -1,12 +1,25 @@
-from fastapi import APIRouter, Depends, HTTPException
+import base64
+import orjson
+from fastapi import APIRouter, Depends, File, HTTPException, Query, Request, UploadFile
+from fastapi.responses import ORJSONResponse
+from sqlalchemy import func, text, tuple_
 from sqlalchemy.orm import Session
 from pydantic import BaseModel
-from typing import List, Optional, Dict
+from typing import Optional, Dict
 from datetime import datetime
-from app.database import get_db
+from app.database import get_db, get_read_db
 from app.models.tenant import User
-from app.models.assessment import Assessment
-from app.utils.security import get_current_user
+from app.models.assessment import Assessment, DetectionRule, TelemetryEvidence
+from app.config import get_settings
+from app.services.benchmarking import BenchmarkAggregator
+from app.services.catalog import get_catalog
+from app.services.retention import ARCHIVED_STATUS
+from app.services.sigma_ingest import ingest_rules
+from app.services.single_flight import LockTimeout, advisory_lock
+from app.services.telemetry_ingest import ingest_telemetry
+from app.utils.admission import admit
+from app.utils.http_cache import CacheValidators, assessment_list_validators
+from app.utils.security import get_current_user, get_current_user_read
 
 router = APIRouter()
 
@@ -49,25 +62,219 @@ async def create_assessment(
     return assessment
 
 
-@router.get("/", response_model=List[AssessmentResponse])
-async def list_assessments(current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
-    assessments = db.query(Assessment)\
-        .filter(Assessment.tenant_id == current_user.tenant_id)\
-        .order_by(Assessment.created_at.desc())\
-        .all()
-    return assessments
+LIST_COLUMNS = (
+    Assessment.id, Assessment.assessment_name, Assessment.industry, Assessment.organization_size,
+    Assessment.cloud_usage, Assessment.coverage_percentage, Assessment.status, Assessment.created_at,
+)
+LIST_FIELDS = tuple(c.key for c in LIST_COLUMNS)
+# Below this planner estimate the total is counted exactly.
+EXACT_COUNT_THRESHOLD = 10000
+
+
+def _encode_cursor(created_at: datetime, assessment_id: int) -> str:
+    return base64.urlsafe_b64encode(orjson.dumps([created_at.isoformat(), assessment_id])).decode().rstrip("=")
+
+
+def _decode_cursor(cursor: str):
+    try:
+        created_at, assessment_id = orjson.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        return datetime.fromisoformat(created_at), int(assessment_id)
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def _total_count(db: Session, query) -> tuple:
+    """(count, approximate): the planner's row estimate, or an exact count when that is small."""
+    # Compiled with the default dialect, binds render as :name, which text() adapts to any driver's paramstyle.
+    statement = query.statement.compile()
+    plan = db.execute(text(f"EXPLAIN (FORMAT JSON) {statement}"), statement.params).scalar()
+    plan = orjson.loads(plan) if isinstance(plan, (str, bytes)) else plan
+    estimate = int(plan[0]["Plan"]["Plan Rows"])
+    if estimate <= EXACT_COUNT_THRESHOLD:
+        return query.count(), False
+    return estimate, True
+
+
+# No response_model: rows carry only the requested ``fields`` (id always), so they are
+# a sparse AssessmentResponse rather than a full one.
+@router.get("/")
+async def list_assessments(
+    request: Request,
+    limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = None,
+    status: Optional[str] = None,
+    name_prefix: Optional[str] = Query(None, min_length=1),
+    created_after: Optional[datetime] = None,
+    created_before: Optional[datetime] = None,
+    fields: Optional[str] = Query(None, description="Comma-separated columns to return; id is always included"),
+    include_total: bool = False,
+    current_user: User = Depends(get_current_user_read),
+    db: Session = Depends(get_read_db),
+    cache: CacheValidators = Depends(assessment_list_validators)
+):
+    # Newest first, paged by (created_at, id) so each page is an index range scan
+    # on ix_assessments_tenant_created no matter how deep the client pages.
+    selected = LIST_FIELDS
+    if fields:
+        requested = {f.strip() for f in fields.split(",") if f.strip()}
+        unknown = requested - set(LIST_FIELDS)
+        if unknown:
+            raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(sorted(unknown))}")
+        selected = tuple(f for f in LIST_FIELDS if f in requested or f == "id")
+    columns = [c for c in LIST_COLUMNS if c.key in selected or c.key == "created_at"]
+
+    query = db.query(*columns).filter(Assessment.tenant_id == current_user.tenant_id)
+    if status:
+        query = query.filter(Assessment.status == status)
+    if name_prefix:
+        escaped = name_prefix.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+        query = query.filter(Assessment.assessment_name.like(f"{escaped}%", escape="\\"))
+    if created_after:
+        query = query.filter(Assessment.created_at >= created_after)
+    if created_before:
+        query = query.filter(Assessment.created_at < created_before)
+    headers = dict(cache.headers)
+    if include_total:
+        total, approximate = _total_count(db, query)
+        headers["X-Total-Count"] = str(total)
+        headers["X-Total-Count-Approximate"] = "true" if approximate else "false"
+    if cursor:
+        query = query.filter(tuple_(Assessment.created_at, Assessment.id) < _decode_cursor(cursor))
+
+    # Hot path: serialize column tuples straight to JSON bytes instead of
+    # building ORM objects and validating each one through AssessmentResponse.
+    rows = query.order_by(Assessment.created_at.desc(), Assessment.id.desc()).limit(limit + 1).all()
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        next_cursor = _encode_cursor(last.created_at, last.id)
+        headers["X-Next-Cursor"] = next_cursor
+        headers["Link"] = f'<{request.url.include_query_params(cursor=next_cursor)}>; rel="next"'
+    keys = [c.key for c in columns]
+    return ORJSONResponse([{k: v for k, v in zip(keys, row) if k in selected} for row in rows], headers=headers)
 
 
 @router.get("/{assessment_id}", response_model=AssessmentResponse)
 async def get_assessment(
+    assessment_id: int,
+    current_user: User = Depends(get_current_user_read),
+    db: Session = Depends(get_read_db)
+):
+    assessment = db.query(Assessment).filter(
+        Assessment.id == assessment_id,
+        Assessment.tenant_id == current_user.tenant_id
+    ).first()
+    if not assessment:
+        raise HTTPException(status_code=404, detail="Assessment not found")
+    return assessment
+
+
+@router.post("/{assessment_id}/archive", response_model=AssessmentResponse)
+def archive_assessment(
     assessment_id: int,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
+    # Detail rows are kept until purge_archived.py runs past RETENTION_ARCHIVED_DAYS;
+    # the industry benchmark stops counting the assessment right away.
     assessment = db.query(Assessment).filter(
         Assessment.id == assessment_id,
         Assessment.tenant_id == current_user.tenant_id
     ).first()
     if not assessment:
         raise HTTPException(status_code=404, detail="Assessment not found")
+    if assessment.status != ARCHIVED_STATUS:
+        # Under the calculation lock, so a recalculation in flight cannot record it again afterwards.
+        try:
+            with advisory_lock(db, "calculate_coverage", assessment_id, get_settings().COVERAGE_LOCK_TIMEOUT_SECONDS):
+                db.refresh(assessment)
+                assessment.status = ARCHIVED_STATUS
+                assessment.archived_at = datetime.utcnow()
+                BenchmarkAggregator(db).withdraw(assessment)
+                db.commit()
+        except LockTimeout as e:
+            db.rollback()
+            raise HTTPException(status_code=409, detail=str(e), headers={"Retry-After": "5"})
+        db.refresh(assessment)
     return assessment
+
+
+def _owned_assessment(assessment_id: int, current_user: User, db: Session):
+    if not db.query(Assessment.id).filter(
+        Assessment.id == assessment_id,
+        Assessment.tenant_id == current_user.tenant_id
+    ).first():
+        raise HTTPException(status_code=404, detail="Assessment not found")
+
+
+@router.post("/{assessment_id}/detection-rules", dependencies=[Depends(admit("submit"))])
+def upload_detection_rules(
+    assessment_id: int,
+    file: UploadFile = File(...),
+    replace: bool = Query(True),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    # Sync handler: the upload is spooled to disk by the form parser and parsed here, in the threadpool.
+    _owned_assessment(assessment_id, current_user, db)
+    try:
+        result = ingest_rules(db, get_catalog(), assessment_id, file.file, file.filename, replace)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"assessment_id": assessment_id, **result}
+
+
+@router.get("/{assessment_id}/detection-rules")
+async def get_detection_rules(
+    assessment_id: int,
+    current_user: User = Depends(get_current_user_read),
+    db: Session = Depends(get_read_db)
+):
+    _owned_assessment(assessment_id, current_user, db)
+    levels = db.query(DetectionRule.level, func.count(DetectionRule.id))\
+        .filter(DetectionRule.assessment_id == assessment_id).group_by(DetectionRule.level).all()
+    tagged = db.query(func.unnest(DetectionRule.technique_ids).label("technique_id"))\
+        .filter(DetectionRule.assessment_id == assessment_id).subquery()
+    techniques = db.query(func.count(func.distinct(tagged.c.technique_id))).scalar()
+    return {
+        "assessment_id": assessment_id,
+        "rules": sum(count for _, count in levels),
+        "by_level": {level or "unknown": count for level, count in levels},
+        "techniques_covered": techniques or 0,
+    }
+
+
+@router.post("/{assessment_id}/telemetry", dependencies=[Depends(admit("submit"))])
+def upload_telemetry_sample(
+    assessment_id: int,
+    file: UploadFile = File(...),
+    replace: bool = Query(False),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    _owned_assessment(assessment_id, current_user, db)
+    try:
+        result = ingest_telemetry(db, assessment_id, file.file, file.filename, replace)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"assessment_id": assessment_id, **result}
+
+
+@router.get("/{assessment_id}/telemetry")
+async def get_telemetry_evidence(
+    assessment_id: int,
+    current_user: User = Depends(get_current_user_read),
+    db: Session = Depends(get_read_db)
+):
+    _owned_assessment(assessment_id, current_user, db)
+    rows = db.query(TelemetryEvidence.component_id, TelemetryEvidence.event_count,
+                    TelemetryEvidence.signatures, TelemetryEvidence.updated_at)\
+        .filter(TelemetryEvidence.assessment_id == assessment_id)\
+        .order_by(TelemetryEvidence.component_id).all()
+    return ORJSONResponse({
+        "assessment_id": assessment_id,
+        "components": [
+            {"component_id": c, "event_count": n, "signatures": signatures or [], "updated_at": updated_at}
+            for c, n, signatures, updated_at in rows
+        ]
+    })
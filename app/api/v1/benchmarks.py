@@ -0,0 +1,49 @@
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.orm import Session
+from typing import Optional
+from app.database import get_read_db
+from app.models.tenant import User
+from app.models.assessment import Assessment
+from app.models.benchmark import IndustryCoverageAggregate
+from app.services.benchmarking import BenchmarkAggregator, MIN_PEER_ASSESSMENTS, decode_contribution, percentile_rank
+from app.utils.security import get_current_user_read
+
+router = APIRouter()
+
+@router.get("/industry")
+async def get_industry_benchmark(
+    assessment_id: Optional[int] = None,
+    current_user: User = Depends(get_current_user_read),
+    db: Session = Depends(get_read_db)
+):
+    industry = current_user.tenant.industry
+    if not industry:
+        raise HTTPException(status_code=400, detail="Tenant has no industry set")
+    distributions = BenchmarkAggregator(db).distributions(industry)
+    result = {
+        "industry": industry,
+        "min_peer_assessments": MIN_PEER_ASSESSMENTS,
+        "peer_count": (distributions["overall"] or {}).get("sample_count", 0),
+        **distributions,
+    }
+    if assessment_id is not None:
+        assessment = db.query(Assessment).filter(
+            Assessment.id == assessment_id,
+            Assessment.tenant_id == current_user.tenant_id
+        ).first()
+        if not assessment:
+            raise HTTPException(status_code=404, detail="Assessment not found")
+        overall = db.query(IndustryCoverageAggregate).filter(
+            IndustryCoverageAggregate.industry == industry,
+            IndustryCoverageAggregate.scope == "overall"
+        ).first()
+        # Rank the same statistic the "overall" histogram counts: the mean per-technique confidence
+        # this assessment contributed, not its fully-covered percentage.
+        score = decode_contribution(assessment.benchmark_contribution).get(("overall", "all"))
+        result["assessment"] = {
+            "assessment_id": assessment.id,
+            "score": round(score, 4) if score is not None else None,
+            "percentile_rank": percentile_rank(overall.histogram, overall.sample_count, score)
+            if score is not None and overall is not None and overall.sample_count >= MIN_PEER_ASSESSMENTS else None,
+        }
+    return result
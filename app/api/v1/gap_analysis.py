@@ -1,63 +1,188 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Body, Depends, HTTPException, Query
+from fastapi.responses import ORJSONResponse
+from pydantic import BaseModel, Field
 from sqlalchemy.orm import Session
-from app.database import get_db
+from typing import Dict, List, Optional
+from app.api.v1.questionnaire import QuestionResponse
+from app.database import get_db, get_read_db
 from app.models.tenant import User
-from app.models.assessment import TechniqueCoverage, CoverageStatus
-from app.services.assessment_engine import AssessmentEngine
-from app.utils.security import get_current_user
+from app.models.assessment import Assessment, TechniqueCoverage, CoverageStatus
+from app.services.assessment_engine import AssessmentEngine, stored_rollup
+from app.services.catalog import get_catalog
+from app.services.planner import plan
+from app.services.progress import ProgressReporter
+from app.services.retention import ARCHIVED_STATUS
+from app.services.single_flight import LockTimeout, SingleFlight
+from app.services.threat_exposure import group_exposure, normalize_industry
+from app.services.what_if import what_if
+from app.utils.admission import admit
+from app.utils.http_cache import CacheValidators, assessment_catalog_validators, assessment_validators
+from app.utils.metrics import COVERAGE_SHARED
+from app.utils.security import get_current_user, get_current_user_read
 
 router = APIRouter()
+# Concurrent calculate requests for one assessment in this worker share a single run.
+coverage_flight = SingleFlight()
 
-@router.post("/{assessment_id}/calculate")
-async def calculate_gap_analysis(
+class SimulationRequest(BaseModel):
+    # Hypothetical answers; merged over the stored ones by question_id unless replace_answers is set.
+    answers: Optional[List[QuestionResponse]] = None
+    replace_answers: bool = False
+    cloud_usage: Optional[Dict] = None
+
+class WhatIfRequest(SimulationRequest):
+    limit: int = Field(20, ge=1, le=500)
+
+class PlanRequest(SimulationRequest):
+    max_components: int = Field(5, ge=1, le=100)
+    # Optional per-component onboarding cost (default 1.0) and total budget over those costs.
+    costs: Optional[Dict[str, float]] = None
+    max_cost: Optional[float] = Field(None, gt=0)
+
+def _simulation_inputs(assessment_id: int, request: SimulationRequest, current_user: User, db: Session):
+    assessment = db.query(Assessment.cloud_usage).filter(
+        Assessment.id == assessment_id,
+        Assessment.tenant_id == current_user.tenant_id
+    ).first()
+    if assessment is None:
+        raise HTTPException(status_code=404, detail="Assessment not found")
+    engine = AssessmentEngine(db)
+    answers = {} if request.replace_answers else {a[0]: a for a in engine.answers(assessment_id)}
+    for a in request.answers or []:
+        answers[a.question_id] = (a.question_id, a.has_capability, a.platforms_covered)
+    cloud_usage = request.cloud_usage if request.cloud_usage is not None else assessment.cloud_usage
+    return engine, list(answers.values()), cloud_usage, engine.evidence(assessment_id)
+
+@router.post("/{assessment_id}/calculate", dependencies=[Depends(admit("calculate"))])
+def calculate_gap_analysis(
     assessment_id: int,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
-    engine = AssessmentEngine(db)
-    result = engine.calculate_coverage(assessment_id)
+    # Sync handler: runs in the threadpool so progress streams keep being served meanwhile.
+    # Ownership is checked before joining a flight, so no caller can share another tenant's result.
+    status = db.query(Assessment.status).filter(
+        Assessment.id == assessment_id,
+        Assessment.tenant_id == current_user.tenant_id
+    ).scalar()
+    if status is None:
+        raise HTTPException(status_code=404, detail="Assessment not found")
+    if status == ARCHIVED_STATUS:
+        raise HTTPException(status_code=409, detail="Assessment is archived")
+
+    def run():
+        progress = ProgressReporter(f"assessment:{assessment_id}")
+        try:
+            return AssessmentEngine(db).calculate_coverage(assessment_id, progress)
+        except Exception as e:
+            progress.failed(str(e))
+            raise
+
+    try:
+        result, shared = coverage_flight.do(assessment_id, run)
+    except LockTimeout as e:
+        raise HTTPException(status_code=409, detail=str(e), headers={"Retry-After": "5"})
+    if shared:
+        COVERAGE_SHARED.inc(("flight",))
     return result
 
 @router.get("/{assessment_id}/coverage")
 async def get_coverage_matrix(
     assessment_id: int,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: User = Depends(get_current_user_read),
+    db: Session = Depends(get_read_db),
+    cache: CacheValidators = Depends(assessment_validators)
 ):
-    coverage = db.query(TechniqueCoverage).filter(
+    coverage = db.query(
+        TechniqueCoverage.technique_id, TechniqueCoverage.coverage_status,
+        TechniqueCoverage.confidence_score, TechniqueCoverage.risk_score
+    ).filter(
         TechniqueCoverage.assessment_id == assessment_id
     ).all()
-    return {
+    # Parents also report how their applicable sub-techniques are covered (max, mean, fraction covered).
+    rollup = stored_rollup(get_catalog(), coverage)
+    return ORJSONResponse({
         "assessment_id": assessment_id,
         "techniques": [
             {
-                "technique_id": c.technique_id,
-                "coverage_status": getattr(c.coverage_status, "value", str(c.coverage_status)),
-                "confidence_score": c.confidence_score,
-                "risk_score": c.risk_score
+                "technique_id": technique_id,
+                "coverage_status": getattr(status, "value", str(status)),
+                "confidence_score": confidence,
+                "risk_score": risk,
+                "sub_techniques": rollup.get(technique_id)
             }
-            for c in coverage
+            for technique_id, status, confidence, risk in coverage
         ]
-    }
+    }, headers=cache.headers)
 
 @router.get("/{assessment_id}/gaps")
 async def get_prioritized_gaps(
     assessment_id: int,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: User = Depends(get_current_user_read),
+    db: Session = Depends(get_read_db),
+    cache: CacheValidators = Depends(assessment_validators)
 ):
-    gaps = db.query(TechniqueCoverage).filter(
+    gaps = db.query(
+        TechniqueCoverage.technique_id, TechniqueCoverage.coverage_status,
+        TechniqueCoverage.risk_score, TechniqueCoverage.data_components_missing
+    ).filter(
         TechniqueCoverage.assessment_id == assessment_id,
         TechniqueCoverage.coverage_status.in_([CoverageStatus.NONE, CoverageStatus.PARTIAL])
     ).order_by(TechniqueCoverage.risk_score.desc()).limit(20).all()
-    return {
+    return ORJSONResponse({
         "top_gaps": [
             {
-                "technique_id": g.technique_id,
-                "coverage_status": getattr(g.coverage_status, "value", str(g.coverage_status)),
-                "risk_score": g.risk_score,
-                "missing_components": g.data_components_missing or []
+                "technique_id": technique_id,
+                "coverage_status": getattr(status, "value", str(status)),
+                "risk_score": risk,
+                "missing_components": missing or []
             }
-            for g in gaps
+            for technique_id, status, risk, missing in gaps
         ]
-    }
+    }, headers=cache.headers)
+
+@router.get("/{assessment_id}/threat-exposure")
+async def get_threat_exposure(
+    assessment_id: int,
+    limit: int = Query(50, ge=1, le=1000),
+    current_user: User = Depends(get_current_user_read),
+    db: Session = Depends(get_read_db),
+    cache: CacheValidators = Depends(assessment_catalog_validators)
+):
+    if db.query(TechniqueCoverage.id).filter(TechniqueCoverage.assessment_id == assessment_id).first() is None:
+        raise HTTPException(status_code=409, detail="Coverage has not been calculated for this assessment")
+    catalog = get_catalog()
+    industry = db.query(Assessment.industry).filter(Assessment.id == assessment_id).scalar() \
+        or current_user.tenant.industry
+    return ORJSONResponse({
+        "assessment_id": assessment_id,
+        "industry": normalize_industry(industry),
+        "groups": group_exposure(db, catalog, assessment_id, industry, limit)
+    }, headers=cache.headers)
+
+@router.post("/{assessment_id}/what-if")
+async def simulate_what_if(
+    assessment_id: int,
+    request: WhatIfRequest = Body(default_factory=WhatIfRequest),
+    current_user: User = Depends(get_current_user_read),
+    db: Session = Depends(get_read_db)
+):
+    engine, answers, cloud_usage, evidence = _simulation_inputs(assessment_id, request, current_user, db)
+    return ORJSONResponse({
+        "assessment_id": assessment_id,
+        **what_if(engine, get_catalog(), answers, cloud_usage, request.limit, evidence)
+    })
+
+@router.post("/{assessment_id}/plan")
+async def plan_onboarding(
+    assessment_id: int,
+    request: PlanRequest = Body(default_factory=PlanRequest),
+    current_user: User = Depends(get_current_user_read),
+    db: Session = Depends(get_read_db)
+):
+    engine, answers, cloud_usage, evidence = _simulation_inputs(assessment_id, request, current_user, db)
+    return ORJSONResponse({
+        "assessment_id": assessment_id,
+        **plan(engine, get_catalog(), answers, cloud_usage, request.max_components, request.costs, request.max_cost,
+               evidence)
+    })
@@ -0,0 +1,52 @@
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.responses import StreamingResponse
+import orjson
+from app.config import get_settings
+from app.database import ReadSessionLocal
+from app.models.tenant import User
+from app.models.assessment import Assessment
+from app.services.progress import TERMINAL_PHASES, progress_broker
+from app.utils.security import get_current_user_detached
+
+router = APIRouter()
+settings = get_settings()
+
+# identity: keeps the compression middleware from buffering the stream.
+STREAM_HEADERS = {"Cache-Control": "no-cache", "Content-Encoding": "identity", "X-Accel-Buffering": "no"}
+
+
+async def _event_stream(channel: str, request: Request):
+    async for event in progress_broker.events(channel, settings.PROGRESS_HEARTBEAT_SECONDS):
+        if await request.is_disconnected():
+            break
+        if event is None:
+            yield b": keep-alive\n\n"
+            continue
+        yield b"event: progress\ndata: " + orjson.dumps(event) + b"\n\n"
+        if event.get("phase") in TERMINAL_PHASES:
+            break
+
+
+def _stream(channel: str, request: Request) -> StreamingResponse:
+    return StreamingResponse(_event_stream(channel, request), media_type="text/event-stream", headers=STREAM_HEADERS)
+
+
+@router.get("/assessments/{assessment_id}")
+async def stream_assessment_progress(
+    assessment_id: int,
+    request: Request,
+    current_user: User = Depends(get_current_user_detached)
+):
+    with ReadSessionLocal() as db:
+        owned = db.query(Assessment.id).filter(
+            Assessment.id == assessment_id,
+            Assessment.tenant_id == current_user.tenant_id
+        ).first()
+    if not owned:
+        raise HTTPException(status_code=404, detail="Assessment not found")
+    return _stream(f"assessment:{assessment_id}", request)
+
+
+@router.get("/sync")
+async def stream_sync_progress(request: Request, current_user: User = Depends(get_current_user_detached)):
+    return _stream("sync", request)
@@ -1,13 +1,17 @@
 from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import ORJSONResponse
+from starlette.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
-from pydantic import BaseModel
-from typing import List
-import os
-import json
-from app.database import get_db
+from pydantic import BaseModel, Field
+from typing import List, Optional
+from app.database import get_db, get_read_db
 from app.models.tenant import User
-from app.models.assessment import QuestionnaireResponse
-from app.utils.security import get_current_user
+from app.models.assessment import Assessment, QuestionnaireResponse
+from app.services.autosave import autosave_buffer, upsert_answers
+from app.services.questionnaire_catalog import load_questionnaire, question_capability_types
+from app.utils.admission import admit
+from app.utils.http_cache import CacheValidators, questionnaire_validators
+from app.utils.security import get_current_user, get_current_user_read
 
 
 router = APIRouter()
@@ -24,28 +28,81 @@ class SubmitQuestionnaireRequest(BaseModel):
     assessment_id: int
     responses: List[QuestionResponse]
 
+class AnswerUpdate(BaseModel):
+    # capability_type defaults to the question's own from the questionnaire.
+    capability_type: Optional[str] = Field(None, max_length=100)
+    has_capability: bool
+    coverage_level: int = 0
+    platforms_covered: List[str] = []
+    notes: str = ""
+
+ANSWER_COLUMNS = (
+    QuestionnaireResponse.question_id, QuestionnaireResponse.capability_type, QuestionnaireResponse.has_capability,
+    QuestionnaireResponse.coverage_level, QuestionnaireResponse.platforms_covered, QuestionnaireResponse.notes,
+)
+ANSWER_KEYS = tuple(c.key for c in ANSWER_COLUMNS)
+
+def _check_owner(assessment_id: int, current_user: User, db: Session):
+    # A primary-key probe: cheap enough per request, and never stale after a delete.
+    if not db.query(Assessment.id).filter(
+        Assessment.id == assessment_id,
+        Assessment.tenant_id == current_user.tenant_id
+    ).first():
+        raise HTTPException(status_code=404, detail="Assessment not found")
+
 @router.get("/questions")
-async def get_questions():
-    # Load from fixed JSON file
-    json_path = os.path.join(os.path.dirname(__file__), "../../data/questionnaire_v18.json")
-    with open(os.path.abspath(json_path), "r", encoding="utf-8") as f:
-        data = json.load(f)
-    return data
+async def get_questions(cache: CacheValidators = Depends(questionnaire_validators)):
+    return ORJSONResponse(load_questionnaire(), headers=cache.headers)
 
 
-@router.post("/submit")
+@router.post("/submit", dependencies=[Depends(admit("submit"))])
 async def submit_questionnaire(request: SubmitQuestionnaireRequest, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
-    # Save all responses
-    for response in request.responses:
-        qr = QuestionnaireResponse(
-            assessment_id=request.assessment_id,
-            question_id=response.question_id,
-            capability_type=response.capability_type,
-            has_capability=response.has_capability,
-            coverage_level=response.coverage_level,
-            platforms_covered=response.platforms_covered,
-            notes=response.notes
-        )
-        db.add(qr)
+    _check_owner(request.assessment_id, current_user, db)
+    # Save all responses, one row per question; the last response for a question wins.
+    rows = {
+        response.question_id: {"assessment_id": request.assessment_id, **response.model_dump()}
+        for response in request.responses
+    }
+    # A submit is newer than any autosave still buffered for the same questions.
+    autosave_buffer.discard(request.assessment_id, rows)
+    upsert_answers(db, list(rows.values()))
     db.commit()
     return {"message": "Questionnaire submitted successfully", "responses_count": len(request.responses)}
+
+
+@router.patch("/{assessment_id}/answers/{question_id}", status_code=202)
+async def autosave_answer(
+    assessment_id: int,
+    question_id: str,
+    answer: AnswerUpdate,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    # Only questions of the questionnaire are buffered, so no row can fail the shared flush.
+    capability_type = question_capability_types().get(question_id)
+    if capability_type is None:
+        raise HTTPException(status_code=404, detail="Question not found")
+    _check_owner(assessment_id, current_user, db)
+    row = {"assessment_id": assessment_id, "question_id": question_id, **answer.model_dump()}
+    if row["capability_type"] is None:
+        row["capability_type"] = capability_type
+    if autosave_buffer.put(current_user.tenant_id, row):
+        await run_in_threadpool(autosave_buffer.flush)
+    return {"assessment_id": assessment_id, "question_id": question_id, "status": "accepted"}
+
+
+@router.get("/{assessment_id}/answers")
+async def get_answers(
+    assessment_id: int,
+    current_user: User = Depends(get_current_user_read),
+    db: Session = Depends(get_read_db)
+):
+    _check_owner(assessment_id, current_user, db)
+    answers = {
+        row[0]: dict(zip(ANSWER_KEYS, row))
+        for row in db.query(*ANSWER_COLUMNS).filter(QuestionnaireResponse.assessment_id == assessment_id)
+    }
+    # Read-your-writes: edits still waiting in this worker's autosave buffer win over stored rows.
+    for question_id, row in autosave_buffer.pending(assessment_id).items():
+        answers[question_id] = {key: row[key] for key in ANSWER_KEYS}
+    return ORJSONResponse({"assessment_id": assessment_id, "answers": list(answers.values())})
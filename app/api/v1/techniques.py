@@ -0,0 +1,56 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import ORJSONResponse, Response
+from pydantic import BaseModel, Field
+from sqlalchemy.orm import Session
+from typing import List
+import orjson
+from app.database import get_read_db
+from app.models.tenant import User
+from app.services.technique_documents import document_cache
+from app.services.technique_search import get_search_index
+from app.utils.http_cache import CacheValidators, NotModified
+from app.utils.security import get_current_user_read
+
+router = APIRouter()
+
+class BulkTechniqueRequest(BaseModel):
+    technique_ids: List[str] = Field(..., max_length=1000)
+
+@router.get("/search")
+async def search_techniques(
+    q: str = Query(..., min_length=1, max_length=200),
+    limit: int = Query(20, ge=1, le=100),
+    current_user: User = Depends(get_current_user_read)
+):
+    index = get_search_index()
+    return ORJSONResponse({"query": q, "catalog_version": index.version, "results": index.search(q, limit)})
+
+@router.post("/bulk")
+async def get_technique_documents(
+    request: BulkTechniqueRequest,
+    current_user: User = Depends(get_current_user_read),
+    db: Session = Depends(get_read_db)
+):
+    documents = document_cache.get_many(db, request.technique_ids)
+    ordered = [documents[t][1] for t in dict.fromkeys(request.technique_ids) if t in documents]
+    missing = [t for t in dict.fromkeys(request.technique_ids) if t not in documents]
+    # Splice the pre-encoded documents rather than decoding and re-encoding them.
+    body = b'{"documents":[' + b",".join(ordered) + b'],"missing":' + orjson.dumps(missing) + b"}"
+    return Response(content=body, media_type="application/json")
+
+@router.get("/{technique_id}")
+async def get_technique_document(
+    technique_id: str,
+    request: Request,
+    current_user: User = Depends(get_current_user_read),
+    db: Session = Depends(get_read_db)
+):
+    document = document_cache.get(db, technique_id)
+    if document is None:
+        raise HTTPException(status_code=404, detail="Technique not found")
+    etag, body = document
+    # The document's own content hash is the validator; a matching If-None-Match skips the body.
+    validators = CacheValidators(f'"{etag}"')
+    if validators.matches(request):
+        raise NotModified(validators.headers)
+    return Response(content=body, media_type="application/json", headers=validators.headers)
@@ -1,6 +1,6 @@
 from pydantic_settings import BaseSettings
 from functools import lru_cache
-from typing import List
+from typing import List, Optional
 
 class Settings(BaseSettings):
     APP_NAME: str = "ATT&CK Gap Analysis API"
@@ -8,12 +8,39 @@ class Settings(BaseSettings):
     API_V1_PREFIX: str = "/api/v1"
     DEBUG: bool = True
     DATABASE_URL: str
+    READ_DATABASE_URL: Optional[str] = None
+    READ_YOUR_WRITES_SECONDS: float = 5.0
     SECRET_KEY: str
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 10080
     ATTACK_TAXII_SERVER: str = "https://cti-taxii.mitre.org/taxii/"
     ATTACK_COLLECTION_ID: str = "95ecc380-afe9-11e4-9b6c-751b66dd541e"
     ALLOWED_ORIGINS: List[str] = ["http://localhost:3000"]
+    METRICS_ENABLED: bool = True
+    SCHEMA_CHECK: str = "warn"
+    AUTO_CREATE_SCHEMA: bool = False
+    COMPRESSION_MIN_SIZE: int = 1024
+    CATALOG_PATH: str = "var/attack_catalog.bin"
+    CATALOG_RELOAD_SECONDS: float = 5.0
+    TECHNIQUE_DOCUMENT_CACHE_SIZE: int = 2048
+    AUTOSAVE_FLUSH_SECONDS: float = 1.0
+    AUTOSAVE_MAX_PENDING: int = 500
+    PROGRESS_NOTIFY_ENABLED: bool = True
+    PROGRESS_HEARTBEAT_SECONDS: float = 15.0
+    COVERAGE_LOCK_TIMEOUT_SECONDS: float = 60.0
+    RETENTION_ARCHIVED_DAYS: float = 90.0
+    RETENTION_REWRITE_FRACTION: float = 0.9
+    ADMISSION_ENABLED: bool = True
+    ADMISSION_STORE_URL: Optional[str] = None
+    ADMISSION_GLOBAL_CONCURRENCY: int = 16
+    ADMISSION_MAX_WAIT_SECONDS: float = 0.25
+    ADMISSION_TENANT_CONCURRENCY: int = 2
+    ADMISSION_TENANT_RATE: float = 1.0
+    ADMISSION_TENANT_BURST: int = 5
+    SQL_PROFILER_ENABLED: bool = False
+    SQL_PROFILER_STRICT: bool = False
+    SQL_QUERY_BUDGET: Optional[int] = None
+    SQL_N_PLUS_ONE_THRESHOLD: int = 3
     class Config:
         env_file = ".env"
 @lru_cache()
@@ -1,17 +1,88 @@
-from sqlalchemy import create_engine
+import threading
+from time import monotonic
+from typing import Dict, Optional
+from fastapi import Request
+from jose import JWTError, jwt
+from sqlalchemy import create_engine, event
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from app.config import get_settings
+from app.utils.metrics import InstrumentedQueuePool, instrument_engine
 
 settings = get_settings()
-engine = create_engine(settings.DATABASE_URL, pool_pre_ping=True, pool_size=10, max_overflow=20)
+engine = create_engine(settings.DATABASE_URL, poolclass=InstrumentedQueuePool, pool_pre_ping=True, pool_size=10, max_overflow=20)
+instrument_engine(engine)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
+# Optional read replica. Without READ_DATABASE_URL reads share the primary engine.
+if settings.READ_DATABASE_URL:
+    read_engine = create_engine(settings.READ_DATABASE_URL, poolclass=InstrumentedQueuePool, pool_pre_ping=True,
+                                pool_size=10, max_overflow=20)
+    instrument_engine(read_engine, "replica")
+else:
+    read_engine = engine
+ReadSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=read_engine)
+
+# tenant_id -> monotonic time until which that tenant's reads stay on the primary.
+# Per worker: a tenant that writes through one worker and reads through another
+# may see up to the replica's lag.
+_primary_pins: Dict[int, float] = {}
+_pins_lock = threading.Lock()
+
+
+def pin_tenant_to_primary(tenant_id: int):
+    with _pins_lock:
+        _primary_pins[tenant_id] = monotonic() + settings.READ_YOUR_WRITES_SECONDS
+
+
+def tenant_pinned(tenant_id: Optional[int]) -> bool:
+    if tenant_id is None:
+        return False
+    until = _primary_pins.get(tenant_id)
+    if until is None:
+        return False
+    if until < monotonic():
+        with _pins_lock:
+            _primary_pins.pop(tenant_id, None)
+        return False
+    return True
+
+
+@event.listens_for(SessionLocal, "after_commit")
+def _pin_after_commit(session):
+    tenant_id = session.info.get("tenant_id")
+    if tenant_id is not None and read_engine is not engine:
+        pin_tenant_to_primary(tenant_id)
+
+
+def tenant_hint(request: Request) -> Optional[int]:
+    """tenant_id claim from the bearer token, unverified: only for routing and admission decisions
+    taken before authentication. The token is still verified by the auth dependency."""
+    auth = request.headers.get("authorization", "")
+    if not auth.lower().startswith("bearer "):
+        return None
+    try:
+        return jwt.get_unverified_claims(auth[7:]).get("tenant_id")
+    except JWTError:
+        return None
+
+
 def get_db():
     db = SessionLocal()
     try:
         yield db
     finally:
         db.close()
-    
\ No newline at end of file
+
+
+def get_read_db(request: Request):
+    """Session for read-only routes: the replica, unless the caller's tenant wrote very recently."""
+    if read_engine is engine or tenant_pinned(tenant_hint(request)):
+        db = SessionLocal()
+    else:
+        db = ReadSessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
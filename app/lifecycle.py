@@ -0,0 +1,108 @@
+"""Application startup and shutdown.
+
+Nothing here runs at import time: uvicorn workers and test processes import
+app.main freely, and the lifespan handler does the one-off work (schema check,
+cache warm-up) once the server is actually starting.
+"""
+import asyncio
+import os
+from contextlib import asynccontextmanager
+from time import perf_counter
+from sqlalchemy import text
+from app.config import get_settings
+from app.database import engine, Base
+from app.services.autosave import autosave_buffer
+from app.services.catalog import get_catalog
+from app.services.progress import progress_broker
+from app.services.questionnaire_catalog import load_questionnaire
+from app.services.technique_search import get_search_index
+from app.utils.logger import get_logger
+from app.utils.metrics import REGISTRY, Gauge
+
+logger = get_logger("lifecycle")
+ALEMBIC_INI = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "alembic.ini"))
+
+STARTUP_SECONDS = REGISTRY.register(Gauge("app_startup_seconds", "Time spent in the lifespan startup phase"))
+FIRST_REQUEST_SECONDS = REGISTRY.register(Gauge(
+    "app_time_to_first_request_seconds", "Time from process import of app.main to the first response"))
+
+_boot_started = perf_counter()
+
+
+class SchemaOutOfDate(RuntimeError):
+    pass
+
+
+def check_schema_revision(mode: str):
+    """Compare the database's Alembic revision with the migration head.
+
+    mode is "strict" (refuse to start), "warn" (log) or "off".
+    """
+    if mode == "off":
+        return
+    from alembic.config import Config
+    from alembic.runtime.migration import MigrationContext
+    from alembic.script import ScriptDirectory
+
+    config = Config(ALEMBIC_INI)
+    config.set_main_option("script_location", os.path.join(os.path.dirname(ALEMBIC_INI), "alembic"))
+    heads = set(ScriptDirectory.from_config(config).get_heads())
+    with engine.connect() as conn:
+        current = set(MigrationContext.configure(conn).get_current_heads())
+    if current != heads:
+        message = f"Database schema at revision {sorted(current) or 'none'}, code expects {sorted(heads)}; run `alembic upgrade head`"
+        if mode == "strict":
+            raise SchemaOutOfDate(message)
+        logger.warning(message)
+
+
+def warm_caches():
+    load_questionnaire()
+    get_catalog()
+    get_search_index()
+    # Open the first pooled connection now rather than on the first request.
+    with engine.connect() as conn:
+        conn.execute(text("SELECT 1"))
+
+
+@asynccontextmanager
+async def lifespan(app):
+    settings = get_settings()
+    start = perf_counter()
+    if settings.AUTO_CREATE_SCHEMA:
+        # Local development only; deployments migrate with Alembic.
+        Base.metadata.create_all(bind=engine)
+    else:
+        check_schema_revision(settings.SCHEMA_CHECK)
+    warm_caches()
+    STARTUP_SECONDS.set(perf_counter() - start)
+    logger.info("Worker %s ready: startup %.1f ms, %.1f ms since import",
+                os.getpid(), (perf_counter() - start) * 1000, (perf_counter() - _boot_started) * 1000)
+    flusher = asyncio.create_task(autosave_buffer.run(settings.AUTOSAVE_FLUSH_SECONDS))
+    yield
+    flusher.cancel()
+    # Answers still buffered must reach the database before the worker exits.
+    autosave_buffer.drain()
+    progress_broker.close()
+    engine.dispose()
+
+
+class FirstRequestTimer:
+    """Logs and exports time-to-first-request once per worker, then stays out of the way."""
+
+    def __init__(self, app):
+        self.app = app
+        self.done = False
+
+    async def __call__(self, scope, receive, send):
+        if self.done or scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            if not self.done:
+                self.done = True
+                elapsed = perf_counter() - _boot_started
+                FIRST_REQUEST_SECONDS.set(elapsed)
+                logger.info("Worker %s served first request %.1f ms after import", os.getpid(), elapsed * 1000)
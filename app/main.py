@@ -1,16 +1,23 @@
 from fastapi import FastAPI
+from fastapi.responses import ORJSONResponse, PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
 from app.config import get_settings
-from app.database import engine, Base
-from app.api.v1 import auth, assessments, questionnaire, gap_analysis, reports
+from app.database import engine, read_engine
+from app.lifecycle import FirstRequestTimer, lifespan
+from app.utils.http_cache import NotModified, not_modified_handler
+from app.utils.metrics import REGISTRY, MetricsMiddleware
+from app.utils.query_profiler import QueryProfilerMiddleware, install_query_profiler
+from app.api.v1 import auth, assessments, questionnaire, gap_analysis, reports, benchmarks, techniques, progress
 
 settings = get_settings()
-Base.metadata.create_all(bind=engine)
 
 app = FastAPI(
     title=settings.APP_NAME,
     version=settings.VERSION,
-    description="MITRE ATT&CK v18 SaaS Gap Analysis"
+    description="MITRE ATT&CK v18 SaaS Gap Analysis",
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse
 )
 
 app.add_middleware(
@@ -19,13 +26,37 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag", "Link", "X-Next-Cursor", "X-Total-Count", "X-Total-Count-Approximate"],
 )
+try:
+    # Optional: serves br to clients that accept it and falls back to gzip.
+    from brotli_asgi import BrotliMiddleware
+    app.add_middleware(BrotliMiddleware, minimum_size=settings.COMPRESSION_MIN_SIZE, gzip_fallback=True)
+except ImportError:
+    app.add_middleware(GZipMiddleware, minimum_size=settings.COMPRESSION_MIN_SIZE)
+if settings.METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware)
+if settings.SQL_PROFILER_ENABLED:
+    install_query_profiler(engine)
+    if read_engine is not engine:
+        install_query_profiler(read_engine)
+    app.add_middleware(
+        QueryProfilerMiddleware,
+        n_plus_one_threshold=settings.SQL_N_PLUS_ONE_THRESHOLD,
+        default_budget=settings.SQL_QUERY_BUDGET,
+        strict=settings.SQL_PROFILER_STRICT,
+    )
+app.add_middleware(FirstRequestTimer)
+app.add_exception_handler(NotModified, not_modified_handler)
 
 app.include_router(auth.router, prefix=f"{settings.API_V1_PREFIX}/auth", tags=["Auth"])
 app.include_router(assessments.router, prefix=f"{settings.API_V1_PREFIX}/assessments", tags=["Assessments"])
 app.include_router(questionnaire.router, prefix=f"{settings.API_V1_PREFIX}/questionnaire", tags=["Questionnaire"])
 app.include_router(gap_analysis.router, prefix=f"{settings.API_V1_PREFIX}/gap-analysis", tags=["Gap Analysis"])
 app.include_router(reports.router, prefix=f"{settings.API_V1_PREFIX}/reports", tags=["Reports"])
+app.include_router(benchmarks.router, prefix=f"{settings.API_V1_PREFIX}/benchmarks", tags=["Benchmarks"])
+app.include_router(techniques.router, prefix=f"{settings.API_V1_PREFIX}/techniques", tags=["Techniques"])
+app.include_router(progress.router, prefix=f"{settings.API_V1_PREFIX}/progress", tags=["Progress"])
 
 @app.get("/")
 async def root():
@@ -34,4 +65,8 @@ async def root():
 @app.get("/health")
 async def health():
     return {"status": "healthy"}
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    return PlainTextResponse(REGISTRY.render(), media_type="text/plain; version=0.0.4")
     
\ No newline at end of file
@@ -1,4 +1,4 @@
 from app.models.tenant import Tenant, User
-from app.models.attack_data import Technique, SubTechnique, DetectionStrategy, Analytic, DataComponent, ThreatGroup
-from app.models.assessment import Assessment, QuestionnaireResponse, TechniqueCoverage, CoverageStatus
-    
\ No newline at end of file
+from app.models.attack_data import Technique, SubTechnique, DetectionStrategy, Analytic, DataComponent, ThreatGroup, TechniqueDocument
+from app.models.assessment import Assessment, QuestionnaireResponse, TechniqueCoverage, CoverageStatus, DetectionRule, TelemetryEvidence
+from app.models.benchmark import IndustryCoverageAggregate
@@ -1,10 +1,15 @@
-from sqlalchemy import Column, Integer, String, Text, JSON, DateTime, Float, ForeignKey, Boolean, Enum
+from sqlalchemy import Column, Integer, BigInteger, String, Text, JSON, DateTime, Float, ForeignKey, Boolean, Enum, Index, \
+    UniqueConstraint, DDL, event
 from sqlalchemy.orm import relationship
 from sqlalchemy.dialects.postgresql import ARRAY   # <-- ADD THIS LINE!
 from datetime import datetime
 from app.database import Base
 import enum
 
+# Per-assessment detail tables are hash-partitioned on assessment_id (migration 008), so an
+# assessment's rows, their indexes and their vacuum work stay within one partition.
+ASSESSMENT_PARTITIONS = 16
+
 class CoverageStatus(str, enum.Enum):
     COVERED = "covered"
     PARTIAL = "partial"
@@ -22,16 +27,25 @@ class Assessment(Base):
     completion_date = Column(DateTime, nullable=True)
     coverage_percentage = Column(Float, default=0.0)
     status = Column(String(50), default="in_progress")
+    # Set when archived; retention counts RETENTION_ARCHIVED_DAYS from here.
+    archived_at = Column(DateTime, nullable=True)
+    # What the last calculation added to the industry benchmark, so exactly that is subtracted next time.
+    benchmark_industry = Column(String(100), nullable=True)
+    benchmark_contribution = Column(JSON, nullable=True)
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     tenant = relationship("Tenant", back_populates="assessments")
     responses = relationship("QuestionnaireResponse", back_populates="assessment")
     technique_coverage = relationship("TechniqueCoverage", back_populates="assessment")
+    # Keyset pagination of a tenant's assessments, newest first.
+    __table_args__ = (Index("ix_assessments_tenant_created", tenant_id, created_at.desc(), id.desc()),)
 
 class QuestionnaireResponse(Base):
     __tablename__ = "questionnaire_responses"
-    id = Column(Integer, primary_key=True, index=True)
-    assessment_id = Column(Integer, ForeignKey("assessments.id"))
+    __table_args__ = (UniqueConstraint("assessment_id", "question_id", name="uq_questionnaire_response_question"),
+                      {"postgresql_partition_by": "HASH (assessment_id)"})
+    id = Column(Integer, primary_key=True, index=True, autoincrement=True)
+    assessment_id = Column(Integer, ForeignKey("assessments.id"), primary_key=True)
     question_id = Column(String(50))
     capability_type = Column(String(100))
     has_capability = Column(Boolean)
@@ -42,8 +56,9 @@ class QuestionnaireResponse(Base):
 
 class TechniqueCoverage(Base):
     __tablename__ = "technique_coverage"
-    id = Column(Integer, primary_key=True, index=True)
-    assessment_id = Column(Integer, ForeignKey("assessments.id"))
+    __table_args__ = {"postgresql_partition_by": "HASH (assessment_id)"}
+    id = Column(Integer, primary_key=True, index=True, autoincrement=True)
+    assessment_id = Column(Integer, ForeignKey("assessments.id"), primary_key=True, index=True)
     technique_id = Column(String(20))
     coverage_status = Column(Enum(CoverageStatus))
     confidence_score = Column(Float, default=0.0)
@@ -54,3 +69,35 @@ class TechniqueCoverage(Base):
     risk_score = Column(Float, default=0.0)
     priority_rank = Column(Integer, nullable=True)
     assessment = relationship("Assessment", back_populates="technique_coverage")
+
+for _table in (QuestionnaireResponse.__table__, TechniqueCoverage.__table__):
+    for _remainder in range(ASSESSMENT_PARTITIONS):
+        event.listen(_table, "after_create", DDL(
+            f"CREATE TABLE %(table)s_p{_remainder:02d} PARTITION OF %(table)s "
+            f"FOR VALUES WITH (MODULUS {ASSESSMENT_PARTITIONS}, REMAINDER {_remainder})").execute_if(dialect="postgresql"))
+
+class DetectionRule(Base):
+    """A tenant detection rule (e.g. Sigma) mapped to the techniques it detects and the components it reads."""
+    __tablename__ = "detection_rules"
+    __table_args__ = (UniqueConstraint("assessment_id", "rule_id", name="uq_detection_rule_assessment_rule"),)
+    id = Column(Integer, primary_key=True, index=True)
+    assessment_id = Column(Integer, ForeignKey("assessments.id"), index=True)
+    rule_id = Column(String(100))
+    title = Column(String(500))
+    level = Column(String(20), nullable=True)
+    status = Column(String(20), nullable=True)
+    technique_ids = Column(ARRAY(String))
+    component_ids = Column(ARRAY(String))
+    platforms = Column(ARRAY(String))
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+class TelemetryEvidence(Base):
+    """Events seen per data component in the telemetry samples uploaded for an assessment."""
+    __tablename__ = "telemetry_evidence"
+    __table_args__ = (UniqueConstraint("assessment_id", "component_id", name="uq_telemetry_assessment_component"),)
+    id = Column(Integer, primary_key=True, index=True)
+    assessment_id = Column(Integer, ForeignKey("assessments.id"), index=True)
+    component_id = Column(String(20))
+    event_count = Column(BigInteger, default=0)
+    signatures = Column(ARRAY(String))
+    updated_at = Column(DateTime, default=datetime.utcnow)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Text, JSON, DateTime, Float, ForeignKey, ARRAY
+from sqlalchemy import Column, Integer, String, Text, JSON, DateTime, Float, ForeignKey, ARRAY, LargeBinary
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from app.database import Base
@@ -67,4 +67,11 @@ class ThreatGroup(Base):
     description = Column(Text)
     target_industries = Column(ARRAY(String))
     techniques_used = Column(ARRAY(String))
-    
\ No newline at end of file
+class TechniqueDocument(Base):
+    """Denormalized detail for one technique or sub-technique, pre-encoded as JSON at sync time."""
+    __tablename__ = "technique_documents"
+    id = Column(Integer, primary_key=True, index=True)
+    technique_id = Column(String(20), unique=True, index=True)
+    body = Column(LargeBinary)
+    etag = Column(String(32))
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
@@ -0,0 +1,21 @@
+from sqlalchemy import Column, Integer, String, Float, DateTime, UniqueConstraint
+from sqlalchemy.dialects.postgresql import ARRAY
+from datetime import datetime
+from app.database import Base
+
+class IndustryCoverageAggregate(Base):
+    """Running histogram of coverage scores for one (industry, scope, key).
+
+    scope is "technique", "tactic" or "overall"; histogram holds one counter per
+    score bucket so percentiles can be answered without touching technique_coverage.
+    """
+    __tablename__ = "industry_coverage_aggregates"
+    __table_args__ = (UniqueConstraint("industry", "scope", "key", name="uq_industry_scope_key"),)
+    id = Column(Integer, primary_key=True, index=True)
+    industry = Column(String(100), index=True)
+    scope = Column(String(20))
+    key = Column(String(100))
+    histogram = Column(ARRAY(Integer))
+    sample_count = Column(Integer, default=0)
+    score_sum = Column(Float, default=0.0)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
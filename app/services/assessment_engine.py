@@ -1,52 +1,375 @@
+from sqlalchemy import insert
 from sqlalchemy.orm import Session
-from app.models.assessment import TechniqueCoverage, Assessment, QuestionnaireResponse, CoverageStatus
-from app.models.attack_data import Technique  # adjust as needed
+import numpy as np
+from app.models.assessment import TechniqueCoverage, Assessment, QuestionnaireResponse, CoverageStatus, DetectionRule, \
+    TelemetryEvidence
+from app.services.autosave import merged_answers
+from app.services.benchmarking import BenchmarkAggregator, contribution
+from app.services.catalog import Catalog, get_catalog, popcount
+from app.services.progress import ProgressReporter
+from app.services.single_flight import advisory_lock
+from app.config import get_settings
+from app.services.questionnaire_catalog import load_questionnaire
+from app.utils.metrics import COVERAGE_DURATION, COVERAGE_ROWS, COVERAGE_SHARED
 from datetime import datetime
+from functools import lru_cache
+from time import perf_counter
+from typing import Dict, List, NamedTuple
+
+RISK_BY_STATUS = {CoverageStatus.COVERED: 1.0, CoverageStatus.PARTIAL: 3.0, CoverageStatus.NONE: 5.0,
+                  CoverageStatus.NOT_APPLICABLE: 0.0}
+STATUS_CODES = (CoverageStatus.NONE, CoverageStatus.PARTIAL, CoverageStatus.COVERED, CoverageStatus.NOT_APPLICABLE)
+# assessment.cloud_usage keys -> ATT&CK platforms (names across v12..v18)
+CLOUD_PLATFORMS = {
+    "aws": ("IaaS",), "azure": ("IaaS", "Azure AD", "Identity Provider"), "gcp": ("IaaS",), "iaas": ("IaaS",),
+    "office365": ("Office 365", "Office Suite"), "m365": ("Office 365", "Office Suite"),
+    "google_workspace": ("Google Workspace", "Office Suite"), "saas": ("SaaS",),
+    "entra_id": ("Azure AD", "Identity Provider"), "okta": ("Identity Provider",),
+    "kubernetes": ("Containers",), "containers": ("Containers",), "esxi": ("ESXi",),
+}
+# Confidence a deployed detection rule lends the techniques it is tagged with.
+RULE_LEVEL_WEIGHTS = {"critical": 1.0, "high": 1.0, "medium": 0.85, "low": 0.7, "informational": 0.5}
+RULE_STATUS_WEIGHTS = {"stable": 1.0, "test": 1.0, "experimental": 0.8, "deprecated": 0.0, "unsupported": 0.0}
+
+
+def rollup_parents(parent: np.ndarray, n_top_level: int, confidence: np.ndarray, include: np.ndarray = None):
+    """Sub-technique max, mean and fraction covered per top-level technique.
+
+    One grouped reduction over the parent-index array (-1 for techniques and
+    orphaned sub-techniques); techniques without sub-techniques get zeros and count 0.
+    ``include`` optionally masks out sub-techniques (e.g. not applicable ones).
+    """
+    is_sub = parent >= 0 if include is None else (parent >= 0) & include
+    group = parent[is_sub]
+    values = confidence[is_sub]
+    count = np.bincount(group, minlength=n_top_level)[:n_top_level]
+    total = np.bincount(group, weights=values, minlength=n_top_level)[:n_top_level]
+    covered = np.bincount(group, weights=values >= 1.0, minlength=n_top_level)[:n_top_level]
+    sub_max = np.zeros(n_top_level)
+    np.maximum.at(sub_max, group, values)
+    has_subs = count > 0
+    sub_mean = np.divide(total, count, out=np.zeros(n_top_level), where=has_subs)
+    fraction_covered = np.divide(covered, count, out=np.zeros(n_top_level), where=has_subs)
+    return sub_max, sub_mean, fraction_covered, count
+
+
+def stored_rollup(catalog: Catalog, coverage) -> Dict[str, dict]:
+    """The sub-technique roll-up of each parent, from stored (technique_id, coverage_status, confidence_score, ...)
+    rows; sub-techniques have nothing below them, so their stored confidence is what score() rolled up."""
+    n = catalog.n_techniques
+    position = catalog.index("technique_ids")
+    confidence = np.zeros(n)
+    include = np.zeros(n, dtype=bool)
+    for technique_id, status, score, *_ in coverage:
+        i = position.get(technique_id)
+        if i is not None:
+            confidence[i] = score or 0.0
+            include[i] = status != CoverageStatus.NOT_APPLICABLE
+    sub_max, sub_mean, fraction_covered, count = rollup_parents(catalog.parent, catalog.n_top_level, confidence, include)
+    technique_ids = catalog.technique_ids
+    return {
+        technique_ids[i]: {"max": float(sub_max[i]), "mean": float(sub_mean[i]),
+                           "fraction_covered": float(fraction_covered[i]), "count": int(count[i])}
+        for i in np.flatnonzero(count)
+    }
+
+
+class CoverageState(NamedTuple):
+    """Arrays over catalog techniques (techniques first, then sub-techniques)."""
+    confidence: np.ndarray          # final, parents rolled up
+    own: np.ndarray                 # before the roll-up
+    direct: np.ndarray              # from technique-level answers alone
+    components_collected: np.ndarray
+    components_required: np.ndarray
+    sub_max: np.ndarray             # per top-level technique, over applicable sub-techniques
+    sub_mean: np.ndarray
+    sub_fraction_covered: np.ndarray
+    sub_count: np.ndarray           # applicable sub-techniques per top-level technique
+    covered_mask: np.ndarray        # platforms covered
+    from_rules: np.ndarray          # from the tenant's detection rules
+    relevant: np.ndarray            # platforms in scope
+    in_scope: np.ndarray            # applicable on its own platforms
+    applicable: np.ndarray          # in scope, or a parent of an in-scope sub-technique
+
+
+class Evidence(NamedTuple):
+    """Observed evidence stored for an assessment, next to its questionnaire answers."""
+    rules: list = []                # (rule_id, technique_ids, component_ids, platforms, level, status)
+    components: list = []           # data component ids seen in telemetry samples
+
+
+def status_codes(confidence: np.ndarray, applicable: np.ndarray) -> np.ndarray:
+    """Index into STATUS_CODES per technique."""
+    return np.where(~applicable, 3, np.where(confidence >= 1.0, 2, np.where(confidence > 0.0, 1, 0)))
+
+
+WRITE_BATCH_SIZE = 1000
+_RISK = np.array([RISK_BY_STATUS[s] for s in STATUS_CODES])
+
+
+def risk_scores(confidence: np.ndarray, applicable: np.ndarray) -> np.ndarray:
+    return _RISK[status_codes(confidence, applicable)]
+
+
+@lru_cache()
+def questionnaire_components() -> Dict[str, tuple]:
+    return {q["question_id"]: tuple(q.get("data_components_mapped", []))
+            for s in load_questionnaire()["sections"] for q in s["questions"]}
+
+
+def rule_weight(level, status) -> float:
+    return RULE_LEVEL_WEIGHTS.get(level or "", 0.85) * RULE_STATUS_WEIGHTS.get(status or "", 1.0)
+
+
+def rule_evidence(catalog: Catalog, rules):
+    """Per technique: best rule confidence, platforms the rules run on, and matching rule ids."""
+    n = catalog.n_techniques
+    confidence = np.zeros(n)
+    mask = np.zeros(n, dtype=np.uint64)
+    rule_ids: Dict[int, List[str]] = {}
+    position = catalog.index("technique_ids")
+    all_platforms = catalog.all_platforms
+    for rule_id, technique_ids, _, platforms, level, status in rules or ():
+        weight = rule_weight(level, status)
+        if weight <= 0:
+            continue
+        platform_mask = np.uint64(catalog.platform_mask(platforms or ()) or all_platforms)
+        for technique_id in technique_ids or ():
+            i = position.get(technique_id)
+            if i is not None:
+                confidence[i] = max(confidence[i], weight)
+                mask[i] |= platform_mask
+                rule_ids.setdefault(i, []).append(rule_id)
+    return confidence, mask, rule_ids
+
+
+def technique_tactics(catalog: Catalog):
+    indptr, indices = catalog.csr("technique_tactics")
+    names = list(catalog.strings("tactics"))
+    ids = catalog.technique_ids
+    return {ids[i]: [names[j] for j in indices[indptr[i]:indptr[i + 1]]] for i in range(catalog.n_top_level)}
+
 
 class AssessmentEngine:
     def __init__(self, db: Session):
         self.db = db
 
-    def calculate_coverage(self, assessment_id: int):
-        # 1. Clear previous coverage
+    def environment_mask(self, catalog: Catalog, answers, cloud_usage) -> int:
+        """Platforms the tenant monitors or runs on; everything when the assessment says nothing."""
+        mask = 0
+        for _, has_capability, platforms_covered, *_ in answers:
+            if has_capability:
+                mask |= catalog.platform_mask(platforms_covered)
+        for key, enabled in (cloud_usage or {}).items():
+            if enabled:
+                mask |= catalog.platform_mask(CLOUD_PLATFORMS.get(str(key).lower(), (key,)))
+        return mask or catalog.all_platforms
+
+    def available_components(self, catalog: Catalog, answers, evidence: Evidence = None) -> np.ndarray:
+        """Catalog data components the tenant collects: those mapped from positively answered
+        questionnaire questions, answers given directly against a component id, the log
+        sources its detection rules read and the components seen in its telemetry."""
+        available = np.zeros(catalog.n_components, dtype=bool)
+        position = catalog.index("component_ids")
+        mapped = questionnaire_components()
+        for question_id, has_capability, *_ in answers:
+            if not has_capability:
+                continue
+            for component_id in mapped.get(question_id, (question_id,)):
+                j = position.get(component_id)
+                if j is not None:
+                    available[j] = True
+        if evidence is not None:
+            observed = [c for rule in evidence.rules for c in rule[2] or ()] + list(evidence.components)
+            for component_id in observed:
+                j = position.get(component_id)
+                if j is not None:
+                    available[j] = True
+        return available
+
+    def score(self, catalog: Catalog, answers, env_mask: int, available: np.ndarray, rules=None) -> CoverageState:
+        """Per catalog technique (techniques, then sub-techniques): confidence, covered platform
+        mask and applicability, with parents rolled up from their sub-techniques."""
+        n = catalog.n_techniques
+        technique_mask = catalog.technique_platforms
+        # Techniques without platform data apply everywhere.
+        relevant = np.where(technique_mask == 0, np.uint64(env_mask), technique_mask & np.uint64(env_mask))
+        applicable = (technique_mask == 0) | (relevant != 0)
+
+        answered = np.zeros(n, dtype=bool)
+        answer_mask = np.zeros(n, dtype=np.uint64)
+        position = catalog.index("technique_ids")
+        all_platforms = catalog.all_platforms
+        # Sample logic: a technique (or sub-technique) is covered if its question was answered
+        # has_capability, on the platforms it was answered for (all of them if none were given).
+        for question_id, has_capability, platforms_covered, *_ in answers:
+            i = position.get(question_id)
+            if i is not None and has_capability:
+                answered[i] = True
+                answer_mask[i] |= np.uint64(catalog.platform_mask(platforms_covered) or all_platforms)
+
+        covered_mask = np.where(answered, answer_mask & relevant, np.uint64(0))
+        relevant_bits = popcount(relevant)
+        direct = np.where(relevant_bits > 0,
+                          popcount(covered_mask) / np.maximum(relevant_bits, 1), answered.astype(float))
+
+        # Data-component evidence: share of the components a technique's analytics need that are collected.
+        indptr, indices = catalog.csr("technique_components")
+        required = np.diff(indptr)
+        rows = np.repeat(np.arange(n), required)
+        collected = np.bincount(rows, weights=available[indices], minlength=n)
+        from_components = np.divide(collected, required, out=np.zeros(n), where=required > 0)
+        covered_mask[from_components >= 1.0] |= relevant[from_components >= 1.0]
+
+        # Rule evidence: deployed detections tagged with the technique, on the platforms they run on.
+        from_rules, rule_mask, _ = rule_evidence(catalog, rules)
+        covered_mask |= np.where(from_rules > 0, rule_mask & relevant, np.uint64(0))
+
+        own = np.maximum(np.maximum(direct, from_components), from_rules)
+        own[~applicable] = 0.0
+        direct[~applicable] = 0.0
+
+        n_top = catalog.n_top_level
+        parent = catalog.parent
+        confidence = own.copy()
+        sub_max, sub_mean, sub_fraction_covered, sub_count = rollup_parents(parent, n_top, own, include=applicable)
+        # A parent is as covered as the average of its applicable sub-techniques unless covered outright.
+        confidence[:n_top] = np.where(sub_count > 0, np.maximum(own[:n_top], sub_mean), own[:n_top])
+        is_sub = (parent >= 0) & applicable
+        np.bitwise_or.at(covered_mask, parent[is_sub], covered_mask[is_sub])
+        in_scope = applicable.copy()
+        applicable[:n_top] |= sub_count > 0
+        return CoverageState(confidence, own, direct, collected, required, sub_max, sub_mean, sub_fraction_covered,
+                             sub_count, covered_mask, from_rules, relevant, in_scope, applicable)
+
+    def platform_breakdown(self, catalog: Catalog, covered_mask, relevant, applicable, env_mask: int):
+        """Per-platform share of applicable top-level techniques covered on that platform."""
+        n_top = catalog.n_top_level
+        covered_mask, relevant = covered_mask[:n_top], relevant[:n_top]
+        applicable = applicable[:n_top]
+        breakdown = {}
+        for bit, platform in enumerate(catalog.platforms):
+            flag = np.uint64(1 << bit)
+            if not env_mask & (1 << bit):
+                continue
+            on_platform = applicable & ((relevant & flag) != 0)
+            total = int(on_platform.sum())
+            covered = int((on_platform & ((covered_mask & flag) != 0)).sum())
+            breakdown[platform] = {
+                "applicable": total,
+                "covered": covered,
+                "coverage_percentage": (covered / total) * 100 if total > 0 else 0
+            }
+        return breakdown
+
+    def answers(self, assessment_id: int):
+        """Stored answers with this worker's pending autosave edits applied."""
+        stored = self.db.query(QuestionnaireResponse.question_id, QuestionnaireResponse.has_capability,
+                               QuestionnaireResponse.platforms_covered)\
+            .filter_by(assessment_id=assessment_id).all()
+        return merged_answers(stored, assessment_id)
+
+    def rules(self, assessment_id: int):
+        return self.db.query(DetectionRule.rule_id, DetectionRule.technique_ids, DetectionRule.component_ids,
+                             DetectionRule.platforms, DetectionRule.level, DetectionRule.status)\
+            .filter_by(assessment_id=assessment_id).all()
+
+    def evidence(self, assessment_id: int) -> Evidence:
+        observed = self.db.query(TelemetryEvidence.component_id)\
+            .filter(TelemetryEvidence.assessment_id == assessment_id, TelemetryEvidence.event_count > 0).all()
+        return Evidence(self.rules(assessment_id), [c for c, in observed])
+
+    def evaluate(self, catalog: Catalog, answers, cloud_usage, evidence: Evidence = None):
+        """Score answers (and observed evidence) without writing anything;
+        returns (state, environment mask, available components)."""
+        env_mask = self.environment_mask(catalog, answers, cloud_usage)
+        available = self.available_components(catalog, answers, evidence)
+        rules = evidence.rules if evidence is not None else None
+        return self.score(catalog, answers, env_mask, available, rules), env_mask, available
+
+    def calculate_coverage(self, assessment_id: int, progress: ProgressReporter = None):
+        """Recalculate and store coverage. Holds the assessment's lock until commit; a caller that had
+        to wait for another worker's recalculation returns that committed result instead of redoing it."""
+        progress = progress or ProgressReporter(None)
+        with advisory_lock(self.db, "calculate_coverage", assessment_id,
+                           get_settings().COVERAGE_LOCK_TIMEOUT_SECONDS) as contended:
+            if contended:
+                COVERAGE_SHARED.inc(("lock",))
+                result = self.stored_coverage(assessment_id)
+                self.db.commit()
+                return result
+            return self._calculate_coverage(assessment_id, progress)
+
+    def stored_coverage(self, assessment_id: int):
+        """The calculate_coverage response for what is stored, without rewriting any rows."""
+        catalog = get_catalog()
+        assessment = self.db.query(Assessment).filter(Assessment.id == assessment_id).first()
+        state, env_mask, _ = self.evaluate(catalog, self.answers(assessment_id),
+                                           assessment.cloud_usage if assessment else None,
+                                           self.evidence(assessment_id))
+        return {"message": "Coverage calculated",
+                "coverage_percentage": assessment.coverage_percentage if assessment else 0,
+                "platform_coverage": self.platform_breakdown(catalog, state.covered_mask, state.relevant,
+                                                             state.applicable, env_mask)}
+
+    def _calculate_coverage(self, assessment_id: int, progress: ProgressReporter):
+        start = perf_counter()
+        progress.phase("loading")
+        catalog = get_catalog()
+        n_top = catalog.n_top_level
+        technique_ids = list(catalog.technique_ids)
+        # 1. Clear previous coverage; what it contributed to the industry benchmark is kept on the assessment
         self.db.query(TechniqueCoverage).filter(TechniqueCoverage.assessment_id == assessment_id).delete()
 
-        # 2. Get all techniques
-        techniques = self.db.query(Technique).all()
-        responses = self.db.query(QuestionnaireResponse).filter_by(assessment_id=assessment_id).all()
-        answers = {r.question_id: r for r in responses}
-
-        covered = 0
-        for t in techniques:
-            # Sample logic: mark COVERED if any questionnaire response has_capability==True for this technique
-            q = answers.get(t.technique_id)
-            if q is not None and q.has_capability:
-                cov_status = CoverageStatus.COVERED
-                covered += 1
-            else:
-                cov_status = CoverageStatus.NONE
-
-            coverage = TechniqueCoverage(
-                assessment_id=assessment_id,
-                technique_id=t.technique_id,
-                coverage_status=cov_status,
-                confidence_score=1.0 if cov_status == CoverageStatus.COVERED else 0.0,
-                risk_score=5.0 if cov_status == CoverageStatus.NONE else 1.0,
-                data_components_missing=[],
-                strategies_implemented=[],
-                analytics_implemented=[],
-                data_components_available=[],
-                priority_rank=None
-            )
-            self.db.add(coverage)
-
-        # 3. Update assessment stats
-        total = len(techniques)
-        coverage_percent = (covered / total) * 100 if total > 0 else 0
+        # 2. Score techniques and sub-techniques from the catalog, on the tenant's platforms
+        progress.phase("scoring", catalog.n_techniques)
         assessment = self.db.query(Assessment).filter(Assessment.id == assessment_id).first()
+        evidence = self.evidence(assessment_id)
+        state, env_mask, available = self.evaluate(
+            catalog, self.answers(assessment_id), assessment.cloud_usage if assessment else None, evidence)
+        _, _, rule_ids = rule_evidence(catalog, evidence.rules)
+        confidence, applicable = state.confidence, state.applicable
+        statuses = status_codes(confidence, applicable)
+        component_ids = list(catalog.component_ids)
+        indptr, indices = catalog.csr("technique_components")
+        progress.advance(catalog.n_techniques)
+        progress.phase("writing", catalog.n_techniques)
+        rows = []
+        for i, (technique_id, score, code) in enumerate(zip(technique_ids, confidence.tolist(), statuses.tolist())):
+            cov_status = STATUS_CODES[code]
+            required = indices[indptr[i]:indptr[i + 1]]
+            rows.append({
+                "assessment_id": assessment_id,
+                "technique_id": technique_id,
+                "coverage_status": cov_status,
+                "confidence_score": score,
+                "risk_score": RISK_BY_STATUS[cov_status],
+                "data_components_missing": [component_ids[j] for j in required if not available[j]],
+                "strategies_implemented": [],
+                "analytics_implemented": rule_ids.get(i, []),
+                "data_components_available": [component_ids[j] for j in required if available[j]],
+                "priority_rank": None,
+            })
+        for offset in range(0, len(rows), WRITE_BATCH_SIZE):
+            batch = rows[offset:offset + WRITE_BATCH_SIZE]
+            self.db.execute(insert(TechniqueCoverage), batch)
+            progress.advance(len(batch))
+
+        # 3. Update assessment stats over applicable top-level techniques
+        progress.phase("benchmark")
+        in_scope = int(applicable[:n_top].sum())
+        covered = int((statuses[:n_top] == 2).sum())
+        coverage_percent = (covered / in_scope) * 100 if in_scope > 0 else 0
         if assessment:
             assessment.coverage_percentage = coverage_percent
             assessment.updated_at = datetime.utcnow()
+            scores = {technique_ids[i]: float(confidence[i]) for i in np.flatnonzero(applicable[:n_top])}
+            BenchmarkAggregator(self.db).record(assessment, contribution(scores, technique_tactics(catalog)))
+        platform_coverage = self.platform_breakdown(catalog, state.covered_mask, state.relevant, applicable, env_mask)
 
         self.db.commit()
-        return {"message": "Coverage calculated", "coverage_percentage": coverage_percent}
+        COVERAGE_DURATION.observe(perf_counter() - start)
+        COVERAGE_ROWS.observe(len(rows))
+        progress.done(coverage_percentage=coverage_percent)
+        return {"message": "Coverage calculated", "coverage_percentage": coverage_percent,
+                "platform_coverage": platform_coverage}
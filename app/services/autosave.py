@@ -0,0 +1,189 @@
+"""Write-coalescing buffer for questionnaire autosave.
+
+PATCHed answers are kept in memory per assessment, keyed by question, so an
+answer edited ten times between flushes is written once. The buffer is
+flushed in one batched upsert every AUTOSAVE_FLUSH_SECONDS, as soon as
+AUTOSAVE_MAX_PENDING answers are waiting, and at shutdown. Reads of an
+assessment's answers overlay what is still pending, so a client always sees
+its own edits. The buffer is per worker: a read served by another worker sees
+an edit once it has been flushed.
+"""
+import asyncio
+import threading
+from time import sleep
+from typing import Dict, Iterable, List, Optional, Tuple
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.exc import DataError, IntegrityError
+from starlette.concurrency import run_in_threadpool
+from app.config import get_settings
+from app.database import SessionLocal, engine, pin_tenant_to_primary, read_engine
+from app.models.assessment import QuestionnaireResponse
+from app.utils.logger import get_logger
+from app.utils.metrics import AUTOSAVE_COALESCED, AUTOSAVE_FLUSH_ROWS, AUTOSAVE_PENDING
+
+logger = get_logger("autosave")
+
+ANSWER_FIELDS = ("capability_type", "has_capability", "coverage_level", "platforms_covered", "notes")
+# Errors caused by the rows themselves; retrying them can never succeed.
+REJECTED = (DataError, IntegrityError)
+
+
+def upsert_answers(db, rows: List[dict]):
+    """Insert or overwrite (assessment_id, question_id) answers in one statement."""
+    if not rows:
+        return
+    stmt = insert(QuestionnaireResponse)
+    db.execute(stmt.on_conflict_do_update(
+        constraint="uq_questionnaire_response_question",
+        set_={field: stmt.excluded[field] for field in ANSWER_FIELDS},
+    ), rows)
+
+
+class AutosaveBuffer:
+    def __init__(self, max_pending: int):
+        self.max_pending = max_pending
+        # assessment_id -> question_id -> row; tenant_id per assessment for read-your-writes pinning.
+        self._pending: Dict[int, Dict[str, dict]] = {}
+        self._tenants: Dict[int, int] = {}
+        self._size = 0
+        self._lock = threading.Lock()
+
+    @property
+    def size(self) -> int:
+        return self._size
+
+    def put(self, tenant_id: int, row: dict) -> bool:
+        """Buffer one answer; True when the buffer has reached its flush threshold."""
+        assessment_id = row["assessment_id"]
+        with self._lock:
+            answers = self._pending.setdefault(assessment_id, {})
+            if row["question_id"] in answers:
+                AUTOSAVE_COALESCED.inc()
+            else:
+                self._size += 1
+            answers[row["question_id"]] = row
+            self._tenants[assessment_id] = tenant_id
+            AUTOSAVE_PENDING.set(self._size)
+            return self._size >= self.max_pending
+
+    def pending(self, assessment_id: int) -> Dict[str, dict]:
+        with self._lock:
+            return dict(self._pending.get(assessment_id, {}))
+
+    def discard(self, assessment_id: int, question_ids: Iterable[str]):
+        """Drop pending edits superseded by a write that bypassed the buffer."""
+        with self._lock:
+            answers = self._pending.get(assessment_id)
+            if not answers:
+                return
+            for question_id in question_ids:
+                if answers.pop(question_id, None) is not None:
+                    self._size -= 1
+            if not answers:
+                del self._pending[assessment_id]
+            AUTOSAVE_PENDING.set(self._size)
+
+    def _take(self, assessment_id: Optional[int]) -> Tuple[Dict[int, Dict[str, dict]], Dict[int, int]]:
+        with self._lock:
+            if assessment_id is None:
+                taken, self._pending = self._pending, {}
+            else:
+                taken = {assessment_id: self._pending.pop(assessment_id)} if assessment_id in self._pending else {}
+            tenants = {a: self._tenants.pop(a) for a in taken if a in self._tenants}
+            self._size -= sum(len(answers) for answers in taken.values())
+            AUTOSAVE_PENDING.set(self._size)
+        return taken, tenants
+
+    def _restore(self, taken: Dict[int, Dict[str, dict]], tenants: Dict[int, int]):
+        # Put a failed batch back without overwriting edits that arrived meanwhile.
+        with self._lock:
+            for assessment_id, answers in taken.items():
+                current = self._pending.setdefault(assessment_id, {})
+                for question_id, row in answers.items():
+                    if question_id not in current:
+                        current[question_id] = row
+                        self._size += 1
+                self._tenants.setdefault(assessment_id, tenants.get(assessment_id))
+            AUTOSAVE_PENDING.set(self._size)
+
+    @staticmethod
+    def _write(rows: List[dict]):
+        with SessionLocal() as db:
+            upsert_answers(db, rows)
+            db.commit()
+
+    def _write_isolated(self, taken: Dict[int, Dict[str, dict]]) -> int:
+        """Write each assessment on its own, and a rejected assessment row by row, dropping only the rows
+        the database refuses. Written and dropped assessments leave ``taken``, so a failure restores the rest."""
+        written = 0
+        for assessment_id in list(taken):
+            rows = list(taken[assessment_id].values())
+            try:
+                self._write(rows)
+                written += len(rows)
+            except REJECTED:
+                for row in rows:
+                    try:
+                        self._write([row])
+                        written += 1
+                    except REJECTED as e:
+                        logger.error("Dropped autosaved answer %s of assessment %s: %s",
+                                     row["question_id"], assessment_id, e.orig)
+                    taken[assessment_id].pop(row["question_id"])
+            del taken[assessment_id]
+        return written
+
+    def flush(self, assessment_id: Optional[int] = None) -> int:
+        """Upsert everything pending (or one assessment's edits); returns the number of answers written."""
+        taken, tenants = self._take(assessment_id)
+        rows = [row for answers in taken.values() for row in answers.values()]
+        if not rows:
+            return 0
+        try:
+            try:
+                self._write(rows)
+                written = len(rows)
+            except REJECTED:
+                # One bad row must not hold back every other tenant's answers on this worker.
+                written = self._write_isolated(taken)
+        except Exception:
+            self._restore(taken, tenants)
+            raise
+        if read_engine is not engine:
+            for tenant_id in set(tenants.values()) - {None}:
+                pin_tenant_to_primary(tenant_id)
+        AUTOSAVE_FLUSH_ROWS.observe(written)
+        return written
+
+    async def run(self, interval: float):
+        """Background flusher for the lifespan of the app."""
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await run_in_threadpool(self.flush)
+            except Exception:
+                logger.exception("Autosave flush failed; %d answers kept for retry", self.size)
+
+    def drain(self, attempts: int = 3):
+        """Flush at shutdown, retrying briefly; whatever still fails is logged as lost."""
+        for attempt in range(attempts):
+            try:
+                written = self.flush()
+                if written:
+                    logger.info("Flushed %d autosaved answers at shutdown", written)
+                return
+            except Exception:
+                logger.exception("Autosave flush at shutdown failed (attempt %d/%d)", attempt + 1, attempts)
+                sleep(0.5 * (attempt + 1))
+        logger.error("Lost %d autosaved answers that could not be flushed at shutdown", self.size)
+
+
+autosave_buffer = AutosaveBuffer(get_settings().AUTOSAVE_MAX_PENDING)
+
+
+def merged_answers(stored, assessment_id: int) -> List[tuple]:
+    """(question_id, has_capability, platforms_covered) per question: stored answers with pending edits on top."""
+    answers = {a[0]: tuple(a) for a in stored}
+    for question_id, row in autosave_buffer.pending(assessment_id).items():
+        answers[question_id] = (question_id, row["has_capability"], row["platforms_covered"])
+    return list(answers.values())
@@ -0,0 +1,159 @@
+from typing import Dict, Iterable, List, Optional, Tuple
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+from app.models.benchmark import IndustryCoverageAggregate
+
+BUCKETS = 10
+PERCENTILES = (25, 50, 75, 90)
+# Distributions backed by fewer assessments than this are withheld so a single
+# peer's coverage can't be read back out of the benchmark.
+MIN_PEER_ASSESSMENTS = 5
+
+ContributionKey = Tuple[str, str]
+
+
+def _bucket(score: float) -> int:
+    return min(max(int(score * BUCKETS), 0), BUCKETS - 1)
+
+
+def contribution(technique_scores: Dict[str, float], technique_tactics: Dict[str, Iterable[str]]) -> Dict[ContributionKey, float]:
+    """Per-technique, per-tactic and overall scores (0..1) one assessment adds to its industry."""
+    if not technique_scores:
+        return {}
+    result: Dict[ContributionKey, float] = {}
+    tactic_totals: Dict[str, List[float]] = {}
+    for technique_id, score in technique_scores.items():
+        result[("technique", technique_id)] = score
+        for tactic in technique_tactics.get(technique_id) or []:
+            tactic_totals.setdefault(tactic, []).append(score)
+    for tactic, scores in tactic_totals.items():
+        result[("tactic", tactic)] = sum(scores) / len(scores)
+    result[("overall", "all")] = sum(technique_scores.values()) / len(technique_scores)
+    return result
+
+
+def percentile_from_histogram(histogram: List[int], total: int, pct: float) -> float:
+    """Linear interpolation inside the bucket holding the pct-th sample."""
+    if total <= 0:
+        return 0.0
+    target = total * pct / 100.0
+    cumulative = 0
+    for i, count in enumerate(histogram):
+        if count and cumulative + count >= target:
+            within = (target - cumulative) / count
+            return round((i + within) / BUCKETS, 4)
+        cumulative += count
+    return 1.0
+
+
+def percentile_rank(histogram: List[int], total: int, score: float) -> float:
+    """Share of peers (0..100) scoring below `score`, counting half of its own bucket."""
+    if total <= 0:
+        return 0.0
+    b = _bucket(score)
+    below = sum(histogram[:b]) + histogram[b] / 2.0
+    return round(100.0 * below / total, 1)
+
+
+def encode_contribution(contribution: Dict[ContributionKey, float]) -> dict:
+    """JSON form stored on the assessment: {scope: {key: score}}."""
+    encoded: Dict[str, Dict[str, float]] = {}
+    for (scope, key), score in contribution.items():
+        encoded.setdefault(scope, {})[key] = score
+    return encoded
+
+
+def decode_contribution(encoded: Optional[dict]) -> Dict[ContributionKey, float]:
+    return {(scope, key): score for scope, keys in (encoded or {}).items() for key, score in keys.items()}
+
+
+class BenchmarkAggregator:
+    def __init__(self, db: Session):
+        self.db = db
+
+    def record(self, assessment, current: Dict[ContributionKey, float]):
+        """Replace what ``assessment`` contributes to its industry with ``current`` (empty withdraws it).
+
+        Only what was recorded on the assessment is ever subtracted, under the
+        industry it was added to, so peers' buckets cannot be decremented by
+        rows that were never counted."""
+        industry = assessment.industry if current else None
+        self.apply(assessment.benchmark_industry, decode_contribution(assessment.benchmark_contribution),
+                   industry, current)
+        assessment.benchmark_industry = industry
+        assessment.benchmark_contribution = encode_contribution(current) if industry else None
+
+    def withdraw(self, assessment):
+        self.record(assessment, {})
+
+    def apply(self, previous_industry: Optional[str], previous: Dict[ContributionKey, float],
+              industry: Optional[str], current: Dict[ContributionKey, float]):
+        """Swap a previous contribution (to ``previous_industry``) for the current one (to ``industry``).
+
+        Runs inside the caller's transaction; rows are locked so concurrent
+        calculations in the same industry don't lose increments.
+        """
+        if previous_industry == industry:
+            self._adjust(industry, previous, current)
+        else:
+            self._adjust(previous_industry, previous, {})
+            self._adjust(industry, {}, current)
+
+    def _adjust(self, industry: Optional[str], previous: Dict[ContributionKey, float],
+                current: Dict[ContributionKey, float]):
+        if not industry or (not previous and not current):
+            return
+        if current:
+            # Create missing rows first so that concurrent first-time calculations
+            # meet on the same rows instead of racing to insert them.
+            self.db.execute(insert(IndustryCoverageAggregate).values([
+                {"industry": industry, "scope": scope, "key": key, "histogram": [0] * BUCKETS,
+                 "sample_count": 0, "score_sum": 0.0}
+                for scope, key in sorted(current)
+            ]).on_conflict_do_nothing(constraint="uq_industry_scope_key"))
+        rows = {
+            (r.scope, r.key): r
+            for r in self.db.query(IndustryCoverageAggregate)
+            .filter(IndustryCoverageAggregate.industry == industry)
+            .order_by(IndustryCoverageAggregate.id)
+            .with_for_update()
+            .all()
+        }
+        for key in set(previous) | set(current):
+            row = rows.get(key)
+            if row is None:
+                continue
+            histogram = list(row.histogram or [0] * BUCKETS)
+            count = row.sample_count or 0
+            total = row.score_sum or 0.0
+            if key in previous:
+                b = _bucket(previous[key])
+                if histogram[b] > 0:
+                    histogram[b] -= 1
+                    count -= 1
+                    total -= previous[key]
+            if key in current:
+                histogram[_bucket(current[key])] += 1
+                count += 1
+                total += current[key]
+            # Reassign rather than mutate so the ARRAY change is flushed.
+            row.histogram = histogram
+            row.sample_count = max(count, 0)
+            row.score_sum = max(total, 0.0) if count > 0 else 0.0
+
+    def distributions(self, industry: str) -> dict:
+        rows = self.db.query(IndustryCoverageAggregate).filter(IndustryCoverageAggregate.industry == industry).all()
+        result = {"overall": None, "tactics": {}, "techniques": {}}
+        for r in rows:
+            if (r.sample_count or 0) < MIN_PEER_ASSESSMENTS:
+                continue
+            dist = {f"p{p}": percentile_from_histogram(r.histogram, r.sample_count, p) for p in PERCENTILES}
+            dist["mean"] = round(r.score_sum / r.sample_count, 4)
+            dist["sample_count"] = r.sample_count
+            if r.scope == "overall":
+                result["overall"] = dist
+            elif r.scope == "tactic":
+                result["tactics"][r.key] = dist
+            else:
+                result["techniques"][r.key] = dist
+        return result
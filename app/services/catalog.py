@@ -0,0 +1,355 @@
+"""Compiled, memory-mapped ATT&CK catalog.
+
+``sync_mitre_data.py`` compiles the catalog tables into one versioned binary
+file. Every uvicorn worker maps that file read-only, so the string tables,
+index arrays and the technique x data-component incidence matrix live once
+in the page cache however many workers there are. The file is replaced
+atomically (write + rename) and workers notice the new inode and remap.
+
+File layout::
+
+    b"ATKCAT01" | uint32 header length | JSON header | 64-byte aligned sections
+
+The header maps each section name to its offset, dtype and length. Strings
+are stored as ``<name>.offsets`` (uint32, n+1) plus ``<name>.data`` (utf-8).
+Techniques come first in ``technique_ids``, followed by sub-techniques.
+Platform lists are stored as uint64 bitmasks over the ``platforms`` table.
+"""
+import hashlib
+import json
+import mmap
+import os
+import tempfile
+import threading
+from datetime import datetime
+from time import monotonic
+from typing import Callable, Dict, Iterable, List, Optional, Sequence
+import numpy as np
+from sqlalchemy.orm import Session
+from app.config import get_settings
+from app.models.attack_data import Analytic, DataComponent, DetectionStrategy, SubTechnique, Technique, ThreatGroup
+from app.services.questionnaire_catalog import load_questionnaire
+from app.utils.logger import get_logger
+
+logger = get_logger("catalog")
+
+MAGIC = b"ATKCAT01"
+ALIGN = 64
+# Bumped when sections are added; older files are refused until sync_mitre_data.py recompiles them.
+FORMAT = 4
+MAX_PLATFORMS = 64
+_POPCOUNT = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+
+def popcount(masks: np.ndarray) -> np.ndarray:
+    """Set bits per uint64 mask (numpy < 2 has no bitwise_count)."""
+    masks = np.ascontiguousarray(masks, dtype="<u8")
+    return _POPCOUNT[masks.view(np.uint8)].reshape(-1, 8).sum(axis=1)
+
+
+class CatalogBuilder:
+    def __init__(self):
+        self.sections: Dict[str, np.ndarray] = {}
+
+    def add_array(self, name: str, values, dtype="<i4"):
+        self.sections[name] = np.ascontiguousarray(np.asarray(values, dtype=dtype))
+
+    def add_strings(self, name: str, values: Sequence[str]):
+        encoded = [(v or "").encode("utf-8") for v in values]
+        offsets = np.zeros(len(encoded) + 1, dtype="<u4")
+        if encoded:
+            offsets[1:] = np.cumsum([len(e) for e in encoded])
+        self.sections[f"{name}.offsets"] = offsets
+        self.sections[f"{name}.data"] = np.frombuffer(b"".join(encoded), dtype="u1")
+
+    def add_csr(self, name: str, rows: Sequence[Iterable[int]]):
+        """Sparse row -> column-index lists as CSR ``<name>.indptr`` / ``<name>.indices``."""
+        lengths = [0]
+        indices: List[int] = []
+        for row in rows:
+            cols = sorted(set(row))
+            indices.extend(cols)
+            lengths.append(len(cols))
+        self.add_array(f"{name}.indptr", np.cumsum(lengths))
+        self.add_array(f"{name}.indices", indices)
+
+    def write(self, path: str) -> str:
+        digest = hashlib.sha256()
+        layout = {}
+        offset = 0
+        for name in sorted(self.sections):
+            arr = self.sections[name]
+            digest.update(name.encode("utf-8"))
+            digest.update(arr.tobytes())
+            layout[name] = {"offset": offset, "dtype": arr.dtype.str, "count": int(arr.size)}
+            offset += -(-arr.nbytes // ALIGN) * ALIGN
+        version = digest.hexdigest()[:16]
+        header = json.dumps({"version": version, "format": FORMAT, "built_at": datetime.utcnow().isoformat(), "sections": layout}).encode("utf-8")
+        prefix_len = len(MAGIC) + 4 + len(header)
+        data_start = -(-prefix_len // ALIGN) * ALIGN
+
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(prefix=".catalog-", dir=directory)
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(MAGIC)
+                f.write(len(header).to_bytes(4, "little"))
+                f.write(header)
+                f.write(b"\0" * (data_start - prefix_len))
+                for name in sorted(self.sections):
+                    raw = self.sections[name].tobytes()
+                    f.write(raw)
+                    f.write(b"\0" * (-len(raw) % ALIGN))
+                f.flush()
+                os.fsync(f.fileno())
+            os.chmod(tmp_path, 0o644)
+            # Atomic swap: workers holding the old mapping keep reading the old inode.
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
+        return version
+
+
+class StringTable:
+    def __init__(self, offsets: np.ndarray, data: np.ndarray):
+        self._offsets = offsets
+        self._data = data
+
+    def __len__(self) -> int:
+        return len(self._offsets) - 1
+
+    def __getitem__(self, i: int) -> str:
+        return bytes(self._data[self._offsets[i]:self._offsets[i + 1]]).decode("utf-8")
+
+    def __iter__(self):
+        return (self[i] for i in range(len(self)))
+
+
+class Catalog:
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as f:
+            self._stat = os.fstat(f.fileno())
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._mm[:len(MAGIC)] != MAGIC:
+            raise ValueError(f"{path} is not a compiled ATT&CK catalog")
+        header_len = int.from_bytes(self._mm[len(MAGIC):len(MAGIC) + 4], "little")
+        header_end = len(MAGIC) + 4 + header_len
+        header = json.loads(self._mm[len(MAGIC) + 4:header_end].decode("utf-8"))
+        data_start = -(-header_end // ALIGN) * ALIGN
+        self.version: str = header["version"]
+        self.built_at: str = header["built_at"]
+        self.format: int = header.get("format", 1)
+        self._sections: Dict[str, np.ndarray] = {}
+        for name, meta in header["sections"].items():
+            dtype = np.dtype(meta["dtype"])
+            if not meta["count"]:
+                self._sections[name] = np.empty(0, dtype=dtype)
+                continue
+            # Zero-copy views onto the shared mapping.
+            self._sections[name] = np.frombuffer(self._mm, dtype=dtype, count=meta["count"], offset=data_start + meta["offset"])
+        self._strings: Dict[str, StringTable] = {}
+        self._indexes: Dict[str, Dict[str, int]] = {}
+
+    def has(self, name: str) -> bool:
+        return name in self._sections or f"{name}.offsets" in self._sections
+
+    def array(self, name: str) -> np.ndarray:
+        return self._sections[name]
+
+    def strings(self, name: str) -> StringTable:
+        if name not in self._strings:
+            self._strings[name] = StringTable(self._sections[f"{name}.offsets"], self._sections[f"{name}.data"])
+        return self._strings[name]
+
+    def index(self, name: str) -> Dict[str, int]:
+        """value -> position lookup for a string table (small, built per worker on first use)."""
+        if name not in self._indexes:
+            self._indexes[name] = {v: i for i, v in enumerate(self.strings(name))}
+        return self._indexes[name]
+
+    def csr(self, name: str):
+        return self._sections[f"{name}.indptr"], self._sections[f"{name}.indices"]
+
+    @property
+    def technique_ids(self) -> StringTable:
+        return self.strings("technique_ids")
+
+    @property
+    def component_ids(self) -> StringTable:
+        return self.strings("component_ids")
+
+    @property
+    def n_techniques(self) -> int:
+        return len(self.technique_ids)
+
+    @property
+    def n_top_level(self) -> int:
+        return int(self._sections["n_top_level"][0])
+
+    @property
+    def n_components(self) -> int:
+        return len(self.component_ids)
+
+    @property
+    def parent(self) -> np.ndarray:
+        return self._sections["technique_parent"]
+
+    @property
+    def platforms(self) -> StringTable:
+        return self.strings("platforms")
+
+    @property
+    def technique_platforms(self) -> np.ndarray:
+        return self._sections["technique_platforms"]
+
+    @property
+    def all_platforms(self) -> int:
+        return (1 << len(self.platforms)) - 1
+
+    def platform_mask(self, names: Iterable[str]) -> int:
+        """Bitmask for platform names (case-insensitive); unknown names are ignored."""
+        if "platform_index" not in self._indexes:
+            self._indexes["platform_index"] = {p.lower(): i for i, p in enumerate(self.platforms)}
+        index = self._indexes["platform_index"]
+        mask = 0
+        for name in names or ():
+            bit = index.get(str(name).lower())
+            if bit is not None:
+                mask |= 1 << bit
+        return mask
+
+    def changed_on_disk(self) -> bool:
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            return False
+        return (st.st_ino, st.st_mtime_ns, st.st_size) != (self._stat.st_ino, self._stat.st_mtime_ns, self._stat.st_size)
+
+
+def compile_catalog(db: Session) -> CatalogBuilder:
+    techniques = db.query(Technique.technique_id, Technique.name, Technique.tactics, Technique.platforms,
+                          Technique.description).order_by(Technique.technique_id).all()
+    subs = db.query(SubTechnique.technique_id, SubTechnique.name, SubTechnique.parent_technique_id,
+                    SubTechnique.platforms, SubTechnique.description).order_by(SubTechnique.technique_id).all()
+    technique_ids = [t.technique_id for t in techniques] + [s.technique_id for s in subs]
+    position = {tid: i for i, tid in enumerate(technique_ids)}
+    top_level = {t.technique_id: i for i, t in enumerate(techniques)}
+    parents = [top_level.get(s.parent_technique_id, -1) for s in subs]
+
+    tactics = sorted({tac for t in techniques for tac in (t.tactics or [])})
+    tactic_position = {tac: i for i, tac in enumerate(tactics)}
+    technique_tactics = [[tactic_position[tac] for tac in (t.tactics or [])] for t in techniques]
+    # Sub-techniques inherit their parent's tactics.
+    technique_tactics += [technique_tactics[p] if p >= 0 else [] for p in parents]
+
+    platform_lists = [t.platforms or [] for t in techniques] + [s.platforms or [] for s in subs]
+    platforms = sorted({p for names in platform_lists for p in names})
+    if len(platforms) > MAX_PLATFORMS:
+        raise ValueError(f"{len(platforms)} platforms do not fit a {MAX_PLATFORMS}-bit mask")
+    bit = {p: 1 << i for i, p in enumerate(platforms)}
+    technique_platforms = [sum(bit[p] for p in set(names)) for names in platform_lists]
+
+    components = dict(db.query(DataComponent.component_id, DataComponent.name).order_by(DataComponent.component_id).all())
+    requirements = db.query(DetectionStrategy.technique_id, DetectionStrategy.sub_technique_id,
+                            Analytic.data_components_required)\
+        .join(Analytic, Analytic.strategy_id == DetectionStrategy.strategy_id).all()
+    questionnaire = load_questionnaire()
+    referenced = {c for _, _, comps in requirements for c in (comps or [])}
+    referenced |= {c for s in questionnaire["sections"] for q in s["questions"] for c in q.get("data_components_mapped", [])}
+    component_ids = sorted(set(components) | referenced)
+    component_position = {c: i for i, c in enumerate(component_ids)}
+
+    technique_components: List[set] = [set() for _ in technique_ids]
+    for technique_id, sub_technique_id, comps in requirements:
+        i = position.get(sub_technique_id or technique_id)
+        if i is not None:
+            technique_components[i].update(component_position[c] for c in (comps or []))
+    component_techniques: List[List[int]] = [[] for _ in component_ids]
+    for i, comps in enumerate(technique_components):
+        for c in comps:
+            component_techniques[c].append(i)
+
+    builder = CatalogBuilder()
+    builder.add_strings("technique_ids", technique_ids)
+    builder.add_strings("technique_names", [t.name for t in techniques] + [s.name for s in subs])
+    builder.add_strings("technique_descriptions", [t.description for t in techniques] + [s.description for s in subs])
+    builder.add_array("n_top_level", [len(techniques)])
+    builder.add_array("technique_parent", [-1] * len(techniques) + parents)
+    builder.add_strings("tactics", tactics)
+    builder.add_csr("technique_tactics", technique_tactics)
+    builder.add_strings("platforms", platforms)
+    builder.add_array("technique_platforms", technique_platforms, dtype="<u8")
+    builder.add_strings("component_ids", component_ids)
+    builder.add_strings("component_names", [components.get(c) or "" for c in component_ids])
+    builder.add_csr("technique_components", technique_components)
+    builder.add_csr("component_techniques", component_techniques)
+
+    groups = db.query(ThreatGroup.group_id, ThreatGroup.name, ThreatGroup.techniques_used,
+                      ThreatGroup.target_industries).order_by(ThreatGroup.group_id).all()
+    industries = sorted({i for g in groups for i in (g.target_industries or [])})
+    industry_position = {i: k for k, i in enumerate(industries)}
+    builder.add_strings("group_ids", [g.group_id for g in groups])
+    builder.add_strings("group_names", [g.name for g in groups])
+    builder.add_csr("group_techniques", [
+        [position[t] for t in (g.techniques_used or []) if t in position] for g in groups
+    ])
+    builder.add_strings("industries", industries)
+    builder.add_csr("group_industries", [[industry_position[i] for i in (g.target_industries or [])] for g in groups])
+    return builder
+
+
+def compile_catalog_file(db: Session, path: Optional[str] = None) -> str:
+    path = path or get_settings().CATALOG_PATH
+    version = compile_catalog(db).write(path)
+    logger.info("Compiled ATT&CK catalog %s to %s", version, path)
+    return version
+
+
+_lock = threading.Lock()
+_current: Optional[Catalog] = None
+_last_check = 0.0
+_listeners: List[Callable[[Catalog], None]] = []
+
+
+def on_catalog_change(callback: Callable[[Catalog], None]):
+    """Register a derived cache to rebuild whenever a new catalog version is mapped."""
+    _listeners.append(callback)
+
+
+class CatalogUnavailable(RuntimeError):
+    pass
+
+
+def _load(path: str) -> Catalog:
+    # Compiling is sync_mitre_data.py's job: workers only map the file, so they never race to build it.
+    if not os.path.exists(path):
+        raise CatalogUnavailable(f"No compiled ATT&CK catalog at {path}; run `python sync_mitre_data.py --compile-only`")
+    catalog = Catalog(path)
+    if catalog.format < FORMAT:
+        raise CatalogUnavailable(f"Catalog {path} has format {catalog.format}, code expects {FORMAT}; "
+                                 f"run `python sync_mitre_data.py --compile-only`")
+    return catalog
+
+
+def get_catalog() -> Catalog:
+    """Current catalog mapping; checks the file for a new version at most every CATALOG_RELOAD_SECONDS."""
+    global _current, _last_check
+    settings = get_settings()
+    now = monotonic()
+    catalog = _current
+    if catalog is not None and now - _last_check < settings.CATALOG_RELOAD_SECONDS:
+        return catalog
+    with _lock:
+        if _current is None or _current.changed_on_disk():
+            previous = _current
+            _current = _load(settings.CATALOG_PATH)
+            if previous is None or previous.version != _current.version:
+                logger.info("Mapped ATT&CK catalog %s (pid %s)", _current.version, os.getpid())
+                for callback in _listeners:
+                    callback(_current)
+        _last_check = now
+        return _current
@@ -0,0 +1,109 @@
+"""Budgeted data-component onboarding plan.
+
+Weighted max coverage over the tenant's open gaps. Each in-scope technique
+that is not yet covered weighs its gap risk (risk score x missing confidence).
+Onboarding a component reaches every gap whose analytics require it. Plans
+are built lazy-greedily: candidates sit in a max-heap keyed by gain per unit
+cost, and because the objective is submodular a popped candidate is only
+re-evaluated when its cached gain is stale. Each step is re-scored with the
+assessment engine so the plan also reports the coverage it would reach.
+"""
+import heapq
+from typing import Dict, List, Optional
+import numpy as np
+from app.services.assessment_engine import AssessmentEngine, Evidence, risk_scores, status_codes
+from app.services.catalog import Catalog
+
+
+def gap_weights(state) -> np.ndarray:
+    """Risk-weighted gap per technique; zero for covered and out-of-scope techniques."""
+    return risk_scores(state.own, state.in_scope) * (1.0 - np.minimum(state.own, 1.0))
+
+
+def lazy_greedy(indptr: np.ndarray, indices: np.ndarray, weights: np.ndarray, candidates: np.ndarray,
+                costs: np.ndarray, budget: float, max_steps: int):
+    """Weighted max coverage: returns [(candidate, gain)] in pick order within budget and max_steps."""
+    reached = np.zeros(len(weights), dtype=bool)
+
+    def gain(c: int) -> float:
+        covered = indices[indptr[c]:indptr[c + 1]]
+        return float(weights[covered][~reached[covered]].sum())
+
+    heap = []
+    for k, c in enumerate(candidates):
+        g = gain(int(c))
+        if g > 0:
+            heap.append((-g / costs[k], k, 0))
+    heapq.heapify(heap)
+    picks = []
+    spent = 0.0
+    round_ = 0
+    while heap and len(picks) < max_steps:
+        _, k, evaluated = heapq.heappop(heap)
+        if spent + costs[k] > budget:
+            # Too expensive for what is left; cheaper candidates may still fit.
+            continue
+        c = int(candidates[k])
+        if evaluated != round_:
+            g = gain(c)
+            if g > 0:
+                heapq.heappush(heap, (-g / costs[k], k, round_))
+            continue
+        g = gain(c)
+        reached[indices[indptr[c]:indptr[c + 1]]] = True
+        spent += costs[k]
+        picks.append((k, g))
+        round_ += 1
+    return picks
+
+
+def plan(engine: AssessmentEngine, catalog: Catalog, answers, cloud_usage, max_components: int = 5,
+         costs: Optional[Dict[str, float]] = None, max_cost: Optional[float] = None, evidence: Evidence = None) -> dict:
+    state, env_mask, available = engine.evaluate(catalog, answers, cloud_usage, evidence)
+    rules = evidence.rules if evidence is not None else None
+    weights = gap_weights(state)
+    total_gap = float(weights.sum())
+    indptr, indices = catalog.csr("component_techniques")
+    candidates = np.flatnonzero(~available & (np.diff(indptr) > 0))
+    component_ids = catalog.component_ids
+    candidate_costs = np.array([float((costs or {}).get(component_ids[int(c)], 1.0)) for c in candidates])
+    candidate_costs = np.maximum(candidate_costs, 1e-9)
+    budget = float(max_cost) if max_cost is not None else float("inf")
+
+    picks = lazy_greedy(indptr, indices, weights, candidates, candidate_costs, budget, max_components)
+
+    n_top = catalog.n_top_level
+    component_names = catalog.strings("component_names")
+    steps: List[dict] = []
+    planned = available.copy()
+    cumulative_gain = 0.0
+    cumulative_cost = 0.0
+    for step, (k, g) in enumerate(picks, start=1):
+        j = int(candidates[k])
+        planned[j] = True
+        cumulative_gain += g
+        cumulative_cost += float(candidate_costs[k])
+        after = engine.score(catalog, answers, env_mask, planned, rules)
+        applicable = after.applicable[:n_top]
+        in_scope = int(applicable.sum())
+        covered = int((status_codes(after.confidence[:n_top], applicable) == 2).sum())
+        steps.append({
+            "step": step,
+            "component_id": component_ids[j],
+            "name": component_names[j] or None,
+            "cost": float(candidate_costs[k]),
+            "gain": round(g, 4),
+            "cumulative_gain": round(cumulative_gain, 4),
+            "cumulative_cost": round(cumulative_cost, 4),
+            "gap_closed_percentage": (cumulative_gain / total_gap) * 100 if total_gap > 0 else 0,
+            "coverage_percentage_after": (covered / in_scope) * 100 if in_scope > 0 else 0,
+        })
+    applicable = state.applicable[:n_top]
+    in_scope = int(applicable.sum())
+    covered = int((status_codes(state.confidence[:n_top], applicable) == 2).sum())
+    return {
+        "coverage_percentage": (covered / in_scope) * 100 if in_scope > 0 else 0,
+        "total_gap_weight": round(total_gap, 4),
+        "candidates_evaluated": int(len(candidates)),
+        "steps": steps,
+    }
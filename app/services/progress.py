@@ -0,0 +1,231 @@
+"""Live progress events for long operations.
+
+A calculation or a sync publishes events (phase, processed, total, rate,
+ETA) to a channel such as ``assessment:42`` or ``sync``. Each worker has one
+in-process broker that fans an event out to every subscriber's asyncio
+queue. Subscribers are SSE streams, and none of them holds a database
+connection. Publishers run in other processes too (the sync script, other
+workers), so events are also sent with ``pg_notify``, from a notifier
+thread with one connection of its own, so publishers never take a pooled
+connection or wait on the database. Each worker then relays them from a
+single LISTEN connection, opened on first subscription.
+"""
+import asyncio
+import queue
+import select
+import threading
+import uuid
+from time import monotonic, time
+from typing import AsyncIterator, Dict, Optional, Set, Tuple
+import orjson
+from app.config import get_settings
+from app.database import engine
+from app.utils.logger import get_logger
+
+logger = get_logger("progress")
+settings = get_settings()
+
+NOTIFY_CHANNEL = "progress_events"
+TERMINAL_PHASES = ("done", "failed")
+QUEUE_SIZE = 100
+# Notifications waiting for the notifier thread; beyond this they are dropped, like a slow subscriber's.
+OUTBOX_SIZE = 1000
+# Identifies this process's own notifications, which it has already delivered locally.
+ORIGIN = uuid.uuid4().hex
+
+
+def _offer(queue: asyncio.Queue, event: dict):
+    # Slow subscribers lose the oldest events, never the newest.
+    if queue.full():
+        queue.get_nowait()
+    queue.put_nowait(event)
+
+
+class ProgressBroker:
+    def __init__(self):
+        self._subscribers: Dict[str, Set[Tuple[asyncio.AbstractEventLoop, asyncio.Queue]]] = {}
+        self._last: Dict[str, dict] = {}
+        self._lock = threading.Lock()
+        self._listener: Optional[threading.Thread] = None
+        self._notifier: Optional[threading.Thread] = None
+        self._outbox: "queue.Queue[Optional[str]]" = queue.Queue(OUTBOX_SIZE)
+        self._stop = threading.Event()
+
+    def publish(self, channel: str, event: dict):
+        """Deliver to this worker's subscribers and, via NOTIFY, to every other process."""
+        self._deliver(channel, event)
+        if self._notify_enabled():
+            self._ensure_notifier()
+            try:
+                self._outbox.put_nowait(orjson.dumps({"origin": ORIGIN, "channel": channel, "event": event}).decode())
+            except queue.Full:
+                logger.warning("Progress notifications are backed up; dropped an event for %s", channel)
+
+    def _deliver(self, channel: str, event: dict):
+        with self._lock:
+            self._last[channel] = event
+            subscribers = list(self._subscribers.get(channel, ()))
+        for loop, queue in subscribers:
+            loop.call_soon_threadsafe(_offer, queue, event)
+
+    async def events(self, channel: str, heartbeat: float) -> AsyncIterator[Optional[dict]]:
+        """Events on a channel as they arrive, starting with the latest one if it is still running;
+        yields None every ``heartbeat`` seconds without events."""
+        self._ensure_listener()
+        subscriber = (asyncio.get_running_loop(), asyncio.Queue(QUEUE_SIZE))
+        with self._lock:
+            self._subscribers.setdefault(channel, set()).add(subscriber)
+            last = self._last.get(channel)
+        try:
+            if last is not None and last.get("phase") not in TERMINAL_PHASES:
+                yield last
+            while True:
+                try:
+                    yield await asyncio.wait_for(subscriber[1].get(), heartbeat)
+                except asyncio.TimeoutError:
+                    yield None
+        finally:
+            with self._lock:
+                subscribers = self._subscribers.get(channel)
+                if subscribers is not None:
+                    subscribers.discard(subscriber)
+                    if not subscribers:
+                        del self._subscribers[channel]
+
+    @staticmethod
+    def _notify_enabled() -> bool:
+        return settings.PROGRESS_NOTIFY_ENABLED and engine.dialect.name == "postgresql"
+
+    @staticmethod
+    def _connect():
+        # A dedicated autocommit connection outside the pool, held for the thread's lifetime.
+        cargs, cparams = engine.dialect.create_connect_args(engine.url)
+        conn = engine.dialect.loaded_dbapi.connect(*cargs, **cparams)
+        conn.autocommit = True
+        return conn
+
+    def _ensure_notifier(self):
+        with self._lock:
+            if self._notifier is None or not self._notifier.is_alive():
+                self._notifier = threading.Thread(target=self._notify, name="progress-notifier", daemon=True)
+                self._notifier.start()
+
+    def _notify(self):
+        conn = None
+        try:
+            while True:
+                payload = self._outbox.get()
+                if payload is None:
+                    return
+                try:
+                    if conn is None:
+                        conn = self._connect()
+                    conn.cursor().execute("SELECT pg_notify(%s, %s)", (NOTIFY_CHANNEL, payload))
+                except Exception as e:
+                    logger.warning("Could not publish progress: %s", e)
+                    if conn is not None:
+                        conn.close()
+                        conn = None
+        finally:
+            if conn is not None:
+                conn.close()
+
+    def _ensure_listener(self):
+        if not self._notify_enabled():
+            return
+        with self._lock:
+            if self._listener is None or not self._listener.is_alive():
+                self._stop.clear()
+                self._listener = threading.Thread(target=self._listen, name="progress-listener", daemon=True)
+                self._listener.start()
+
+    def _listen(self):
+        while not self._stop.is_set():
+            conn = None
+            try:
+                conn = self._connect()
+                conn.cursor().execute(f"LISTEN {NOTIFY_CHANNEL}")
+                while not self._stop.is_set():
+                    if select.select([conn], [], [], 1.0) == ([], [], []):
+                        continue
+                    conn.poll()
+                    while conn.notifies:
+                        message = orjson.loads(conn.notifies.pop(0).payload)
+                        if message.get("origin") != ORIGIN:
+                            self._deliver(message["channel"], message["event"])
+            except Exception as e:
+                logger.warning("Progress listener connection failed, retrying: %s", e)
+                self._stop.wait(5.0)
+            finally:
+                if conn is not None:
+                    conn.close()
+
+    def close(self, timeout: float = 5.0):
+        """Stop listening and send the notifications still queued, waiting at most ``timeout`` seconds."""
+        self._stop.set()
+        notifier = self._notifier
+        if notifier is not None and notifier.is_alive():
+            try:
+                self._outbox.put(None, timeout=timeout)
+                notifier.join(timeout)
+            except queue.Full:
+                logger.warning("Dropped %d queued progress notifications at shutdown", self._outbox.qsize())
+
+
+progress_broker = ProgressBroker()
+
+
+class ProgressReporter:
+    """Publishes one operation's progress; updates within a phase are throttled to ``min_interval``.
+    With no channel every call is a no-op, so callers need not check."""
+
+    def __init__(self, channel: Optional[str], broker: ProgressBroker = progress_broker, min_interval: float = 0.25):
+        self.channel = channel
+        self.broker = broker
+        self.min_interval = min_interval
+        self._started = monotonic()
+        self._phase = None
+        self._phase_started = self._published = 0.0
+        self.processed = 0
+        self.total = None
+
+    def phase(self, name: str, total: Optional[int] = None):
+        self._phase = name
+        self._phase_started = monotonic()
+        self.processed = 0
+        self.total = total
+        self._publish()
+
+    def advance(self, n: int = 1):
+        self.processed += n
+        if self.channel is None:
+            return
+        if monotonic() - self._published >= self.min_interval or self.processed == self.total:
+            self._publish()
+
+    def done(self, **result):
+        self._phase = "done"
+        self._publish(result=result)
+
+    def failed(self, error: str):
+        self._phase = "failed"
+        self._publish(error=error)
+
+    def _publish(self, **extra):
+        if self.channel is None:
+            return
+        now = monotonic()
+        self._published = now
+        elapsed = now - self._phase_started
+        rate = self.processed / elapsed if elapsed > 0 else None
+        remaining = self.total - self.processed if self.total is not None else None
+        self.broker.publish(self.channel, {
+            "phase": self._phase,
+            "processed": self.processed,
+            "total": self.total,
+            "rate": round(rate, 2) if rate else None,
+            "eta_seconds": round(remaining / rate, 2) if rate and remaining is not None else None,
+            "elapsed_seconds": round(now - self._started, 3),
+            "timestamp": time(),
+            **extra,
+        })
@@ -0,0 +1,26 @@
+import json
+import os
+from functools import lru_cache
+
+QUESTIONNAIRE_PATH = os.path.abspath(os.path.join(os.path.dirname(__file__), "../data/questionnaire_v18.json"))
+
+@lru_cache()
+def load_questionnaire() -> dict:
+    """Parsed questionnaire, read once per process. Treat the result as read-only."""
+    with open(QUESTIONNAIRE_PATH, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+@lru_cache()
+def capability_components() -> dict:
+    """capability_type -> data component ids mapped by its questions."""
+    components = {}
+    for section in load_questionnaire()["sections"]:
+        for q in section["questions"]:
+            found = components.setdefault(q["capability_type"], [])
+            found.extend(c for c in q.get("data_components_mapped", []) if c not in found)
+    return {capability: tuple(ids) for capability, ids in components.items()}
+
+@lru_cache()
+def question_capability_types() -> dict:
+    """question_id -> capability_type for every question in the questionnaire."""
+    return {q["question_id"]: q["capability_type"] for s in load_questionnaire()["sections"] for q in s["questions"]}
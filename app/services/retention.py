@@ -0,0 +1,144 @@
+"""Retention of per-assessment detail for archived assessments.
+
+An archived assessment keeps its assessments row (name, dates, coverage
+percentage). Once it has been archived for RETENTION_ARCHIVED_DAYS (counted
+from archived_at), its technique_coverage and questionnaire_responses rows
+are removed, and anything it still contributes to the industry benchmark is
+withdrawn. Both tables are hash-partitioned on
+assessment_id, so archived rows are mixed with live rows in every partition
+and cannot be removed by dropping a whole partition. Each partition is
+handled on its own instead. If only a few of its rows are archived, they are
+deleted in batches and autovacuum then has one partition to clean. If at
+least RETENTION_REWRITE_FRACTION of its rows are archived, the partition is
+truncated and reloaded with its live rows. This leaves no dead tuples and no
+index bloat behind. Only that partition is unavailable while it is reloaded,
+and if its lock is not granted within REWRITE_LOCK_TIMEOUT the rows are
+deleted instead.
+"""
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import Session
+from app.config import get_settings
+from app.models.assessment import Assessment
+from app.services.benchmarking import BenchmarkAggregator
+from app.utils.logger import get_logger
+
+logger = get_logger("retention")
+
+ARCHIVED_STATUS = "archived"
+DETAIL_TABLES = ("technique_coverage", "questionnaire_responses")
+DELETE_BATCH = 200
+REWRITE_LOCK_TIMEOUT = "5s"
+
+
+def archived_assessments(db: Session, older_than: datetime, tenant_id: Optional[int] = None) -> List[int]:
+    query = db.query(Assessment.id).filter(Assessment.status == ARCHIVED_STATUS, Assessment.archived_at < older_than)
+    if tenant_id is not None:
+        query = query.filter(Assessment.tenant_id == tenant_id)
+    return [assessment_id for (assessment_id,) in query]
+
+
+def partitions(db: Session, table: str) -> List[Tuple[str, float]]:
+    """(partition, estimated rows) per partition; a plain table is its own single partition."""
+    rows = db.execute(text("""
+        SELECT c.oid::regclass::text, c.reltuples
+        FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid
+        WHERE i.inhparent = CAST(:table AS regclass)
+        ORDER BY 1
+    """), {"table": table}).all()
+    return [tuple(row) for row in rows] or [(table, -1.0)]
+
+
+def _archived_rows(db: Session, table: str, ids: List[int]) -> Dict[str, int]:
+    return dict(db.execute(text(
+        f"SELECT tableoid::regclass::text, count(*) FROM {table} WHERE assessment_id = ANY(:ids) GROUP BY 1"
+    ), {"ids": ids}).all())
+
+
+def delete_rows(db: Session, partition: str, ids: List[int]) -> int:
+    """Delete in short transactions so neither locks nor WAL pile up."""
+    deleted = 0
+    for start in range(0, len(ids), DELETE_BATCH):
+        deleted += db.execute(text(f"DELETE FROM {partition} WHERE assessment_id = ANY(:ids)"),
+                              {"ids": ids[start:start + DELETE_BATCH]}).rowcount
+        db.commit()
+    return deleted
+
+
+def rewrite_partition(db: Session, partition: str, ids: List[int]) -> int:
+    """Reload a partition with only the rows not in ``ids``; returns the rows kept.
+
+    TRUNCATE gives the partition new, compact heap and index files. Only the partition is locked;
+    queries that prune to other partitions carry on, and DETACH's lock on the parent is avoided."""
+    db.execute(text(f"SET LOCAL lock_timeout = '{REWRITE_LOCK_TIMEOUT}'"))
+    db.execute(text(f"LOCK TABLE {partition} IN ACCESS EXCLUSIVE MODE"))
+    kept = db.execute(text(
+        f"CREATE TEMPORARY TABLE retention_kept ON COMMIT DROP AS "
+        f"SELECT * FROM {partition} WHERE assessment_id <> ALL(:ids)"), {"ids": ids}).rowcount
+    db.execute(text(f"TRUNCATE {partition}"))
+    db.execute(text(f"INSERT INTO {partition} SELECT * FROM retention_kept"))
+    db.commit()
+    db.execute(text(f"ANALYZE {partition}"))
+    db.commit()
+    return kept
+
+
+def purge_table(db: Session, table: str, ids: List[int], rewrite_fraction: float, dry_run: bool = False) -> dict:
+    archived = _archived_rows(db, table, ids) if ids else {}
+    db.commit()
+    report = {"rows_removed": 0, "partitions_deleted_from": 0, "partitions_rewritten": 0}
+    for partition, estimate in partitions(db, table):
+        rows = archived.get(partition, 0)
+        if not rows:
+            continue
+        if estimate < 0:
+            estimate = db.execute(text(f"SELECT count(*) FROM {partition}")).scalar()
+        # Never rewrite a table that is not partitioned (not yet migrated): that would lock all of it.
+        rewrite = partition != table and rows >= rewrite_fraction * max(estimate, rows)
+        report["rows_removed"] += rows
+        if dry_run:
+            report["partitions_rewritten" if rewrite else "partitions_deleted_from"] += 1
+            continue
+        if rewrite:
+            try:
+                kept = rewrite_partition(db, partition, ids)
+                logger.info("Rewrote %s without %d archived rows (%d kept)", partition, rows, kept)
+                report["partitions_rewritten"] += 1
+                continue
+            except OperationalError as e:
+                db.rollback()
+                logger.warning("Could not lock %s for a rewrite, deleting instead: %s", partition, e)
+        delete_rows(db, partition, ids)
+        report["partitions_deleted_from"] += 1
+    return report
+
+
+def withdraw_benchmarks(db: Session, ids: List[int], dry_run: bool = False) -> int:
+    """Take assessments that still hold a benchmark contribution out of the industry aggregates."""
+    withdrawn = 0
+    for start in range(0, len(ids), DELETE_BATCH):
+        assessments = db.query(Assessment).filter(Assessment.id.in_(ids[start:start + DELETE_BATCH]),
+                                                  Assessment.benchmark_industry.isnot(None)).all()
+        withdrawn += len(assessments)
+        if dry_run:
+            continue
+        aggregator = BenchmarkAggregator(db)
+        for assessment in assessments:
+            aggregator.withdraw(assessment)
+        db.commit()
+    return withdrawn
+
+
+def purge_archived(db: Session, older_than_days: Optional[float] = None, tenant_id: Optional[int] = None,
+                   dry_run: bool = False) -> dict:
+    """Remove detail rows of assessments archived more than ``older_than_days`` ago, optionally for one tenant."""
+    settings = get_settings()
+    days = settings.RETENTION_ARCHIVED_DAYS if older_than_days is None else older_than_days
+    ids = archived_assessments(db, datetime.utcnow() - timedelta(days=days), tenant_id)
+    report = {"assessments": len(ids), "dry_run": dry_run}
+    report["benchmark_withdrawn"] = withdraw_benchmarks(db, ids, dry_run)
+    for table in DETAIL_TABLES:
+        report[table] = purge_table(db, table, ids, settings.RETENTION_REWRITE_FRACTION, dry_run)
+    return report
@@ -0,0 +1,238 @@
+"""Streaming ingestion of a tenant's Sigma rule inventory.
+
+Uploads are read one rule at a time: a tar archive is consumed as a stream
+(``r|*``), a zip is read member by member, NDJSON line by line and a bare
+YAML file document by document, so memory stays bounded by the largest rule.
+``attack.tNNNN[.NNN]`` tags resolve to catalog techniques and the rule's
+logsource resolves to data components through lookup tables built once from
+the questionnaire's capability types. Rules are upserted per assessment in
+batches; AssessmentEngine reads them back as analytic evidence.
+"""
+import io
+import json
+import os
+import re
+import tarfile
+import uuid
+import zipfile
+from functools import lru_cache
+from typing import Dict, Iterator, List, Optional, Tuple
+import yaml
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+from app.models.assessment import DetectionRule
+from app.services.assessment_engine import CLOUD_PLATFORMS
+from app.services.catalog import Catalog
+from app.services.questionnaire_catalog import capability_components
+
+BATCH_SIZE = 1000
+MAX_RULE_BYTES = 1 << 20
+MAX_ERRORS = 20
+RULE_SUFFIXES = (".yml", ".yaml")
+_SafeLoader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+_ATTACK_TAG = re.compile(r"^attack\.(t\d{4}(?:\.\d{3})?)$", re.IGNORECASE)
+
+# Sigma logsource -> questionnaire capability types; resolved to component ids in logsource_tables().
+SIGMA_CATEGORIES = {
+    "process_creation": ("process_monitoring", "command_line_monitoring"),
+    "process_access": ("process_monitoring",),
+    "process_termination": ("process_monitoring",),
+    "create_remote_thread": ("process_monitoring",),
+    "file_event": ("file_monitoring",), "file_change": ("file_monitoring",), "file_delete": ("file_monitoring",),
+    "file_rename": ("file_monitoring",), "file_access": ("file_monitoring",), "create_stream_hash": ("file_monitoring",),
+    "registry_event": ("registry_monitoring",), "registry_add": ("registry_monitoring",),
+    "registry_set": ("registry_monitoring",), "registry_delete": ("registry_monitoring",),
+    "registry_rename": ("registry_monitoring",),
+    "image_load": ("dll_monitoring",),
+    "driver_load": ("driver_monitoring",),
+    "wmi_event": ("wmi_monitoring",),
+    "ps_script": ("powershell_monitoring",), "ps_module": ("powershell_monitoring",),
+    "ps_classic_start": ("powershell_monitoring",), "ps_classic_provider_start": ("powershell_monitoring",),
+    "dns_query": ("dns_monitoring",), "dns": ("dns_monitoring",),
+    "network_connection": ("network_connection_monitoring",), "firewall": ("network_connection_monitoring",),
+    "proxy": ("web_proxy_monitoring",), "webserver": ("web_proxy_monitoring",),
+}
+SIGMA_SERVICES = {
+    "security": ("authentication_monitoring",), "system": ("service_monitoring",),
+    "taskscheduler": ("scheduled_task_monitoring",), "wmi": ("wmi_monitoring",),
+    "powershell": ("powershell_monitoring",), "powershell-classic": ("powershell_monitoring",),
+    "sysmon": ("process_monitoring",), "auditd": ("process_monitoring",),
+    "auth": ("authentication_monitoring",), "sshd": ("authentication_monitoring",),
+    "sudo": ("privileged_account_monitoring",), "signinlogs": ("authentication_monitoring",),
+    "dns-server": ("dns_monitoring",),
+    "cloudtrail": ("cloud_api_monitoring",), "activitylogs": ("cloud_api_monitoring",),
+    "auditlogs": ("cloud_api_monitoring",), "gcp.audit": ("cloud_api_monitoring",),
+    "s3": ("cloud_storage_monitoring",),
+}
+SIGMA_PRODUCTS = {"windows": ("Windows",), "linux": ("Linux",), "macos": ("macOS",)}
+
+
+@lru_cache()
+def logsource_tables() -> Tuple[Dict[str, tuple], Dict[str, tuple]]:
+    """(category -> component ids, service -> component ids)."""
+    by_capability = capability_components()
+
+    def resolve(table):
+        return {key: tuple(dict.fromkeys(c for cap in caps for c in by_capability.get(cap, ())))
+                for key, caps in table.items()}
+    return resolve(SIGMA_CATEGORIES), resolve(SIGMA_SERVICES)
+
+
+def logsource_components(logsource: dict) -> List[str]:
+    categories, services = logsource_tables()
+    found = categories.get(str(logsource.get("category") or "").lower(), ()) + \
+        services.get(str(logsource.get("service") or "").lower(), ())
+    return list(dict.fromkeys(found))
+
+
+def logsource_platforms(logsource: dict) -> List[str]:
+    product = str(logsource.get("product") or "").lower()
+    return list(SIGMA_PRODUCTS.get(product) or CLOUD_PLATFORMS.get(product, ()))
+
+
+def rule_techniques(catalog: Catalog, tags) -> List[str]:
+    """Catalog technique ids for a rule's ``attack.t*`` tags; unknown sub-techniques fall back to their parent."""
+    position = catalog.index("technique_ids")
+    found = []
+    for tag in tags or ():
+        match = _ATTACK_TAG.match(str(tag))
+        if not match:
+            continue
+        technique_id = match.group(1).upper()
+        if technique_id not in position:
+            technique_id = technique_id.split(".")[0]
+        if technique_id in position:
+            found.append(technique_id)
+    return list(dict.fromkeys(found))
+
+
+def parse_rule(catalog: Catalog, doc: dict) -> Optional[dict]:
+    """A detection_rules row for one Sigma rule, or None when it maps to nothing."""
+    logsource = doc.get("logsource") or {}
+    if not isinstance(logsource, dict):
+        logsource = {}
+    techniques = rule_techniques(catalog, doc.get("tags"))
+    components = logsource_components(logsource)
+    if not techniques and not components:
+        return None
+    rule_id = str(doc.get("id") or uuid.uuid5(uuid.NAMESPACE_URL, json.dumps(doc, sort_keys=True, default=str)))
+    return {
+        "rule_id": rule_id[:100],
+        "title": str(doc.get("title") or "")[:500],
+        "level": str(doc["level"]).lower()[:20] if doc.get("level") else None,
+        "status": str(doc["status"]).lower()[:20] if doc.get("status") else None,
+        "technique_ids": techniques,
+        "component_ids": components,
+        "platforms": logsource_platforms(logsource),
+    }
+
+
+def _yaml_rules(stream, source: str) -> Iterator[Tuple[str, object]]:
+    # Sigma rule collections: an ``action: global`` document is merged into the ones that follow.
+    base = {}
+    for doc in yaml.load_all(stream, Loader=_SafeLoader):
+        if not isinstance(doc, dict):
+            continue
+        action = doc.pop("action", None)
+        if action == "global":
+            base = doc
+        elif action == "reset":
+            base = {}
+        else:
+            yield source, {**base, **doc}
+
+
+def iter_rule_documents(fileobj, filename: str) -> Iterator[Tuple[str, object]]:
+    """Yield (source, rule dict or Exception) for each rule in an upload, reading one member at a time."""
+    name = (filename or "").lower()
+    if name.endswith((".ndjson", ".jsonl")):
+        for n, line in enumerate(io.TextIOWrapper(fileobj, encoding="utf-8", errors="replace"), start=1):
+            if line.strip():
+                try:
+                    yield f"line {n}", json.loads(line)
+                except ValueError as e:
+                    yield f"line {n}", e
+    elif name.endswith(RULE_SUFFIXES):
+        try:
+            yield from _yaml_rules(fileobj, filename)
+        except yaml.YAMLError as e:
+            yield filename, e
+    elif name.endswith(".zip"):
+        with zipfile.ZipFile(fileobj) as archive:
+            for info in archive.infolist():
+                if info.is_dir() or not info.filename.lower().endswith(RULE_SUFFIXES):
+                    continue
+                if info.file_size > MAX_RULE_BYTES:
+                    yield info.filename, ValueError("rule file too large")
+                    continue
+                try:
+                    yield from _yaml_rules(archive.read(info), info.filename)
+                except yaml.YAMLError as e:
+                    yield info.filename, e
+    elif name.endswith((".tar", ".tar.gz", ".tgz", ".tar.bz2", ".tar.xz")):
+        with tarfile.open(fileobj=fileobj, mode="r|*") as archive:
+            for member in archive:
+                if not member.isfile() or not member.name.lower().endswith(RULE_SUFFIXES):
+                    continue
+                if member.size > MAX_RULE_BYTES:
+                    yield member.name, ValueError("rule file too large")
+                    continue
+                try:
+                    yield from _yaml_rules(archive.extractfile(member).read(), member.name)
+                except yaml.YAMLError as e:
+                    yield member.name, e
+    else:
+        raise ValueError(f"Unsupported rule upload '{os.path.basename(filename or '')}': "
+                         "expected .yml, .yaml, .ndjson, .jsonl, .zip or a tar archive")
+
+
+def _flush(db: Session, assessment_id: int, batch: Dict[str, dict]):
+    if not batch:
+        return
+    stmt = insert(DetectionRule)
+    db.execute(stmt.on_conflict_do_update(
+        constraint="uq_detection_rule_assessment_rule",
+        set_={c: stmt.excluded[c] for c in ("title", "level", "status", "technique_ids", "component_ids", "platforms")},
+    ), [{"assessment_id": assessment_id, **row} for row in batch.values()])
+    batch.clear()
+
+
+def ingest_rules(db: Session, catalog: Catalog, assessment_id: int, fileobj, filename: str,
+                 replace: bool = True) -> dict:
+    """Parse and store an upload in one transaction; ``replace`` drops the assessment's previous rules first."""
+    if replace:
+        db.query(DetectionRule).filter(DetectionRule.assessment_id == assessment_id).delete(synchronize_session=False)
+    parsed = unmapped = 0
+    errors: List[str] = []
+    rule_ids, techniques, components = set(), set(), set()
+    batch: Dict[str, dict] = {}
+    try:
+        for source, doc in iter_rule_documents(fileobj, filename):
+            if isinstance(doc, Exception):
+                if len(errors) < MAX_ERRORS:
+                    errors.append(f"{source}: {doc}")
+                continue
+            parsed += 1
+            row = parse_rule(catalog, doc) if isinstance(doc, dict) else None
+            if row is None:
+                unmapped += 1
+                continue
+            techniques.update(row["technique_ids"])
+            components.update(row["component_ids"])
+            batch[row["rule_id"]] = row
+            rule_ids.add(row["rule_id"])
+            if len(batch) >= BATCH_SIZE:
+                _flush(db, assessment_id, batch)
+        _flush(db, assessment_id, batch)
+    except (tarfile.TarError, zipfile.BadZipFile, EOFError, OSError) as e:
+        db.rollback()
+        raise ValueError(f"Could not read rule archive: {e}") from e
+    db.commit()
+    return {
+        "rules_parsed": parsed,
+        "rules_stored": len(rule_ids),
+        "rules_unmapped": unmapped,
+        "techniques_covered": len(techniques),
+        "components_observed": sorted(components),
+        "errors": errors,
+    }
@@ -0,0 +1,85 @@
+"""Coordination for recomputations that must not run twice at once.
+
+``SingleFlight`` coalesces concurrent callers inside one worker: the first
+caller for a key runs the work, and later callers block until it finishes,
+then share its result or exception. ``advisory_lock`` extends mutual exclusion
+across workers and pods through a transaction-scoped Postgres advisory lock,
+which is released when the holder commits or rolls back. On other databases
+it falls back to an in-process lock. The caller learns whether it had to
+wait, and if so it can reuse what the previous holder committed.
+"""
+import threading
+import zlib
+from concurrent.futures import Future
+from contextlib import contextmanager
+from time import monotonic, sleep
+from typing import Callable, Dict, Hashable
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+POLL_SECONDS = 0.05
+
+
+class LockTimeout(RuntimeError):
+    pass
+
+
+class SingleFlight:
+    def __init__(self):
+        self._calls: Dict[Hashable, Future] = {}
+        self._lock = threading.Lock()
+
+    def do(self, key: Hashable, fn: Callable):
+        """Run ``fn`` unless a call for ``key`` is already in flight; returns (result, shared)."""
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = Future()
+        if not leader:
+            return call.result(), True
+        try:
+            result = fn()
+        except BaseException as e:
+            call.set_exception(e)
+            raise
+        else:
+            call.set_result(result)
+            return result, False
+        finally:
+            with self._lock:
+                del self._calls[key]
+
+
+_local_locks: Dict[tuple, threading.Lock] = {}
+_local_locks_guard = threading.Lock()
+
+
+def _namespace(name: str) -> int:
+    return zlib.crc32(name.encode("utf-8")) & 0x7FFFFFFF
+
+
+@contextmanager
+def advisory_lock(db: Session, name: str, key: int, timeout: float):
+    """Hold the (name, key) lock for the rest of ``db``'s transaction; yields True if another holder
+    had to be waited for. Raises LockTimeout after ``timeout`` seconds."""
+    deadline = monotonic() + timeout
+    if db.get_bind().dialect.name == "postgresql":
+        namespace = _namespace(name)
+        contended = False
+        while not db.execute(select(func.pg_try_advisory_xact_lock(namespace, key))).scalar():
+            contended = True
+            if monotonic() >= deadline:
+                raise LockTimeout(f"{name} {key} is locked by another worker")
+            sleep(POLL_SECONDS)
+        yield contended
+        return
+    with _local_locks_guard:
+        lock = _local_locks.setdefault((name, key), threading.Lock())
+    contended = not lock.acquire(blocking=False)
+    if contended and not lock.acquire(timeout=timeout):
+        raise LockTimeout(f"{name} {key} is locked")
+    try:
+        yield contended
+    finally:
+        lock.release()
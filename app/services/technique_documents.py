@@ -0,0 +1,151 @@
+"""Denormalized technique detail documents.
+
+A detail view needs the technique, its sub-techniques, detection strategies,
+their analytics and the data components those analytics require. At sync
+time ``sync_technique_documents`` assembles all of them in five table scans
+and stores one orjson-encoded document per technique. Requests are served
+from a per-worker LRU of those bytes, so they are never re-encoded. The LRU is
+cleared whenever a new catalog version is mapped, which happens after every sync.
+"""
+import hashlib
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+import orjson
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+from app.config import get_settings
+from app.models.attack_data import Analytic, DataComponent, DetectionStrategy, SubTechnique, Technique, TechniqueDocument
+from app.services.catalog import on_catalog_change
+
+
+def build_documents(db: Session) -> Dict[str, dict]:
+    components = {
+        c.component_id: {"component_id": c.component_id, "name": c.name, "description": c.description,
+                         "data_source_name": c.data_source_name, "log_source_type": c.log_source_type}
+        for c in db.query(DataComponent.component_id, DataComponent.name, DataComponent.description,
+                          DataComponent.data_source_name, DataComponent.log_source_type)
+    }
+    analytics: Dict[str, List[dict]] = {}
+    for a in db.query(Analytic.analytic_id, Analytic.strategy_id, Analytic.name, Analytic.description,
+                      Analytic.detection_logic, Analytic.platform, Analytic.data_components_required,
+                      Analytic.tunable_parameters).order_by(Analytic.analytic_id):
+        analytics.setdefault(a.strategy_id, []).append({
+            "analytic_id": a.analytic_id, "name": a.name, "description": a.description,
+            "detection_logic": a.detection_logic, "platform": a.platform,
+            "data_components_required": a.data_components_required or [],
+            "tunable_parameters": a.tunable_parameters,
+        })
+    strategies: Dict[str, List[dict]] = {}
+    for s in db.query(DetectionStrategy.strategy_id, DetectionStrategy.technique_id, DetectionStrategy.sub_technique_id,
+                      DetectionStrategy.name, DetectionStrategy.description, DetectionStrategy.behavior_to_detect)\
+            .order_by(DetectionStrategy.strategy_id):
+        strategies.setdefault(s.sub_technique_id or s.technique_id, []).append({
+            "strategy_id": s.strategy_id, "name": s.name, "description": s.description,
+            "behavior_to_detect": s.behavior_to_detect, "analytics": analytics.get(s.strategy_id, []),
+        })
+
+    subs = db.query(SubTechnique.technique_id, SubTechnique.parent_technique_id, SubTechnique.name,
+                    SubTechnique.description, SubTechnique.platforms).order_by(SubTechnique.technique_id).all()
+    children: Dict[str, List[dict]] = {}
+    for s in subs:
+        children.setdefault(s.parent_technique_id, []).append({"technique_id": s.technique_id, "name": s.name})
+
+    def _document(technique_id: str, fields: dict) -> dict:
+        technique_strategies = strategies.get(technique_id, [])
+        required = sorted({c for s in technique_strategies for a in s["analytics"] for c in a["data_components_required"]})
+        return {
+            "technique_id": technique_id,
+            **fields,
+            "detection_strategies": technique_strategies,
+            "data_components": [components.get(c) or {"component_id": c, "name": None} for c in required],
+        }
+
+    documents = {}
+    for t in db.query(Technique.technique_id, Technique.name, Technique.description, Technique.tactics,
+                      Technique.platforms, Technique.detection_description):
+        documents[t.technique_id] = _document(t.technique_id, {
+            "name": t.name, "description": t.description, "tactics": t.tactics or [], "platforms": t.platforms or [],
+            "detection_description": t.detection_description, "parent_technique_id": None,
+            "sub_techniques": children.get(t.technique_id, []),
+        })
+    tactics = {tid: doc["tactics"] for tid, doc in documents.items()}
+    for s in subs:
+        documents[s.technique_id] = _document(s.technique_id, {
+            "name": s.name, "description": s.description, "tactics": tactics.get(s.parent_technique_id, []),
+            "platforms": s.platforms or [], "detection_description": None,
+            "parent_technique_id": s.parent_technique_id, "sub_techniques": [],
+        })
+    return documents
+
+
+def _etag(body: bytes) -> str:
+    return hashlib.blake2b(body, digest_size=16).hexdigest()
+
+
+def sync_technique_documents(db: Session) -> Dict[str, int]:
+    """Rebuild every document, writing only the ones whose bytes changed."""
+    existing = dict(db.query(TechniqueDocument.technique_id, TechniqueDocument.etag))
+    now = datetime.utcnow()
+    changed = []
+    documents = build_documents(db)
+    for technique_id, document in documents.items():
+        body = orjson.dumps(document)
+        etag = _etag(body)
+        if existing.get(technique_id) != etag:
+            changed.append({"technique_id": technique_id, "body": body, "etag": etag, "updated_at": now})
+    if changed:
+        stmt = insert(TechniqueDocument)
+        db.execute(stmt.on_conflict_do_update(
+            index_elements=[TechniqueDocument.technique_id],
+            set_={"body": stmt.excluded.body, "etag": stmt.excluded.etag, "updated_at": stmt.excluded.updated_at},
+        ), changed)
+    removed = set(existing) - set(documents)
+    if removed:
+        db.query(TechniqueDocument).filter(TechniqueDocument.technique_id.in_(removed)).delete(synchronize_session=False)
+    db.commit()
+    return {"documents": len(documents), "changed": len(changed), "removed": len(removed)}
+
+
+class DocumentCache:
+    """LRU of technique_id -> (etag, encoded document) per worker."""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[str, bytes]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def clear(self, *_):
+        with self._lock:
+            self._entries.clear()
+
+    def get_many(self, db: Session, technique_ids: Iterable[str]) -> Dict[str, Tuple[str, bytes]]:
+        """Cached documents for the ids that exist; misses are loaded in one query."""
+        wanted = list(dict.fromkeys(technique_ids))
+        found: Dict[str, Tuple[str, bytes]] = {}
+        with self._lock:
+            for technique_id in wanted:
+                entry = self._entries.get(technique_id)
+                if entry is not None:
+                    self._entries.move_to_end(technique_id)
+                    found[technique_id] = entry
+        missing = [t for t in wanted if t not in found]
+        if missing:
+            rows = db.query(TechniqueDocument.technique_id, TechniqueDocument.etag, TechniqueDocument.body)\
+                .filter(TechniqueDocument.technique_id.in_(missing)).all()
+            with self._lock:
+                for technique_id, etag, body in rows:
+                    entry = found[technique_id] = (etag, bytes(body))
+                    self._entries[technique_id] = entry
+                    self._entries.move_to_end(technique_id)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+        return found
+
+    def get(self, db: Session, technique_id: str) -> Optional[Tuple[str, bytes]]:
+        return self.get_many(db, [technique_id]).get(technique_id)
+
+
+document_cache = DocumentCache(get_settings().TECHNIQUE_DOCUMENT_CACHE_SIZE)
+on_catalog_change(document_cache.clear)
@@ -0,0 +1,151 @@
+"""In-memory BM25 keyword search over the compiled ATT&CK catalog.
+
+Each technique and sub-technique is a document made of its ID and name,
+tactics, data-component names and description, with name/ID and tactic
+tokens weighted up. The index is rebuilt when a new catalog version is
+mapped. Tokenized documents are cached by content hash, so a rebuild after a
+sync only re-tokenizes the techniques whose text changed.
+"""
+import hashlib
+import math
+import re
+import threading
+from bisect import bisect_left
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+from app.services.catalog import Catalog, get_catalog, on_catalog_change
+from app.utils.logger import get_logger
+
+logger = get_logger("technique_search")
+
+K1 = 1.2
+B = 0.75
+MAX_PREFIX_EXPANSIONS = 64
+FIELD_WEIGHTS = {"id": 3, "name": 3, "tactics": 2, "components": 1, "description": 1}
+_TOKEN = re.compile(r"t\d{4}(?:\.\d{3})?|[a-z0-9]+")
+_STOPWORDS = frozenset("a an and are as at be by for from has have in is it its of on or that the to was with".split())
+
+
+def tokenize(text: str) -> List[str]:
+    return [t for t in _TOKEN.findall((text or "").lower()) if t not in _STOPWORDS]
+
+
+def _document_fields(catalog: Catalog, i: int, tactic_names, component_names) -> Dict[str, str]:
+    tactic_ptr, tactic_idx = catalog.csr("technique_tactics")
+    component_ptr, component_idx = catalog.csr("technique_components")
+    return {
+        "id": catalog.technique_ids[i],
+        "name": catalog.strings("technique_names")[i],
+        "tactics": " ".join(tactic_names[j] for j in tactic_idx[tactic_ptr[i]:tactic_ptr[i + 1]]),
+        "components": " ".join(component_names[j] for j in component_idx[component_ptr[i]:component_ptr[i + 1]]),
+        "description": catalog.strings("technique_descriptions")[i],
+    }
+
+
+class SearchIndex:
+    def __init__(self, catalog: Catalog, previous: Optional["SearchIndex"] = None):
+        self.version = catalog.version
+        self._catalog = catalog
+        n = catalog.n_techniques
+        tactic_names = list(catalog.strings("tactics"))
+        component_names = [name or cid for name, cid in zip(catalog.strings("component_names"), catalog.component_ids)]
+        cache = previous._documents if previous is not None else {}
+        self._documents: Dict[str, Tuple[bytes, Counter]] = {}
+        reused = 0
+        postings: Dict[str, Tuple[List[int], List[float]]] = {}
+        lengths = np.zeros(n, dtype=np.float32)
+        for i in range(n):
+            fields = _document_fields(catalog, i, tactic_names, component_names)
+            digest = hashlib.blake2b("\0".join(fields.values()).encode("utf-8"), digest_size=16).digest()
+            cached = cache.get(fields["id"])
+            if cached is not None and cached[0] == digest:
+                counts = cached[1]
+                reused += 1
+            else:
+                counts = Counter()
+                for field, text in fields.items():
+                    weight = FIELD_WEIGHTS[field]
+                    for token in tokenize(text):
+                        counts[token] += weight
+            self._documents[fields["id"]] = (digest, counts)
+            lengths[i] = sum(counts.values())
+            for token, tf in counts.items():
+                docs, tfs = postings.setdefault(token, ([], []))
+                docs.append(i)
+                tfs.append(tf)
+        self._postings = {t: (np.array(d, dtype=np.int32), np.array(f, dtype=np.float32)) for t, (d, f) in postings.items()}
+        self._terms = sorted(self._postings)
+        self._n = n
+        self._norm = K1 * (1 - B + B * lengths / max(float(lengths.mean()) if n else 0.0, 1.0))
+        logger.info("Built search index for catalog %s: %d documents (%d reused), %d terms",
+                    self.version, n, reused, len(self._terms))
+
+    def _expand(self, token: str) -> List[str]:
+        start = bisect_left(self._terms, token)
+        matches = []
+        for term in self._terms[start:start + MAX_PREFIX_EXPANSIONS]:
+            if not term.startswith(token):
+                break
+            matches.append(term)
+        return matches
+
+    def _term_scores(self, term: str) -> Tuple[np.ndarray, np.ndarray]:
+        docs, tf = self._postings[term]
+        idf = math.log(1 + (self._n - len(docs) + 0.5) / (len(docs) + 0.5))
+        return docs, idf * tf * (K1 + 1) / (tf + self._norm[docs])
+
+    def search(self, query: str, limit: int = 20) -> List[dict]:
+        tokens = list(dict.fromkeys(tokenize(query)))
+        if not tokens or not self._n:
+            return []
+        scores = np.zeros(self._n, dtype=np.float32)
+        matched = np.zeros(self._n, dtype=np.int32)
+        for token in tokens:
+            # Best-scoring term per query token: an exact hit, or any term it prefixes.
+            best = np.zeros(self._n, dtype=np.float32)
+            for term in self._expand(token):
+                docs, term_scores = self._term_scores(term)
+                if term != token:
+                    term_scores = term_scores * 0.8
+                np.maximum.at(best, docs, term_scores)
+            scores += best
+            matched += best > 0
+        # Documents matching more of the query outrank partial matches.
+        scores *= matched / len(tokens)
+        hits = np.flatnonzero(scores)
+        if not len(hits):
+            return []
+        top = hits[np.argsort(-scores[hits], kind="stable")[:limit]]
+        catalog = self._catalog
+        parent = catalog.parent
+        tactic_ptr, tactic_idx = catalog.csr("technique_tactics")
+        tactics = catalog.strings("tactics")
+        return [{
+            "technique_id": catalog.technique_ids[i],
+            "name": catalog.strings("technique_names")[i],
+            "parent_technique_id": catalog.technique_ids[int(parent[i])] if parent[i] >= 0 else None,
+            "tactics": [tactics[j] for j in tactic_idx[tactic_ptr[i]:tactic_ptr[i + 1]]],
+            "score": round(float(scores[i]), 4),
+        } for i in top]
+
+
+_lock = threading.Lock()
+_index: Optional[SearchIndex] = None
+
+
+def _rebuild(catalog: Catalog):
+    global _index
+    with _lock:
+        if _index is None or _index.version != catalog.version:
+            _index = SearchIndex(catalog, previous=_index)
+
+
+on_catalog_change(_rebuild)
+
+
+def get_search_index() -> SearchIndex:
+    catalog = get_catalog()
+    if _index is None or _index.version != catalog.version:
+        _rebuild(catalog)
+    return _index
@@ -0,0 +1,240 @@
+"""Data-component availability inferred from telemetry samples.
+
+A sample is a JSONL or CSV export (optionally gzipped) of Windows event log,
+Sysmon or cloud audit records. It is streamed in chunks of CHUNK_RECORDS
+records. Each record is reduced to an event signature such as
+``("sysmon", 1)`` or ``("aws", "s3.amazonaws.com")``, and the signatures are
+counted per chunk. Only the distinct signatures are then resolved to data
+components, through a table compiled once from the questionnaire's
+capability types. Per-component event counts are stored per assessment and
+AssessmentEngine treats every component seen as collected.
+"""
+import csv
+import gzip
+import io
+import os
+from collections import Counter
+from datetime import datetime
+from functools import lru_cache
+from itertools import islice
+from typing import Dict, Iterator, List, Optional, Tuple
+import orjson
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+from app.models.assessment import TelemetryEvidence
+from app.services.questionnaire_catalog import capability_components
+
+CHUNK_RECORDS = 50_000
+MAX_SIGNATURES_PER_COMPONENT = 20
+csv.field_size_limit(1 << 24)
+
+# Event signatures -> questionnaire capability types; compiled to component ids in signature_table().
+WINDOWS_EVENTS = {
+    4624: ("authentication_monitoring",), 4625: ("authentication_monitoring",),
+    4648: ("authentication_monitoring",), 4776: ("authentication_monitoring",),
+    4672: ("privileged_account_monitoring",), 4673: ("privileged_account_monitoring",),
+    4688: ("process_monitoring", "command_line_monitoring"), 4689: ("process_monitoring",),
+    4698: ("scheduled_task_monitoring",), 4699: ("scheduled_task_monitoring",), 4702: ("scheduled_task_monitoring",),
+    4697: ("service_monitoring",), 7045: ("service_monitoring",), 7036: ("service_monitoring",),
+    4720: ("account_lifecycle_monitoring",), 4722: ("account_lifecycle_monitoring",),
+    4725: ("account_lifecycle_monitoring",), 4726: ("account_lifecycle_monitoring",),
+    4738: ("account_lifecycle_monitoring",),
+    4728: ("group_membership_monitoring",), 4729: ("group_membership_monitoring",),
+    4732: ("group_membership_monitoring",), 4733: ("group_membership_monitoring",),
+    4756: ("group_membership_monitoring",),
+    4768: ("kerberos_monitoring",), 4769: ("kerberos_monitoring",), 4771: ("kerberos_monitoring",),
+    4657: ("registry_monitoring",), 4656: ("file_monitoring",), 4663: ("file_monitoring",),
+    5156: ("network_connection_monitoring",), 5157: ("network_connection_monitoring",),
+    5861: ("wmi_monitoring",), 4103: ("powershell_monitoring",), 4104: ("powershell_monitoring",),
+}
+SYSMON_EVENTS = {
+    1: ("process_monitoring", "command_line_monitoring"), 3: ("network_connection_monitoring",),
+    5: ("process_monitoring",), 6: ("driver_monitoring",), 7: ("dll_monitoring",), 8: ("process_monitoring",),
+    10: ("process_monitoring",), 11: ("file_monitoring",), 12: ("registry_monitoring",),
+    13: ("registry_monitoring",), 14: ("registry_monitoring",), 15: ("file_monitoring",),
+    19: ("wmi_monitoring",), 20: ("wmi_monitoring",), 21: ("wmi_monitoring",), 22: ("dns_monitoring",),
+    23: ("file_monitoring",), 26: ("file_monitoring",),
+}
+POWERSHELL_EVENTS = {
+    400: ("powershell_monitoring",), 800: ("powershell_monitoring",),
+    4103: ("powershell_monitoring",), 4104: ("powershell_monitoring",),
+}
+# Every cloud audit record is API telemetry; some services also prove a more specific component.
+CLOUD_SERVICES = {
+    "aws": {"s3.amazonaws.com": ("cloud_storage_monitoring",), "ec2.amazonaws.com": ("cloud_compute_monitoring",),
+            "lambda.amazonaws.com": ("cloud_compute_monitoring",),
+            "signin.amazonaws.com": ("authentication_monitoring",), "sts.amazonaws.com": ("authentication_monitoring",),
+            "iam.amazonaws.com": ("account_lifecycle_monitoring",)},
+    "gcp": {"storage.googleapis.com": ("cloud_storage_monitoring",),
+            "compute.googleapis.com": ("cloud_compute_monitoring",),
+            "iam.googleapis.com": ("account_lifecycle_monitoring",)},
+    "azure": {"microsoft.storage": ("cloud_storage_monitoring",), "microsoft.compute": ("cloud_compute_monitoring",),
+              "signinlogs": ("authentication_monitoring",)},
+}
+
+EVENT_ID_FIELDS = (("EventID",), ("event_id",), ("EventCode",), ("winlog", "event_id"), ("event", "code"),
+                   ("System", "EventID"))
+CHANNEL_FIELDS = (("Channel",), ("channel",), ("winlog", "channel"), ("LogName",), ("log_name",),
+                  ("ProviderName",), ("winlog", "provider_name"), ("System", "Channel"), ("sourcetype",), ("source",))
+
+
+@lru_cache()
+def signature_table() -> Dict[tuple, tuple]:
+    """Event signature -> data component ids; ``(provider, "*")`` is the fallback for cloud services."""
+    by_capability = capability_components()
+
+    def components(capabilities):
+        return tuple(dict.fromkeys(c for cap in capabilities for c in by_capability.get(cap, ())))
+    table = {}
+    for source, events in (("windows", WINDOWS_EVENTS), ("sysmon", SYSMON_EVENTS), ("powershell", POWERSHELL_EVENTS)):
+        for event_id, capabilities in events.items():
+            table[(source, event_id)] = components(capabilities)
+    for provider, services in CLOUD_SERVICES.items():
+        table[(provider, "*")] = components(("cloud_api_monitoring",))
+        for service, capabilities in services.items():
+            table[(provider, service)] = components(capabilities + ("cloud_api_monitoring",))
+    return table
+
+
+def _field(record: dict, paths):
+    for path in paths:
+        value = record
+        for key in path:
+            value = value.get(key) if isinstance(value, dict) else None
+        if value not in (None, ""):
+            return value
+    return None
+
+
+def event_signature(record) -> Optional[tuple]:
+    if not isinstance(record, dict):
+        return None
+    source = record.get("eventSource")
+    if source:
+        return "aws", str(source).lower()
+    payload = record.get("protoPayload")
+    if isinstance(payload, dict) and payload.get("serviceName"):
+        return "gcp", str(payload["serviceName"]).lower()
+    operation = record.get("operationName")
+    if isinstance(operation, str) and "/" in operation:
+        return "azure", operation.split("/", 1)[0].lower()
+    if str(record.get("category") or "").lower() == "signinlogs":
+        return "azure", "signinlogs"
+    event_id = _field(record, EVENT_ID_FIELDS)
+    try:
+        event_id = int(event_id)
+    except (TypeError, ValueError):
+        return None
+    channel = str(_field(record, CHANNEL_FIELDS) or "").lower()
+    if "sysmon" in channel:
+        return "sysmon", event_id
+    if "powershell" in channel:
+        return "powershell", event_id
+    return "windows", event_id
+
+
+def resolve_signature(signature: tuple) -> tuple:
+    table = signature_table()
+    found = table.get(signature)
+    if found is None and isinstance(signature[1], str):
+        found = table.get((signature[0], "*"))
+    return found or ()
+
+
+def _open_text(fileobj, filename: str) -> Tuple[io.TextIOWrapper, str]:
+    name = (filename or "").lower()
+    if name.endswith(".gz"):
+        fileobj = gzip.GzipFile(fileobj=fileobj, mode="rb")
+        name = name[:-3]
+    return io.TextIOWrapper(fileobj, encoding="utf-8", errors="replace", newline=""), name
+
+
+def iter_records(fileobj, filename: str) -> Iterator[object]:
+    """Yield one record per event (None for lines that do not parse), streaming the upload."""
+    text, name = _open_text(fileobj, filename)
+    if name.endswith((".jsonl", ".ndjson")):
+        for line in text:
+            if not line.strip():
+                continue
+            try:
+                yield orjson.loads(line)
+            except orjson.JSONDecodeError:
+                yield None
+    elif name.endswith(".csv"):
+        yield from csv.DictReader(text)
+    else:
+        raise ValueError(f"Unsupported telemetry sample '{os.path.basename(filename or '')}': "
+                         "expected .jsonl, .ndjson or .csv, optionally gzipped")
+
+
+def scan_sample(fileobj, filename: str) -> dict:
+    """Per-component event counts and matched signatures for one sample."""
+    records = iter_records(fileobj, filename)
+    signatures: Counter = Counter()
+    read = chunks = 0
+    while True:
+        chunk = list(islice(records, CHUNK_RECORDS))
+        if not chunk:
+            break
+        chunks += 1
+        read += len(chunk)
+        signatures.update(map(event_signature, chunk))
+    unreadable = signatures.pop(None, 0)
+    counts: Counter = Counter()
+    matched: Dict[str, List[str]] = {}
+    unmatched: Counter = Counter()
+    for signature, n in signatures.items():
+        components = resolve_signature(signature)
+        if not components:
+            unmatched[f"{signature[0]}:{signature[1]}"] += n
+        for component_id in components:
+            counts[component_id] += n
+            matched.setdefault(component_id, []).append(f"{signature[0]}:{signature[1]}")
+    return {
+        "events_read": read,
+        "events_matched": read - unreadable - sum(unmatched.values()),
+        "events_unrecognized": unreadable,
+        "chunks": chunks,
+        "counts": counts,
+        "signatures": matched,
+        "unmatched": unmatched,
+    }
+
+
+def ingest_telemetry(db: Session, assessment_id: int, fileobj, filename: str, replace: bool = False) -> dict:
+    """Scan a sample and add its counts to the assessment's evidence (or replace it)."""
+    try:
+        scan = scan_sample(fileobj, filename)
+    except (OSError, EOFError, csv.Error) as e:
+        raise ValueError(f"Could not read telemetry sample: {e}") from e
+    existing = {} if replace else dict(
+        db.query(TelemetryEvidence.component_id, TelemetryEvidence.signatures)
+        .filter(TelemetryEvidence.assessment_id == assessment_id))
+    if replace:
+        db.query(TelemetryEvidence).filter(TelemetryEvidence.assessment_id == assessment_id)\
+            .delete(synchronize_session=False)
+    now = datetime.utcnow()
+    rows = [{
+        "assessment_id": assessment_id,
+        "component_id": component_id,
+        "event_count": count,
+        "signatures": sorted(set(existing.get(component_id) or ()) | set(scan["signatures"][component_id]))
+        [:MAX_SIGNATURES_PER_COMPONENT],
+        "updated_at": now,
+    } for component_id, count in scan["counts"].items()]
+    if rows:
+        stmt = insert(TelemetryEvidence)
+        db.execute(stmt.on_conflict_do_update(
+            constraint="uq_telemetry_assessment_component",
+            set_={"event_count": TelemetryEvidence.event_count + stmt.excluded.event_count,
+                  "signatures": stmt.excluded.signatures, "updated_at": stmt.excluded.updated_at},
+        ), rows)
+    db.commit()
+    return {
+        "events_read": scan["events_read"],
+        "events_matched": scan["events_matched"],
+        "events_unrecognized": scan["events_unrecognized"],
+        "chunks": scan["chunks"],
+        "components_observed": dict(sorted(scan["counts"].items())),
+        "unmatched_signatures": dict(scan["unmatched"].most_common(10)),
+    }
@@ -0,0 +1,100 @@
+"""Assessment exposure to every known threat group.
+
+The compiled catalog stores a group x technique incidence matrix (CSR). Ranking
+all groups is one sparse matrix-vector product of that matrix with the
+assessment's uncovered-weight vector, done as a bincount over the CSR rows.
+"""
+from typing import Dict, List
+import numpy as np
+from sqlalchemy.orm import Session
+from app.models.assessment import CoverageStatus, TechniqueCoverage
+from app.services.catalog import Catalog
+
+# Groups known to target the tenant's industry count this much more.
+INDUSTRY_BOOST = 1.0
+MAX_RISK = 5.0
+# ATT&CK has no structured victimology; target industries are inferred from group descriptions.
+INDUSTRY_KEYWORDS: Dict[str, tuple] = {
+    "Financial Services": ("financial", "bank", "banking", "finance", "insurance", "cryptocurrency"),
+    "Healthcare": ("healthcare", "health care", "hospital", "medical", "pharmaceutical"),
+    "Government": ("government", "ministry", "ministries", "diplomatic", "embass", "military", "defense"),
+    "Energy": ("energy", "oil and gas", "utilities", "electric", "nuclear", "petroleum"),
+    "Manufacturing": ("manufacturing", "industrial", "automotive", "aerospace"),
+    "Information Technology": ("technology", "telecommunication", "software", "it services", "managed service"),
+    "Retail": ("retail", "hospitality", "point-of-sale", "e-commerce"),
+    "Education": ("education", "universit", "academic", "research institute"),
+}
+
+
+def infer_target_industries(description: str) -> List[str]:
+    text = (description or "").lower()
+    return [industry for industry, keywords in INDUSTRY_KEYWORDS.items() if any(k in text for k in keywords)]
+
+
+def normalize_industry(industry: str) -> str:
+    """Map a tenant's free-text industry ("Banking", "finance") onto an INDUSTRY_KEYWORDS label."""
+    for label in INDUSTRY_KEYWORDS:
+        if (industry or "").strip().lower() == label.lower():
+            return label
+    inferred = infer_target_industries(industry)
+    return inferred[0] if inferred else industry
+
+
+def _coverage_vectors(db: Session, catalog: Catalog, assessment_id: int):
+    """Uncovered share and risk per catalog technique from the stored coverage rows."""
+    n = catalog.n_techniques
+    uncovered = np.ones(n)
+    risk = np.full(n, MAX_RISK)
+    applicable = np.ones(n, dtype=bool)
+    position = catalog.index("technique_ids")
+    rows = db.query(TechniqueCoverage.technique_id, TechniqueCoverage.confidence_score,
+                    TechniqueCoverage.risk_score, TechniqueCoverage.coverage_status)\
+        .filter(TechniqueCoverage.assessment_id == assessment_id)
+    for technique_id, confidence, risk_score, status in rows:
+        i = position.get(technique_id)
+        if i is None:
+            continue
+        uncovered[i] = 1.0 - min(confidence or 0.0, 1.0)
+        risk[i] = risk_score or 0.0
+        applicable[i] = status != CoverageStatus.NOT_APPLICABLE
+    return uncovered, risk, applicable
+
+
+def group_exposure(db: Session, catalog: Catalog, assessment_id: int, industry: str, limit: int = 50) -> List[dict]:
+    indptr, indices = catalog.csr("group_techniques")
+    n_groups = len(indptr) - 1
+    if not n_groups:
+        return []
+    uncovered, risk, applicable = _coverage_vectors(db, catalog, assessment_id)
+    rows = np.repeat(np.arange(n_groups), np.diff(indptr))
+    in_scope = applicable[indices]
+    # Sparse matrix-vector products over the group x technique CSR.
+    used = np.bincount(rows, weights=in_scope, minlength=n_groups)
+    uncovered_sum = np.bincount(rows, weights=uncovered[indices] * in_scope, minlength=n_groups)
+    risk_sum = np.bincount(rows, weights=(risk * uncovered)[indices] * in_scope, minlength=n_groups)
+    fraction = np.divide(uncovered_sum, used, out=np.zeros(n_groups), where=used > 0)
+    risk_weighted = np.divide(risk_sum, used * MAX_RISK, out=np.zeros(n_groups), where=used > 0)
+
+    industries = list(catalog.strings("industries"))
+    ind_ptr, ind_idx = catalog.csr("group_industries")
+    match = np.zeros(n_groups, dtype=bool)
+    industry = normalize_industry(industry)
+    if industry in industries:
+        target = industries.index(industry)
+        match[np.repeat(np.arange(n_groups), np.diff(ind_ptr))[ind_idx == target]] = True
+    score = risk_weighted * np.where(match, 1.0 + INDUSTRY_BOOST, 1.0)
+
+    order = np.lexsort((-fraction, -score))[:limit]
+    group_ids = catalog.strings("group_ids")
+    group_names = catalog.strings("group_names")
+    return [{
+        "group_id": group_ids[g],
+        "name": group_names[g],
+        "techniques_used": int(used[g]),
+        "techniques_uncovered": round(float(uncovered_sum[g]), 4),
+        "uncovered_fraction": round(float(fraction[g]), 4),
+        "risk_weighted_exposure": round(float(risk_weighted[g]), 4),
+        "targets_industry": bool(match[g]),
+        "target_industries": [industries[j] for j in ind_idx[ind_ptr[g]:ind_ptr[g + 1]]],
+        "exposure_score": round(float(score[g]), 4),
+    } for g in order if used[g] > 0]
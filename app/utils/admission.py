@@ -0,0 +1,224 @@
+"""Admission control for expensive routes.
+
+Calculations and bulk submissions each hold a pooled connection for their
+whole run, so a single busy tenant can drain the pool for everyone. Before
+the route touches the database, ``admit(policy)``:
+
+* verifies the bearer token (401 if it is invalid, so forged tokens are
+  never charged to the tenant they name),
+* takes a token from the tenant's bucket (rate limit),
+* takes one of the tenant's concurrency slots,
+* takes a global slot, waiting at most ADMISSION_MAX_WAIT_SECONDS.
+
+Any failure is an immediate 429 with Retry-After. State is in-process by
+default. Set ADMISSION_STORE_URL=redis://... to share it across workers and
+hosts (``pip install -r requirements-redis.txt``). Callers without a token are limited
+per client address.
+"""
+import asyncio
+import math
+import threading
+from abc import ABC, abstractmethod
+from time import monotonic, perf_counter, time
+from typing import Dict, Optional, Tuple
+from fastapi import HTTPException, Request
+from starlette.concurrency import run_in_threadpool
+from app.config import get_settings
+from app.utils.metrics import ADMISSION_IN_FLIGHT, ADMISSION_QUEUE_WAIT, ADMISSION_REJECTIONS
+from app.utils.security import decode_access_token
+
+settings = get_settings()
+
+POLL_SECONDS = 0.01
+# How often the in-memory store drops buckets that have refilled completely.
+PRUNE_SECONDS = 60.0
+
+
+class AdmissionStore(ABC):
+    """Counters and token buckets behind admission decisions."""
+
+    # Whether calls do network I/O, so admit() runs them in the threadpool instead of on the event loop.
+    blocking = False
+
+    @abstractmethod
+    def acquire(self, key: str, limit: int) -> bool:
+        ...
+
+    @abstractmethod
+    def release(self, key: str):
+        ...
+
+    @abstractmethod
+    def take(self, key: str, rate: float, burst: int) -> float:
+        """Take one token; returns 0 on success, otherwise seconds until a token is available."""
+
+
+class InMemoryAdmissionStore(AdmissionStore):
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._slots: Dict[str, int] = {}
+        # key -> (tokens, stamp, time at which the bucket is full again)
+        self._buckets: Dict[str, Tuple[float, float, float]] = {}
+        self._pruned = monotonic()
+
+    def acquire(self, key: str, limit: int) -> bool:
+        with self._lock:
+            used = self._slots.get(key, 0)
+            if used >= limit:
+                return False
+            self._slots[key] = used + 1
+            return True
+
+    def release(self, key: str):
+        with self._lock:
+            used = self._slots.get(key, 0) - 1
+            if used > 0:
+                self._slots[key] = used
+            else:
+                self._slots.pop(key, None)
+
+    def take(self, key: str, rate: float, burst: int) -> float:
+        now = monotonic()
+        with self._lock:
+            if now - self._pruned >= PRUNE_SECONDS:
+                # A full bucket is indistinguishable from a missing one.
+                self._buckets = {k: v for k, v in self._buckets.items() if v[2] > now}
+                self._pruned = now
+            tokens, stamp, _ = self._buckets.get(key, (float(burst), now, now))
+            tokens = min(float(burst), tokens + (now - stamp) * rate)
+            wait = 0.0
+            if tokens >= 1.0:
+                tokens -= 1.0
+            else:
+                wait = (1.0 - tokens) / rate
+            self._buckets[key] = (tokens, now, now + (burst - tokens) / rate)
+            return wait
+
+
+# KEYS[1] bucket hash; ARGV rate, burst, now. Returns 0 or milliseconds to wait.
+_TAKE_SCRIPT = """
+local rate = tonumber(ARGV[1])
+local burst = tonumber(ARGV[2])
+local now = tonumber(ARGV[3])
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'stamp')
+local tokens = tonumber(state[1]) or burst
+local stamp = tonumber(state[2]) or now
+tokens = math.min(burst, tokens + math.max(0, now - stamp) * rate)
+local wait = 0
+if tokens >= 1 then tokens = tokens - 1 else wait = math.ceil((1 - tokens) / rate * 1000) end
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'stamp', now)
+redis.call('EXPIRE', KEYS[1], math.ceil(burst / rate) + 1)
+return wait
+"""
+
+# KEYS[1] slot counter; ARGV limit, ttl. The TTL bounds leaks from crashed workers.
+_ACQUIRE_SCRIPT = """
+local used = redis.call('INCR', KEYS[1])
+redis.call('EXPIRE', KEYS[1], tonumber(ARGV[2]))
+if used > tonumber(ARGV[1]) then redis.call('DECR', KEYS[1]) return 0 end
+return 1
+"""
+
+# KEYS[1] slot counter. Floors at zero: the counter may have expired while the slot was held.
+_RELEASE_SCRIPT = """
+local used = redis.call('DECR', KEYS[1])
+if used <= 0 then redis.call('DEL', KEYS[1]) end
+return used
+"""
+
+
+class RedisAdmissionStore(AdmissionStore):
+    SLOT_TTL_SECONDS = 300
+    blocking = True
+
+    def __init__(self, url: str, prefix: str = "admission:"):
+        import redis
+
+        self._redis = redis.Redis.from_url(url)
+        self._prefix = prefix
+        self._take = self._redis.register_script(_TAKE_SCRIPT)
+        self._acquire = self._redis.register_script(_ACQUIRE_SCRIPT)
+        self._release = self._redis.register_script(_RELEASE_SCRIPT)
+
+    def acquire(self, key: str, limit: int) -> bool:
+        return bool(self._acquire(keys=[self._prefix + key], args=[limit, self.SLOT_TTL_SECONDS]))
+
+    def release(self, key: str):
+        self._release(keys=[self._prefix + key])
+
+    def take(self, key: str, rate: float, burst: int) -> float:
+        return self._take(keys=[self._prefix + "bucket:" + key], args=[rate, burst, time()]) / 1000.0
+
+
+_store: Optional[AdmissionStore] = None
+
+
+def get_store() -> AdmissionStore:
+    global _store
+    if _store is None:
+        _store = RedisAdmissionStore(settings.ADMISSION_STORE_URL) if settings.ADMISSION_STORE_URL \
+            else InMemoryAdmissionStore()
+    return _store
+
+
+async def _call(store: AdmissionStore, method, *args):
+    return await run_in_threadpool(method, *args) if store.blocking else method(*args)
+
+
+def _reject(policy: str, reason: str, retry_after: float):
+    ADMISSION_REJECTIONS.inc((policy, reason))
+    raise HTTPException(
+        status_code=429,
+        detail=f"Too many concurrent {policy} requests" if reason != "rate" else f"{policy} rate limit exceeded",
+        headers={"Retry-After": str(max(1, math.ceil(retry_after)))}
+    )
+
+
+def _caller_key(request: Request) -> str:
+    """The bucket a request is charged to: its verified tenant, or its client address without a token."""
+    auth = request.headers.get("authorization", "")
+    if auth.lower().startswith("bearer "):
+        payload = decode_access_token(auth[7:])
+        if payload is None or payload.get("tenant_id") is None:
+            raise HTTPException(status_code=401, detail="Invalid authentication credentials")
+        return f"tenant:{payload['tenant_id']}"
+    return f"client:{request.client.host if request.client else 'unknown'}"
+
+
+def admit(policy: str):
+    """Dependency factory: ``Depends(admit("calculate"))`` guards a route under one shared policy."""
+
+    async def dependency(request: Request):
+        if not settings.ADMISSION_ENABLED:
+            yield
+            return
+        store = get_store()
+        tenant_key = f"{policy}:{_caller_key(request)}"
+        global_key = f"{policy}:global"
+
+        wait = await _call(store, store.take, tenant_key, settings.ADMISSION_TENANT_RATE,
+                           settings.ADMISSION_TENANT_BURST)
+        if wait > 0:
+            _reject(policy, "rate", wait)
+        if not await _call(store, store.acquire, tenant_key, settings.ADMISSION_TENANT_CONCURRENCY):
+            _reject(policy, "tenant_concurrency", 1)
+
+        start = perf_counter()
+        deadline = start + settings.ADMISSION_MAX_WAIT_SECONDS
+        while not await _call(store, store.acquire, global_key, settings.ADMISSION_GLOBAL_CONCURRENCY):
+            if perf_counter() >= deadline:
+                await _call(store, store.release, tenant_key)
+                ADMISSION_QUEUE_WAIT.observe(perf_counter() - start, (policy,))
+                _reject(policy, "global_concurrency", 1)
+            await asyncio.sleep(POLL_SECONDS)
+        ADMISSION_QUEUE_WAIT.observe(perf_counter() - start, (policy,))
+
+        ADMISSION_IN_FLIGHT.inc((policy,))
+        try:
+            yield
+        finally:
+            ADMISSION_IN_FLIGHT.dec((policy,))
+            await _call(store, store.release, global_key)
+            await _call(store, store.release, tenant_key)
+
+    return dependency
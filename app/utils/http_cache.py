@@ -0,0 +1,129 @@
+"""Conditional GET support for read endpoints.
+
+Each cacheable route gets a dependency that derives validators (ETag and
+Last-Modified) from something cheap, such as a single ``updated_at`` column or
+the questionnaire version. When the client's ``If-None-Match`` or
+``If-Modified-Since`` still matches, the dependency raises ``NotModified``
+and the route body never runs.
+"""
+import hashlib
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from functools import lru_cache
+from typing import Dict, Optional
+from fastapi import Depends, HTTPException, Request
+from fastapi.responses import Response
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+from app.config import get_settings
+from app.database import get_read_db
+from app.models.assessment import Assessment
+from app.models.tenant import User
+from app.services.catalog import get_catalog
+from app.services.questionnaire_catalog import QUESTIONNAIRE_PATH, load_questionnaire
+from app.utils.security import get_current_user_read
+
+settings = get_settings()
+
+
+class NotModified(Exception):
+    def __init__(self, headers: Dict[str, str]):
+        self.headers = headers
+
+
+async def not_modified_handler(request: Request, exc: NotModified):
+    return Response(status_code=304, headers=exc.headers)
+
+
+class CacheValidators:
+    def __init__(self, etag: str, last_modified: Optional[datetime] = None):
+        self.etag = etag
+        self.last_modified = last_modified
+
+    @property
+    def headers(self) -> Dict[str, str]:
+        # private: responses are per-tenant; no-cache: always revalidate, which is cheap.
+        headers = {"ETag": self.etag, "Cache-Control": "private, no-cache"}
+        if self.last_modified is not None:
+            headers["Last-Modified"] = format_datetime(
+                self.last_modified.replace(microsecond=0, tzinfo=timezone.utc), usegmt=True)
+        return headers
+
+    def matches(self, request: Request) -> bool:
+        if_none_match = request.headers.get("if-none-match")
+        if if_none_match is not None:
+            tags = {t.strip().removeprefix("W/") for t in if_none_match.split(",")}
+            return "*" in tags or self.etag.removeprefix("W/") in tags
+        if_modified_since = request.headers.get("if-modified-since")
+        if if_modified_since and self.last_modified is not None:
+            try:
+                since = parsedate_to_datetime(if_modified_since).replace(tzinfo=None)
+            except (TypeError, ValueError):
+                return False
+            return self.last_modified.replace(microsecond=0) <= since
+        return False
+
+
+def make_validators(request: Request, *parts, last_modified: Optional[datetime] = None) -> CacheValidators:
+    """Build validators from state parts plus the query string, and short-circuit with 304 if fresh."""
+    digest = hashlib.blake2b(digest_size=12)
+    for part in (settings.VERSION, request.url.path, request.url.query, *parts):
+        digest.update(str(part).encode("utf-8"))
+        digest.update(b"\0")
+    validators = CacheValidators(f'W/"{digest.hexdigest()}"', last_modified)
+    if validators.matches(request):
+        raise NotModified(validators.headers)
+    return validators
+
+
+async def assessment_validators(
+    assessment_id: int,
+    request: Request,
+    current_user: User = Depends(get_current_user_read),
+    db: Session = Depends(get_read_db)
+) -> CacheValidators:
+    """Validators for anything derived from one assessment; calculations bump its updated_at."""
+    updated_at = _assessment_updated_at(assessment_id, current_user, db)
+    return make_validators(request, current_user.tenant_id, assessment_id, updated_at, last_modified=updated_at)
+
+
+async def assessment_catalog_validators(
+    assessment_id: int,
+    request: Request,
+    current_user: User = Depends(get_current_user_read),
+    db: Session = Depends(get_read_db)
+) -> CacheValidators:
+    """As assessment_validators, for responses that also join in catalog data (changes on sync)."""
+    updated_at = _assessment_updated_at(assessment_id, current_user, db)
+    return make_validators(request, current_user.tenant_id, assessment_id, updated_at, get_catalog().version)
+
+
+def _assessment_updated_at(assessment_id: int, current_user: User, db: Session):
+    row = db.query(Assessment.updated_at).filter(
+        Assessment.id == assessment_id,
+        Assessment.tenant_id == current_user.tenant_id
+    ).first()
+    if row is None:
+        raise HTTPException(status_code=404, detail="Assessment not found")
+    return row.updated_at
+
+
+async def assessment_list_validators(
+    request: Request,
+    current_user: User = Depends(get_current_user_read),
+    db: Session = Depends(get_read_db)
+) -> CacheValidators:
+    latest, count = db.query(func.max(Assessment.updated_at), func.count(Assessment.id)).filter(
+        Assessment.tenant_id == current_user.tenant_id
+    ).one()
+    return make_validators(request, current_user.tenant_id, latest, count, last_modified=latest)
+
+
+@lru_cache()
+def _questionnaire_fingerprint() -> str:
+    with open(QUESTIONNAIRE_PATH, "rb") as f:
+        return f"{load_questionnaire().get('version')}:{hashlib.blake2b(f.read(), digest_size=8).hexdigest()}"
+
+
+async def questionnaire_validators(request: Request) -> CacheValidators:
+    return make_validators(request, _questionnaire_fingerprint())
@@ -0,0 +1,261 @@
+"""In-process Prometheus metrics.
+
+Kept dependency-free and cheap: a metric update is a dict lookup and a couple
+of additions under a lock, so instrumenting the hot path costs microseconds.
+"""
+import threading
+from bisect import bisect_left
+from contextvars import ContextVar
+from time import perf_counter
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+from sqlalchemy import event
+from sqlalchemy.pool import QueuePool
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+COUNT_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000)
+
+Labels = Tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Labels, extra: str = "") -> str:
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._values: Dict[Labels, float] = {}
+
+    def inc(self, labels: Labels = (), amount: float = 1.0):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = list(self._values.items())
+        return self.header() + [f"{self.name}{_format_labels(self.labelnames, k)} {v}" for k, v in items]
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def __init__(self, *args, collect: Optional[Callable[[], Dict[Labels, float]]] = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._values: Dict[Labels, float] = {}
+        self._collect = collect
+
+    def inc(self, labels: Labels = (), amount: float = 1.0):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def dec(self, labels: Labels = (), amount: float = 1.0):
+        self.inc(labels, -amount)
+
+    def set(self, value: float, labels: Labels = ()):
+        with self._lock:
+            self._values[labels] = value
+
+    def render(self) -> List[str]:
+        if self._collect is not None:
+            items = list(self._collect().items())
+        else:
+            with self._lock:
+                items = list(self._values.items())
+        return self.header() + [f"{self.name}{_format_labels(self.labelnames, k)} {v}" for k, v in items]
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, *args, buckets: Sequence[float] = LATENCY_BUCKETS, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.buckets = tuple(buckets)
+        # labels -> [per-bucket counts..., +Inf count, sum]
+        self._values: Dict[Labels, List[float]] = {}
+
+    def observe(self, value: float, labels: Labels = ()):
+        i = bisect_left(self.buckets, value)
+        with self._lock:
+            row = self._values.get(labels)
+            if row is None:
+                row = self._values[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+            row[i] += 1
+            row[-1] += value
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = [(k, list(v)) for k, v in self._values.items()]
+        lines = self.header()
+        for labels, row in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets, row):
+                cumulative += count
+                le = 'le="%s"' % bound
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, labels, le)} {cumulative}")
+            cumulative += row[len(self.buckets)]
+            le = 'le="+Inf"'
+            lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, labels, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, labels)} {row[-1]}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, labels)} {cumulative}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+
+    def register(self, metric: _Metric) -> _Metric:
+        self._metrics[metric.name] = metric
+        return metric
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+HTTP_REQUEST_DURATION = REGISTRY.register(Histogram(
+    "http_request_duration_seconds", "HTTP request latency by route template", ("method", "route")))
+HTTP_RESPONSES = REGISTRY.register(Counter(
+    "http_responses_total", "HTTP responses by route template and status code", ("method", "route", "status")))
+HTTP_IN_FLIGHT = REGISTRY.register(Gauge("http_requests_in_flight", "HTTP requests currently being served"))
+HTTP_REQUEST_QUERIES = REGISTRY.register(Histogram(
+    "http_request_db_queries", "SQL statements executed per HTTP request", ("method", "route"), buckets=COUNT_BUCKETS))
+DB_QUERIES = REGISTRY.register(Counter("db_queries_total", "SQL statements executed"))
+DB_POOL_CHECKOUTS = REGISTRY.register(Counter("db_pool_checkouts_total", "Connections checked out of the pool"))
+DB_POOL_WAIT = REGISTRY.register(Histogram(
+    "db_pool_checkout_wait_seconds", "Time spent waiting for a pooled connection",
+    buckets=(0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 30.0)))
+COVERAGE_DURATION = REGISTRY.register(Histogram(
+    "coverage_calculation_seconds", "AssessmentEngine.calculate_coverage duration"))
+COVERAGE_ROWS = REGISTRY.register(Histogram(
+    "coverage_calculation_rows", "technique_coverage rows written per calculation",
+    buckets=(100, 250, 500, 1000, 2500, 5000, 10000, 25000)))
+COVERAGE_SHARED = REGISTRY.register(Counter(
+    "coverage_calculation_shared_total",
+    "Calculations answered from a concurrent one: in this worker (flight) or after waiting on its lock (lock)",
+    ("scope",)))
+ADMISSION_REJECTIONS = REGISTRY.register(Counter(
+    "admission_rejections_total", "Requests rejected with 429 by admission control", ("policy", "reason")))
+ADMISSION_QUEUE_WAIT = REGISTRY.register(Histogram(
+    "admission_queue_wait_seconds", "Time spent waiting for a global admission slot", ("policy",),
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)))
+ADMISSION_IN_FLIGHT = REGISTRY.register(Gauge(
+    "admission_in_flight", "Admitted requests currently running", ("policy",)))
+AUTOSAVE_PENDING = REGISTRY.register(Gauge(
+    "autosave_pending_answers", "Questionnaire answers buffered for the next autosave flush"))
+AUTOSAVE_COALESCED = REGISTRY.register(Counter(
+    "autosave_coalesced_total", "Autosave edits absorbed by a newer edit to the same question"))
+AUTOSAVE_FLUSH_ROWS = REGISTRY.register(Histogram(
+    "autosave_flush_rows", "Answers upserted per autosave flush", buckets=COUNT_BUCKETS))
+
+# Mutable one-element list so that copies of the context (threadpool
+# dependencies) still count into the request that started them.
+_request_queries: ContextVar[Optional[List[int]]] = ContextVar("request_queries", default=None)
+
+
+class InstrumentedQueuePool(QueuePool):
+    """QueuePool that records how long callers block waiting for a connection."""
+
+    def _do_get(self):
+        start = perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            DB_POOL_WAIT.observe(perf_counter() - start)
+
+
+_instrumented_engines: Dict[str, object] = {}
+
+
+def _pool_stats() -> Dict[Labels, float]:
+    stats: Dict[Labels, float] = {}
+    for name, engine in _instrumented_engines.items():
+        pool = engine.pool
+        if isinstance(pool, QueuePool):
+            stats[(name, "size")] = pool.size()
+            stats[(name, "checked_in")] = pool.checkedin()
+            stats[(name, "checked_out")] = pool.checkedout()
+            stats[(name, "overflow")] = pool.overflow()
+    return stats
+
+
+DB_POOL_CONNECTIONS = REGISTRY.register(Gauge(
+    "db_pool_connections", "Connection pool state", ("engine", "state"), collect=_pool_stats))
+
+
+def instrument_engine(engine, name: str = "primary"):
+    if name in _instrumented_engines:
+        return
+    _instrumented_engines[name] = engine
+
+    def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        DB_QUERIES.inc()
+        counter = _request_queries.get()
+        if counter is not None:
+            counter[0] += 1
+
+    def _checkout(dbapi_connection, connection_record, connection_proxy):
+        DB_POOL_CHECKOUTS.inc()
+
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine.pool, "checkout", _checkout)
+
+
+class MetricsMiddleware:
+    """Pure ASGI middleware: latency, status and query count per route template."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        status = [500]
+        queries = [0]
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+            await send(message)
+
+        token = _request_queries.set(queries)
+        HTTP_IN_FLIGHT.inc()
+        start = perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = perf_counter() - start
+            HTTP_IN_FLIGHT.dec()
+            _request_queries.reset(token)
+            route = scope.get("route")
+            labels = (scope["method"], getattr(route, "path", "unmatched"))
+            HTTP_REQUEST_DURATION.observe(elapsed, labels)
+            HTTP_REQUEST_QUERIES.observe(queries[0], labels)
+            HTTP_RESPONSES.inc(labels + (str(status[0]),))
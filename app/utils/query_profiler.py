@@ -0,0 +1,150 @@
+"""Opt-in per-request SQL profiler.
+
+Hooks the engine's cursor events to record every statement a request runs,
+groups them by normalized SQL and flags statements repeated often enough to
+look like an N+1 lazy load. Results go to an ``X-SQL-Profile`` response header
+and a log line; with ``SQL_PROFILER_STRICT`` a request over its query budget
+raises ``QueryBudgetExceeded`` so test suites fail loudly.
+"""
+import re
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from time import perf_counter
+from typing import Dict, List, Optional, Tuple
+from sqlalchemy import event
+from app.utils.logger import get_logger
+
+logger = get_logger("sql_profiler")
+
+_PARAM_LIST = re.compile(r"\(\s*%\([^)]+\)s(?:\s*,\s*%\([^)]+\)s)*\s*\)")
+_PARAM = re.compile(r"%\([^)]+\)s|\?|\$\d+")
+_NUMBER = re.compile(r"\b\d+\b")
+_WHITESPACE = re.compile(r"\s+")
+
+# Route template -> max statements; routes not listed fall back to the default.
+_route_budgets: Dict[str, int] = {}
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+def normalize(statement: str) -> str:
+    statement = _PARAM_LIST.sub("(?)", statement)
+    statement = _PARAM.sub("?", statement)
+    statement = _NUMBER.sub("N", statement)
+    return _WHITESPACE.sub(" ", statement).strip()
+
+
+class QueryProfile:
+    def __init__(self):
+        self.statements: List[Tuple[str, float]] = []
+
+    @property
+    def count(self) -> int:
+        return len(self.statements)
+
+    @property
+    def total_ms(self) -> float:
+        return sum(t for _, t in self.statements) * 1000.0
+
+    def repeated(self, threshold: int) -> List[Tuple[str, int]]:
+        counts = Counter(normalize(s) for s, _ in self.statements)
+        return [(s, n) for s, n in counts.most_common() if n >= threshold]
+
+    def suspected_n_plus_one(self, threshold: int) -> List[Tuple[str, int]]:
+        return [(s, n) for s, n in self.repeated(threshold) if s.upper().startswith("SELECT")]
+
+
+_current: ContextVar[Optional[QueryProfile]] = ContextVar("query_profile", default=None)
+
+
+def install_query_profiler(engine):
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        if _current.get() is not None:
+            conn.info.setdefault("profiler_start", []).append(perf_counter())
+
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        profile = _current.get()
+        starts = conn.info.get("profiler_start")
+        if profile is not None and starts:
+            profile.statements.append((statement, perf_counter() - starts.pop()))
+
+    event.listen(engine, "before_cursor_execute", _before)
+    event.listen(engine, "after_cursor_execute", _after)
+
+
+def set_query_budget(route_path: str, max_queries: int):
+    _route_budgets[route_path] = max_queries
+
+
+@contextmanager
+def assert_max_queries(max_queries: int):
+    """For tests outside HTTP: fail if the block runs more than max_queries statements."""
+    profile = QueryProfile()
+    token = _current.set(profile)
+    try:
+        yield profile
+    finally:
+        _current.reset(token)
+    if profile.count > max_queries:
+        raise QueryBudgetExceeded(f"{profile.count} queries > budget {max_queries}: {profile.repeated(2)}")
+
+
+class QueryProfilerMiddleware:
+    def __init__(self, app, n_plus_one_threshold: int = 3, default_budget: Optional[int] = None,
+                 strict: bool = False, header: bool = True):
+        self.app = app
+        self.threshold = n_plus_one_threshold
+        self.default_budget = default_budget
+        self.strict = strict
+        self.header = header
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        profile = QueryProfile()
+        token = _current.set(profile)
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                self._check(scope, profile)
+                if self.header:
+                    message["headers"] = list(message.get("headers", [])) + [
+                        (b"x-sql-profile", self._summary(profile).encode("latin-1", "replace"))
+                    ]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _current.reset(token)
+            self._log(scope, profile)
+
+    def _route(self, scope) -> str:
+        return getattr(scope.get("route"), "path", scope.get("path", ""))
+
+    def _summary(self, profile: QueryProfile) -> str:
+        suspects = profile.suspected_n_plus_one(self.threshold)
+        summary = f"queries={profile.count}; time_ms={profile.total_ms:.2f}; n_plus_one={len(suspects)}"
+        if suspects:
+            summary += f"; worst={suspects[0][1]}x {suspects[0][0][:80]}"
+        return summary
+
+    def _check(self, scope, profile: QueryProfile):
+        budget = _route_budgets.get(self._route(scope), self.default_budget)
+        if self.strict and budget is not None and profile.count > budget:
+            raise QueryBudgetExceeded(
+                f"{scope['method']} {self._route(scope)} ran {profile.count} queries (budget {budget}): "
+                f"{profile.repeated(2)}"
+            )
+
+    def _log(self, scope, profile: QueryProfile):
+        suspects = profile.suspected_n_plus_one(self.threshold)
+        line = f"{scope['method']} {self._route(scope)} {self._summary(profile)}"
+        if suspects:
+            logger.warning("possible N+1: %s; repeated=%s", line, suspects)
+        else:
+            logger.info(line)
@@ -4,9 +4,9 @@ from jose import JWTError, jwt
 from passlib.context import CryptContext
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, joinedload
 from app.config import get_settings
-from app.database import get_db
+from app.database import ReadSessionLocal, get_db, get_read_db
 from app.models.tenant import User
 
 settings = get_settings()
@@ -30,10 +30,7 @@ def decode_access_token(token: str):
         return jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
     except JWTError:
         return None
-async def get_current_user(
-    credentials: HTTPAuthorizationCredentials = Depends(security),
-    db: Session = Depends(get_db)
-) -> User:
+def _authenticate(credentials: HTTPAuthorizationCredentials, db: Session) -> User:
     token = credentials.credentials
     payload = decode_access_token(token)
     if payload is None:
@@ -44,8 +41,32 @@ async def get_current_user(
     user_id: int = payload.get("user_id")
     if user_id is None:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token")
-    user = db.query(User).filter(User.id == user_id, User.is_active == True).first()
+    # Handlers read current_user.tenant; load it with the user instead of lazily.
+    user = db.query(User).options(joinedload(User.tenant)).filter(User.id == user_id, User.is_active == True).first()
     if user is None:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="User not found")
     return user
-    
\ No newline at end of file
+
+async def get_current_user(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db: Session = Depends(get_db)
+) -> User:
+    user = _authenticate(credentials, db)
+    # Commits on this session pin the tenant's reads to the primary for a moment.
+    db.info["tenant_id"] = user.tenant_id
+    return user
+
+async def get_current_user_read(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db: Session = Depends(get_read_db)
+) -> User:
+    """get_current_user for read-only routes; shares the route's get_read_db session."""
+    return _authenticate(credentials, db)
+
+async def get_current_user_detached(
+    credentials: HTTPAuthorizationCredentials = Depends(security)
+) -> User:
+    """For long-lived responses such as event streams: the session used to authenticate is
+    closed before the handler runs, so the response does not hold a connection."""
+    with ReadSessionLocal() as db:
+        return _authenticate(credentials, db)
@@ -0,0 +1,36 @@
+"""Compare two benchmark result files.
+
+    python -m benchmarks.compare benchmarks/results/engine-abc123-....json benchmarks/results/engine-def456-....json
+"""
+import argparse
+import json
+
+
+def _index(path: str) -> dict:
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    return data.get("revision", "?"), {
+        (r.get("scale"), name): stats["median_ms"]
+        for r in data["results"]
+        for name, stats in r["timings"].items()
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare median timings of two benchmark runs")
+    parser.add_argument("before")
+    parser.add_argument("after")
+    args = parser.parse_args()
+
+    rev_a, before = _index(args.before)
+    rev_b, after = _index(args.after)
+    print(f"{'scale':>6}  {'benchmark':<34} {rev_a:>12} {rev_b:>12} {'change':>8}")
+    for key in sorted(set(before) | set(after), key=lambda k: (k[0] or 0, k[1])):
+        a, b = before.get(key), after.get(key)
+        change = f"{(b - a) / a * 100:+.1f}%" if a and b is not None else "n/a"
+        fmt = lambda v: f"{v:.2f}" if v is not None else "-"
+        print(f"{key[0] or '':>6}  {key[1]:<34} {fmt(a):>12} {fmt(b):>12} {change:>8}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,152 @@
+"""Drive concurrent end-to-end flows against a running API.
+
+Each virtual user logs in as a seeded load user (see benchmarks/seed_load.py)
+and loops login -> list -> submit -> calculate -> coverage -> gaps -> report.
+
+    uvicorn app.main:app --workers 4 &
+    python -m benchmarks.loadgen --base-url http://127.0.0.1:8000 --tenants 1000 --concurrency 64 --duration 60
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+import random
+from collections import defaultdict
+from datetime import datetime
+from time import perf_counter
+from typing import Dict, List
+import httpx
+from benchmarks.seed_load import LOAD_PASSWORD, load_user_email
+from benchmarks.synthetic import generate_answers
+from benchmarks.timing import git_revision
+
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), "results")
+API = "/api/v1"
+
+
+def percentile(ordered: List[float], pct: float) -> float:
+    if not ordered:
+        return 0.0
+    # nearest-rank
+    k = max(0, min(len(ordered) - 1, math.ceil(pct / 100.0 * len(ordered)) - 1))
+    return ordered[k]
+
+
+class Recorder:
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.errors: Dict[str, int] = defaultdict(int)
+        self.flows = 0
+
+    async def call(self, client: httpx.AsyncClient, route: str, method: str, url: str, **kwargs) -> httpx.Response:
+        start = perf_counter()
+        try:
+            response = await client.request(method, url, **kwargs)
+        except httpx.HTTPError:
+            self.errors[route] += 1
+            raise
+        self.latencies[route].append(perf_counter() - start)
+        if response.status_code >= 400:
+            self.errors[route] += 1
+            response.raise_for_status()
+        return response
+
+    def report(self, elapsed: float) -> dict:
+        routes = {}
+        for route, samples in sorted(self.latencies.items()):
+            ordered = sorted(samples)
+            routes[route] = {
+                "requests": len(ordered),
+                "errors": self.errors.get(route, 0),
+                "throughput_rps": round(len(ordered) / elapsed, 2),
+                "p50_ms": round(percentile(ordered, 50) * 1000, 2),
+                "p95_ms": round(percentile(ordered, 95) * 1000, 2),
+                "p99_ms": round(percentile(ordered, 99) * 1000, 2),
+                "max_ms": round(ordered[-1] * 1000, 2),
+            }
+        total = sum(len(v) for v in self.latencies.values())
+        return {
+            "elapsed_s": round(elapsed, 2),
+            "flows": self.flows,
+            "flows_per_s": round(self.flows / elapsed, 2),
+            "requests": total,
+            "requests_per_s": round(total / elapsed, 2),
+            "errors": sum(self.errors.values()),
+            "routes": routes,
+        }
+
+
+async def virtual_user(client: httpx.AsyncClient, recorder: Recorder, rng: random.Random,
+                       tenants: int, users_per_tenant: int, deadline: float):
+    while perf_counter() < deadline:
+        email = load_user_email(rng.randrange(tenants), rng.randrange(users_per_tenant))
+        try:
+            login = await recorder.call(client, "POST /auth/login", "POST", f"{API}/auth/login",
+                                        json={"email": email, "password": LOAD_PASSWORD})
+            headers = {"Authorization": f"Bearer {login.json()['access_token']}"}
+            listing = await recorder.call(client, "GET /assessments/", "GET", f"{API}/assessments/", headers=headers)
+            assessments = listing.json()
+            if not assessments:
+                continue
+            assessment_id = rng.choice(assessments)["id"]
+            await recorder.call(client, "POST /questionnaire/submit", "POST", f"{API}/questionnaire/submit",
+                                headers=headers, json={"assessment_id": assessment_id, "responses": generate_answers(rng)})
+            await recorder.call(client, "POST /gap-analysis/{id}/calculate", "POST",
+                                f"{API}/gap-analysis/{assessment_id}/calculate", headers=headers)
+            await recorder.call(client, "GET /gap-analysis/{id}/coverage", "GET",
+                                f"{API}/gap-analysis/{assessment_id}/coverage", headers=headers)
+            await recorder.call(client, "GET /gap-analysis/{id}/gaps", "GET",
+                                f"{API}/gap-analysis/{assessment_id}/gaps", headers=headers)
+            await recorder.call(client, "GET /reports/{id}/executive", "GET",
+                                f"{API}/reports/{assessment_id}/executive", headers=headers)
+            recorder.flows += 1
+        except httpx.HTTPError:
+            continue
+
+
+async def run(base_url: str, concurrency: int, duration: float, tenants: int, users_per_tenant: int, seed: int) -> dict:
+    recorder = Recorder()
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60.0) as client:
+        start = perf_counter()
+        deadline = start + duration
+        await asyncio.gather(*(
+            virtual_user(client, recorder, random.Random(seed + i), tenants, users_per_tenant, deadline)
+            for i in range(concurrency)
+        ))
+        return recorder.report(perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", default="http://127.0.0.1:8000")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=30.0, help="seconds")
+    parser.add_argument("--tenants", type=int, default=1000, help="must not exceed the seeded tenant count")
+    parser.add_argument("--users-per-tenant", type=int, default=2)
+    parser.add_argument("--seed", type=int, default=30)
+    parser.add_argument("--output", help="result file (default benchmarks/results/load-<rev>-<time>.json)")
+    args = parser.parse_args()
+
+    report = asyncio.run(run(args.base_url, args.concurrency, args.duration, args.tenants,
+                             args.users_per_tenant, args.seed))
+    print(f"{report['flows']} flows, {report['requests']} requests in {report['elapsed_s']} s "
+          f"({report['requests_per_s']} req/s, {report['errors']} errors)")
+    print(f"{'route':<34} {'req':>7} {'rps':>8} {'p50':>9} {'p95':>9} {'p99':>9} {'err':>5}")
+    for route, r in report["routes"].items():
+        print(f"{route:<34} {r['requests']:>7} {r['throughput_rps']:>8} {r['p50_ms']:>9} "
+              f"{r['p95_ms']:>9} {r['p99_ms']:>9} {r['errors']:>5}")
+
+    revision = git_revision()
+    output = args.output or os.path.join(
+        RESULTS_DIR, f"load-{revision}-{datetime.utcnow().strftime('%Y%m%dT%H%M%S')}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump({"revision": revision, "timestamp": datetime.utcnow().isoformat(),
+                   "config": vars(args), **report}, f, indent=2)
+    print(f"Results written to {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""Seed tenants, users and assessments for load testing.
+
+Follows seed_user.py but in bulk: every load user shares one password so it is
+hashed once, and rows go in with multi-row INSERT ... RETURNING.
+
+    python -m benchmarks.seed_load --tenants 2000 --users-per-tenant 3 --assessments-per-tenant 2
+"""
+import argparse
+import random
+from datetime import datetime
+from sqlalchemy import insert
+from benchmarks.synthetic import INDUSTRIES, generate_answers
+
+LOAD_PASSWORD = "loadtest-password-1"
+CHUNK = 500
+
+
+def load_org_name(tenant_index: int) -> str:
+    return f"Load Organization {tenant_index:05d}"
+
+
+def load_user_email(tenant_index: int, user_index: int) -> str:
+    return f"load-{tenant_index:05d}-{user_index}@example.com"
+
+
+def seed(db, tenants: int, users_per_tenant: int, assessments_per_tenant: int, seed_value: int = 30):
+    from app.models.assessment import Assessment, QuestionnaireResponse
+    from app.models.tenant import Tenant, User
+    from app.utils.security import get_password_hash
+
+    rng = random.Random(seed_value)
+    password_hash = get_password_hash(LOAD_PASSWORD)
+    existing = {name for (name,) in db.query(Tenant.org_name).filter(Tenant.org_name.like("Load Organization %"))}
+    pending = [i for i in range(tenants) if load_org_name(i) not in existing]
+    now = datetime.utcnow()
+    created = {"tenants": 0, "users": 0, "assessments": 0, "responses": 0}
+
+    for start in range(0, len(pending), CHUNK):
+        chunk = pending[start:start + CHUNK]
+        tenant_ids = db.scalars(
+            insert(Tenant).returning(Tenant.id, sort_by_parameter_order=True),
+            [{"org_name": load_org_name(i), "industry": rng.choice(INDUSTRIES), "subscription_tier": "free",
+              "is_active": True, "created_at": now, "updated_at": now} for i in chunk],
+        ).all()
+        industries = dict(db.query(Tenant.id, Tenant.industry).filter(Tenant.id.in_(tenant_ids)))
+        db.execute(insert(User), [
+            {"tenant_id": tid, "email": load_user_email(i, u), "hashed_password": password_hash,
+             "full_name": f"Load User {i}-{u}", "role": "admin" if u == 0 else "analyst",
+             "is_active": True, "created_at": now}
+            for i, tid in zip(chunk, tenant_ids) for u in range(users_per_tenant)
+        ])
+        assessment_rows = [
+            {"tenant_id": tid, "assessment_name": f"Load assessment {a}", "industry": industries[tid],
+             "organization_size": rng.choice(["small", "medium", "large"]), "cloud_usage": {},
+             "coverage_percentage": 0.0, "status": "in_progress", "created_at": now, "updated_at": now}
+            for tid in tenant_ids for a in range(assessments_per_tenant)
+        ]
+        assessment_ids = db.scalars(
+            insert(Assessment).returning(Assessment.id, sort_by_parameter_order=True), assessment_rows
+        ).all() if assessment_rows else []
+        responses = [dict(answer, assessment_id=aid) for aid in assessment_ids for answer in generate_answers(rng)]
+        if responses:
+            db.execute(insert(QuestionnaireResponse), responses)
+        db.commit()
+        created["tenants"] += len(tenant_ids)
+        created["users"] += len(tenant_ids) * users_per_tenant
+        created["assessments"] += len(assessment_ids)
+        created["responses"] += len(responses)
+        print(f"  seeded {created['tenants']}/{len(pending)} tenants")
+    return created
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tenants", type=int, default=1000)
+    parser.add_argument("--users-per-tenant", type=int, default=2)
+    parser.add_argument("--assessments-per-tenant", type=int, default=2)
+    parser.add_argument("--seed", type=int, default=30)
+    args = parser.parse_args()
+
+    from app.database import SessionLocal
+
+    db = SessionLocal()
+    try:
+        created = seed(db, args.tenants, args.users_per_tenant, args.assessments_per_tenant, args.seed)
+        print(f"Seed completed: {created}; password for every load user is '{LOAD_PASSWORD}'")
+    except Exception as e:
+        print(f"Failed to seed load data: {e}")
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
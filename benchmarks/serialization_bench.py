@@ -0,0 +1,91 @@
+"""Before/after cost of serializing the large read responses.
+
+"before" is FastAPI's default path: ORM-shaped objects through (optionally)
+the response model, jsonable_encoder and json.dumps. "after" is what the
+routes do now: orjson over dicts built from column tuples.
+
+    python -m benchmarks.serialization_bench --scale 1 --assessments 2000
+"""
+import argparse
+import json
+import random
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+import orjson
+from fastapi.encoders import jsonable_encoder
+from benchmarks.synthetic import scaled_sizes
+from benchmarks.timing import measure
+
+
+def _default_dumps(content) -> bytes:
+    # Mirrors starlette.responses.JSONResponse.render
+    return json.dumps(content, ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")).encode("utf-8")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scale", type=float, default=1.0)
+    parser.add_argument("--assessments", type=int, default=2000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    from app.api.v1.assessments import AssessmentResponse, LIST_FIELDS
+    from app.models.assessment import CoverageStatus
+
+    rng = random.Random(33)
+    sizes = scaled_sizes(args.scale)
+    n = sizes["techniques"] + sizes["sub_techniques"]
+    statuses = list(CoverageStatus)
+    coverage_rows = [(f"T{1000 + i}", rng.choice(statuses), rng.random(), rng.random() * 10) for i in range(n)]
+    gap_rows = [(f"T{1000 + i}", CoverageStatus.NONE, rng.random() * 10, [f"DC{j:04d}" for j in range(rng.randint(0, 6))])
+                for i in range(n)]
+    now = datetime.utcnow()
+    assessment_rows = [
+        (i, f"Assessment {i}", "Healthcare", "large", {"aws": True}, rng.random() * 100, "completed",
+         now - timedelta(hours=i))
+        for i in range(args.assessments)
+    ]
+
+    def coverage_before():
+        objs = [SimpleNamespace(technique_id=t, coverage_status=s, confidence_score=c, risk_score=r) for t, s, c, r in coverage_rows]
+        return _default_dumps(jsonable_encoder({"assessment_id": 1, "techniques": [
+            {"technique_id": o.technique_id, "coverage_status": o.coverage_status.value,
+             "confidence_score": o.confidence_score, "risk_score": o.risk_score} for o in objs]}))
+
+    def coverage_after():
+        return orjson.dumps({"assessment_id": 1, "techniques": [
+            {"technique_id": t, "coverage_status": s.value, "confidence_score": c, "risk_score": r}
+            for t, s, c, r in coverage_rows]})
+
+    def gaps_before():
+        return _default_dumps(jsonable_encoder({"top_gaps": [
+            {"technique_id": t, "coverage_status": s.value, "risk_score": r, "missing_components": m}
+            for t, s, r, m in gap_rows]}))
+
+    def gaps_after():
+        return orjson.dumps({"top_gaps": [
+            {"technique_id": t, "coverage_status": s.value, "risk_score": r, "missing_components": m}
+            for t, s, r, m in gap_rows]})
+
+    def assessments_before():
+        objs = [SimpleNamespace(**dict(zip(LIST_FIELDS, row))) for row in assessment_rows]
+        validated = [AssessmentResponse.model_validate(o, from_attributes=True) for o in objs]
+        return _default_dumps(jsonable_encoder(validated))
+
+    def assessments_after():
+        return orjson.dumps([dict(zip(LIST_FIELDS, row)) for row in assessment_rows])
+
+    cases = {
+        f"GET /gap-analysis/{{id}}/coverage ({n} rows)": (coverage_before, coverage_after),
+        f"GET /gap-analysis/{{id}}/gaps ({n} rows)": (gaps_before, gaps_after),
+        f"GET /assessments/ ({args.assessments} rows)": (assessments_before, assessments_after),
+    }
+    print(f"{'route':<46} {'before ms':>10} {'after ms':>10} {'speedup':>8}")
+    for name, (before, after) in cases.items():
+        b = measure(before, args.repeat, warmup=2)["median_ms"]
+        a = measure(after, args.repeat, warmup=2)["median_ms"]
+        print(f"{name:<46} {b:>10.2f} {a:>10.2f} {b / a:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
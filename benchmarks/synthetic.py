@@ -0,0 +1,241 @@
+"""Synthetic ATT&CK catalog and questionnaire answers.
+
+Sizes are modelled on ATT&CK v18 and can be multiplied (scale=10 gives a
+catalog ten times larger). Objects are STIX-shaped dicts served through a
+tiny store that answers the ``query([("type", "=", ...)])`` calls made by the
+``sync_*`` functions, so syncs can be timed without a TAXII server or stix2.
+"""
+import json
+import os
+import random
+from typing import Dict, List, Optional
+
+V18_SIZES = {
+    "techniques": 216,
+    "sub_techniques": 475,
+    "data_components": 106,
+    "detection_strategies": 691,
+    "analytics": 1739,
+    "groups": 170,
+}
+
+TACTICS = [
+    "reconnaissance", "resource-development", "initial-access", "execution", "persistence",
+    "privilege-escalation", "defense-evasion", "credential-access", "discovery", "lateral-movement",
+    "collection", "command-and-control", "exfiltration", "impact",
+]
+PLATFORMS = [
+    "Windows", "Linux", "macOS", "Network Devices", "Containers", "IaaS", "SaaS",
+    "Office Suite", "Identity Provider", "ESXi",
+]
+INDUSTRIES = [
+    "Information Technology", "Financial Services", "Healthcare", "Manufacturing",
+    "Government", "Energy", "Retail", "Education",
+]
+_WORDS = (
+    "adversary process command registry credential token service network file module script "
+    "account cloud instance image container kernel driver memory injection persistence remote "
+    "execution discovery collection exfiltration channel protocol encryption archive payload "
+    "scheduled task startup shell interpreter valid access lateral movement hijack spoof"
+).split()
+
+QUESTIONNAIRE_PATH = os.path.join(os.path.dirname(__file__), "..", "app", "data", "questionnaire_v18.json")
+
+
+def scaled_sizes(scale: float) -> Dict[str, int]:
+    return {k: max(1, int(round(v * scale))) for k, v in V18_SIZES.items()}
+
+
+def _text(rng: random.Random, words: int) -> str:
+    return " ".join(rng.choice(_WORDS) for _ in range(words)).capitalize() + "."
+
+
+def _ref(external_id: str) -> List[dict]:
+    return [{"source_name": "mitre-attack", "external_id": external_id}]
+
+
+def _questionnaire_components() -> List[str]:
+    with open(os.path.abspath(QUESTIONNAIRE_PATH), "r", encoding="utf-8") as f:
+        data = json.load(f)
+    return sorted({c for s in data["sections"] for q in s["questions"] for c in q["data_components_mapped"]})
+
+
+class SyntheticCatalog:
+    def __init__(self, scale: float = 1.0, seed: int = 18):
+        self.scale = scale
+        self.sizes = scaled_sizes(scale)
+        rng = random.Random(seed)
+        self.rng = rng
+
+        # Real questionnaire components come first so generated answers map onto the catalog.
+        known = _questionnaire_components()
+        self.component_ids = (known + [f"DC{i:04d}" for i in range(1, 10000) if f"DC{i:04d}" not in known])[
+            : self.sizes["data_components"]
+        ]
+        self.technique_ids = [f"T{1000 + i}" for i in range(self.sizes["techniques"])]
+        self.sub_technique_ids = []
+        per_parent: Dict[str, int] = {}
+        for _ in range(self.sizes["sub_techniques"]):
+            parent = rng.choice(self.technique_ids)
+            per_parent[parent] = per_parent.get(parent, 0) + 1
+            self.sub_technique_ids.append(f"{parent}.{per_parent[parent]:03d}")
+        self.objects = self._build_objects()
+        self.strategies = self._build_strategies()
+
+    def _build_objects(self) -> List[dict]:
+        rng = self.rng
+        objects = []
+        for tid in self.technique_ids:
+            objects.append({
+                "type": "attack-pattern",
+                "id": f"attack-pattern--{tid}",
+                "name": _text(rng, 3).rstrip("."),
+                "description": _text(rng, 60),
+                "external_references": _ref(tid),
+                "kill_chain_phases": [
+                    {"kill_chain_name": "mitre-attack", "phase_name": p} for p in rng.sample(TACTICS, rng.randint(1, 3))
+                ],
+                "x_mitre_platforms": rng.sample(PLATFORMS, rng.randint(1, 5)),
+                "x_mitre_detection": _text(rng, 30),
+                "x_mitre_is_subtechnique": False,
+            })
+        for sid in self.sub_technique_ids:
+            objects.append({
+                "type": "attack-pattern",
+                "id": f"attack-pattern--{sid}",
+                "name": _text(rng, 3).rstrip("."),
+                "description": _text(rng, 40),
+                "external_references": _ref(sid),
+                "x_mitre_platforms": rng.sample(PLATFORMS, rng.randint(1, 3)),
+                "x_mitre_is_subtechnique": True,
+            })
+        for cid in self.component_ids:
+            objects.append({
+                "type": "x-mitre-data-component",
+                "name": _text(rng, 2).rstrip("."),
+                "description": _text(rng, 20),
+                "external_references": _ref(cid),
+                "x_mitre_data_source_ref": f"x-mitre-data-source--{rng.randint(1, 40)}",
+            })
+        all_techniques = self.technique_ids + self.sub_technique_ids
+        for i in range(self.sizes["groups"]):
+            group_ref = f"intrusion-set--G{i + 1:04d}"
+            victims = " ".join(f"It has targeted {industry.lower()} organizations."
+                               for industry in rng.sample(INDUSTRIES, rng.randint(0, 2)))
+            objects.append({
+                "type": "intrusion-set",
+                "id": group_ref,
+                "name": f"Group {i}",
+                "aliases": [f"Group {i}", f"Alias {i}"],
+                "description": f"{_text(rng, 40)} {victims}".strip(),
+                "external_references": _ref(f"G{i + 1:04d}"),
+            })
+            for tid in rng.sample(all_techniques, min(len(all_techniques), rng.randint(5, 60))):
+                objects.append({"type": "relationship", "relationship_type": "uses",
+                                "source_ref": group_ref, "target_ref": f"attack-pattern--{tid}"})
+        return objects
+
+    def _build_strategies(self) -> List[dict]:
+        """Detection strategies and analytics; these aren't synced from TAXII so they're inserted directly."""
+        rng = self.rng
+        targets = self.technique_ids + self.sub_technique_ids
+        strategies = []
+        for i in range(self.sizes["detection_strategies"]):
+            target = targets[i % len(targets)] if i < len(targets) else rng.choice(targets)
+            strategies.append({
+                "strategy_id": f"DET{i + 1:04d}",
+                "technique_id": target if "." not in target else None,
+                "sub_technique_id": target if "." in target else None,
+                "name": _text(rng, 4).rstrip("."),
+                "description": _text(rng, 25),
+                "behavior_to_detect": _text(rng, 12),
+                "analytics": [],
+            })
+        for i in range(self.sizes["analytics"]):
+            strategy = strategies[i % len(strategies)]
+            strategy["analytics"].append({
+                "analytic_id": f"AN{i + 1:05d}",
+                "strategy_id": strategy["strategy_id"],
+                "name": _text(rng, 4).rstrip("."),
+                "description": _text(rng, 20),
+                "detection_logic": _text(rng, 15),
+                "platform": rng.choice(PLATFORMS),
+                "data_components_required": rng.sample(self.component_ids, rng.randint(1, 3)),
+                "tunable_parameters": {},
+            })
+        return strategies
+
+    def store(self) -> "SyntheticStore":
+        return SyntheticStore(self.objects)
+
+    @staticmethod
+    def clear_detections(db):
+        """Detection rows reference techniques, so they must go before sync_techniques clears those."""
+        from app.models.attack_data import Analytic, DetectionStrategy
+
+        db.query(Analytic).delete()
+        db.query(DetectionStrategy).delete()
+        db.commit()
+
+    def populate_detections(self, db):
+        from app.models.attack_data import Analytic, DetectionStrategy
+
+        self.clear_detections(db)
+        db.bulk_insert_mappings(DetectionStrategy, [
+            {k: v for k, v in s.items() if k != "analytics"} for s in self.strategies
+        ])
+        db.bulk_insert_mappings(Analytic, [a for s in self.strategies for a in s["analytics"]])
+        db.commit()
+
+
+class SyntheticStore:
+    """Duck-types the subset of stix2.MemoryStore used by sync_mitre_data."""
+
+    def __init__(self, objects: List[dict]):
+        self._by_type: Dict[str, List[dict]] = {}
+        for obj in objects:
+            self._by_type.setdefault(obj["type"], []).append(obj)
+
+    def query(self, filters):
+        for prop, op, value in filters:
+            if prop == "type" and op == "=":
+                return list(self._by_type.get(value, []))
+        raise ValueError(f"unsupported filter {filters}")
+
+
+def load_questions() -> List[dict]:
+    with open(os.path.abspath(QUESTIONNAIRE_PATH), "r", encoding="utf-8") as f:
+        data = json.load(f)
+    return [q for s in data["sections"] for q in s["questions"]]
+
+
+def generate_answers(rng: random.Random, maturity: Optional[float] = None,
+                     technique_ids: Optional[List[str]] = None) -> List[dict]:
+    """Questionnaire submission shaped like SubmitQuestionnaireRequest.responses.
+
+    maturity (0..1) is the chance each capability is present; when technique_ids
+    are given a matching share of technique-level answers is added too.
+    """
+    maturity = rng.random() if maturity is None else maturity
+    answers = []
+    for q in load_questions():
+        has = rng.random() < maturity
+        answers.append({
+            "question_id": q["question_id"],
+            "capability_type": q["capability_type"],
+            "has_capability": has,
+            "coverage_level": rng.randint(1, 5) if has else 0,
+            "platforms_covered": rng.sample(PLATFORMS[:4], rng.randint(1, 3)) if has else [],
+            "notes": "",
+        })
+    for tid in technique_ids or []:
+        if rng.random() < maturity:
+            answers.append({
+                "question_id": tid,
+                "capability_type": "technique_detection",
+                "has_capability": True,
+                "coverage_level": rng.randint(1, 5),
+                "platforms_covered": rng.sample(PLATFORMS[:4], rng.randint(1, 2)),
+                "notes": "",
+            })
+    return answers
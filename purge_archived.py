@@ -0,0 +1,32 @@
+"""
+Remove coverage and questionnaire detail of long-archived assessments
+Run this script periodically (e.g. nightly from cron):
+
+    python purge_archived.py [--older-than-days 90] [--tenant-id 42] [--dry-run]
+"""
+
+import argparse
+import json
+from app.database import SessionLocal
+from app.services.retention import purge_archived
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--older-than-days", type=float,
+                        help="archived for at least this long (default RETENTION_ARCHIVED_DAYS)")
+    parser.add_argument("--tenant-id", type=int, help="only this tenant's assessments")
+    parser.add_argument("--dry-run", action="store_true", help="report what would be removed")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        report = purge_archived(db, args.older_than_days, args.tenant_id, args.dry_run)
+        print(json.dumps(report, indent=2))
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    main()
@@ -3,23 +3,34 @@ Sync MITRE ATT&CK data from TAXII server into local database
 Run this script to populate techniques, sub-techniques, detection strategies, etc.
 """
 
-from taxii2client.v21 import Server, as_pages
-from stix2 import MemoryStore
+from typing import TYPE_CHECKING
 from sqlalchemy.orm import Session
 from app.database import SessionLocal
+from app.services.catalog import compile_catalog_file
+from app.services.progress import ProgressReporter, progress_broker
+from app.services.technique_documents import sync_technique_documents
+from app.services.threat_exposure import infer_target_industries
 from app.models.attack_data import (
     Technique, SubTechnique, DetectionStrategy, 
     Analytic, DataComponent, ThreatGroup
 )
 from datetime import datetime
 import os
+import sys
+
+if TYPE_CHECKING:
+    from stix2 import MemoryStore
 
 # TAXII Configuration
 TAXII_SERVER = os.getenv("ATTACK_TAXII_SERVER", "https://cti-taxii.mitre.org/taxii/")
 COLLECTION_ID = os.getenv("ATTACK_COLLECTION_ID", "95ecc380-afe9-11e4-9b6c-751b66dd541e")
 
-def fetch_attack_data():
+def fetch_attack_data(progress: ProgressReporter = None):
     """Fetch all ATT&CK objects from TAXII server"""
+    # Imported here: stix2/taxii2client are slow to import and only the sync needs them.
+    from taxii2client.v21 import Server, as_pages
+    from stix2 import MemoryStore
+
     print(f"Connecting to TAXII server: {TAXII_SERVER}")
     server = Server(TAXII_SERVER)
     api_root = server.api_roots[0]
@@ -27,14 +38,17 @@ def fetch_attack_data():
     
     print(f"Fetching ATT&CK data from collection: {collection.title}")
     store = MemoryStore()
+    progress = progress or ProgressReporter(None)
+    progress.phase("fetch")
     
     # Fetch all objects
     for bundle in as_pages(collection.get_objects, per_request=100):
         store.add(bundle)
+        progress.advance(len(bundle.get("objects", ())))
     
     return store
 
-def sync_techniques(db: Session, store: MemoryStore):
+def sync_techniques(db: Session, store: "MemoryStore", progress: ProgressReporter = None):
     """Sync techniques and sub-techniques"""
     print("Syncing techniques...")
     
@@ -44,8 +58,11 @@ def sync_techniques(db: Session, store: MemoryStore):
     
     # Get all attack-patterns (techniques)
     patterns = store.query([("type", "=", "attack-pattern")])
+    progress = progress or ProgressReporter(None)
+    progress.phase("techniques", len(patterns))
     
     for pattern in patterns:
+        progress.advance()
         # Check if it's a sub-technique (has x_mitre_is_subtechnique)
         is_sub = pattern.get('x_mitre_is_subtechnique', False)
         
@@ -97,7 +114,7 @@ def sync_techniques(db: Session, store: MemoryStore):
     db.commit()
     print(f"Synced {db.query(Technique).count()} techniques and {db.query(SubTechnique).count()} sub-techniques")
 
-def sync_data_components(db: Session, store: MemoryStore):
+def sync_data_components(db: Session, store: "MemoryStore", progress: ProgressReporter = None):
     """Sync data components and data sources"""
     print("Syncing data components...")
     
@@ -105,8 +122,11 @@ def sync_data_components(db: Session, store: MemoryStore):
     
     # Get all data components (x-mitre-data-component)
     components = store.query([("type", "=", "x-mitre-data-component")])
+    progress = progress or ProgressReporter(None)
+    progress.phase("data_components", len(components))
     
     for comp in components:
+        progress.advance()
         ext_refs = comp.get('external_references', [])
         comp_id = None
         for ref in ext_refs:
@@ -130,15 +150,31 @@ def sync_data_components(db: Session, store: MemoryStore):
     db.commit()
     print(f"Synced {db.query(DataComponent).count()} data components")
 
-def sync_threat_groups(db: Session, store: MemoryStore):
+def sync_threat_groups(db: Session, store: "MemoryStore", progress: ProgressReporter = None):
     """Sync threat groups (intrusion sets)"""
     print("Syncing threat groups...")
     
     db.query(ThreatGroup).delete()
     
     groups = store.query([("type", "=", "intrusion-set")])
+
+    # STIX id -> ATT&CK id for techniques, then group STIX id -> techniques it uses
+    pattern_ids = {}
+    for pattern in store.query([("type", "=", "attack-pattern")]):
+        for ref in pattern.get('external_references', []):
+            if ref.get('source_name') == 'mitre-attack':
+                pattern_ids[pattern.get('id')] = ref.get('external_id')
+                break
+    techniques_used = {}
+    for rel in store.query([("type", "=", "relationship")]):
+        if rel.get('relationship_type') != 'uses' or rel.get('target_ref') not in pattern_ids:
+            continue
+        techniques_used.setdefault(rel.get('source_ref'), set()).add(pattern_ids[rel.get('target_ref')])
     
+    progress = progress or ProgressReporter(None)
+    progress.phase("threat_groups", len(groups))
     for group in groups:
+        progress.advance()
         ext_refs = group.get('external_references', [])
         group_id = None
         for ref in ext_refs:
@@ -154,8 +190,8 @@ def sync_threat_groups(db: Session, store: MemoryStore):
             name=group.get('name', ''),
             aliases=group.get('aliases', []),
             description=group.get('description', ''),
-            target_industries=[],
-            techniques_used=[]
+            target_industries=infer_target_industries(group.get('description', '')),
+            techniques_used=sorted(techniques_used.get(group.get('id'), ()))
         )
         db.add(threat_group)
     
@@ -166,25 +202,53 @@ def main():
     """Main sync function"""
     print("Starting MITRE ATT&CK data sync...")
     
-    # Fetch data from TAXII
-    store = fetch_attack_data()
-    
-    # Create DB session
-    db = SessionLocal()
+    # Subscribers follow along on GET /api/v1/progress/sync
+    progress = ProgressReporter("sync")
+    db = None
     
     try:
+        # Fetch data from TAXII
+        store = fetch_attack_data(progress)
+        
+        # Create DB session
+        db = SessionLocal()
+        
         # Sync all entities
-        sync_techniques(db, store)
-        sync_data_components(db, store)
-        sync_threat_groups(db, store)
+        sync_techniques(db, store, progress)
+        sync_data_components(db, store, progress)
+        sync_threat_groups(db, store, progress)
+        progress.phase("documents")
+        print(f"Synced technique documents: {sync_technique_documents(db)}")
+
+        # Workers pick up the new catalog file on their next reload check.
+        progress.phase("catalog")
+        version = compile_catalog_file(db)
+        print(f"Compiled ATT&CK catalog version {version}")
+        progress.done(catalog_version=version)
         
         print("\n✅ MITRE ATT&CK data sync completed successfully!")
     except Exception as e:
         print(f"\n❌ Error during sync: {e}")
-        db.rollback()
+        progress.failed(str(e))
+        if db is not None:
+            db.rollback()
         raise
+    finally:
+        if db is not None:
+            db.close()
+        # Send the progress notifications still queued before the process exits.
+        progress_broker.close()
+
+def compile_only():
+    """Recompile the shared catalog file from the current tables without syncing"""
+    db = SessionLocal()
+    try:
+        print(f"Compiled ATT&CK catalog version {compile_catalog_file(db)}")
     finally:
         db.close()
 
 if __name__ == "__main__":
-    main()
+    if "--compile-only" in sys.argv[1:]:
+        compile_only()
+    else:
+        main()